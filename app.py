@@ -1,17 +1,21 @@
 """
 SnapNews - 个性化新闻聚合应用主入口
 """
+import logging
 import streamlit as st
 from components.sidebar import render_sidebar
 from components.news_card import render_news_cards
+from components.saved_news import render_saved_news
+from components.metrics_panel import render_metrics_panel
 from components.summary import render_summary_container, stream_summary, render_empty_summary
 from utils.news_api import fetch_news, get_top_news
+from utils.ranking import select_summary_news
 from utils.openai_api import generate_news_summary, DEFAULT_MODEL
-import os
-from dotenv import load_dotenv
+from utils.prefetch import start_prefetch_scheduler
+from utils import metrics
 
-# 加载环境变量
-load_dotenv()
+# 配置日志（只在入口配置一次，各模块只获取自己的logger）
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
 # 页面配置
 st.set_page_config(
@@ -52,22 +56,19 @@ def main():
     """
     主函数
     """
-    # 渲染侧边栏并获取选中的标签
+    # 开始记录本次运行的计时区间，并启动指标导出（仅在启用指标时生效）
+    metrics.start_rerun()
+    metrics.start_metrics_exporters()
+    
+    # 渲染侧边栏并获取选中的标签（勾选标签只重新运行侧边栏片段，主页面在点击按钮时读取最新选择）
     selected_tags = render_sidebar()
     
+    # 启动后台预取（每个服务进程只启动一次）
+    start_prefetch_scheduler(st.session_state.get('selected_model', DEFAULT_MODEL))
+    
     # 主内容区
     st.title("📰 SnapNews")
-    st.write("选择感兴趣的标签，获取个性化新闻推荐和AI摘要")
-    
-    # 显示已选标签
-    if selected_tags:
-        st.write("已选标签:")
-        cols = st.columns(min(8, len(selected_tags) + 1))
-        for i, tag in enumerate(selected_tags):
-            with cols[i]:
-                st.markdown(f"<div style='background-color: #E3F2FD; padding: 8px; border-radius: 5px; text-align: center;'>{tag}</div>", unsafe_allow_html=True)
-    else:
-        st.info("请从侧边栏选择感兴趣的标签")
+    st.write("从侧边栏选择感兴趣的标签，获取个性化新闻推荐和AI摘要")
     
     # 初始化状态
     if 'news_data' not in st.session_state:
@@ -76,20 +77,27 @@ def main():
         st.session_state.news_summary = None
     
     # 获取新闻按钮
-    if st.button("获取新闻", disabled=not selected_tags, type="primary"):
+    fetch_clicked = st.button("获取新闻", type="primary")
+    if fetch_clicked and not selected_tags:
+        st.info("请从侧边栏选择感兴趣的标签")
+    elif fetch_clicked:
         with st.spinner("正在获取最新新闻..."):
             # 获取新闻数据
-            news_df = fetch_news(selected_tags)
+            news = fetch_news(selected_tags)
             
-            if news_df.empty:
+            if not news:
                 st.error("未能获取到相关新闻，请尝试其他标签或检查API连接")
             else:
-                # 获取Top 8新闻
-                top_news = get_top_news(news_df)
-                st.session_state.news_data = top_news.to_dict('records')
+                # 报告合并的重复新闻数
+                if news.duplicates_removed:
+                    st.caption(f"已合并{news.duplicates_removed}条重复新闻")
+                
+                # 按标签权重排序，获取Top 8新闻
+                tag_weights = st.session_state.get('tag_weights', {})
+                st.session_state.news_data = get_top_news(news, tags=selected_tags, tag_weights=tag_weights)
                 
-                # 所有新闻数据(最多40条)用于AI摘要
-                all_news = news_df.head(40).to_dict('records')
+                # 按相关性选出最多40条新闻用于AI摘要
+                all_news = select_summary_news(news, selected_tags, tag_weights)
                 
                 # 使用配置的模型，不需要用户选择
                 model_to_use = st.session_state.get('selected_model', DEFAULT_MODEL)
@@ -131,6 +139,12 @@ def main():
         
         render_empty_summary()
 
+    # 收藏的新闻（按页加载）
+    render_saved_news()
+    
+    # 性能调试面板（仅在启用指标时显示）
+    render_metrics_panel()
+
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,439 @@
+"""
+「获取新闻」全流程基准测试
+
+在本地启动一个模拟NewsAPI和OpenAI兼容流式接口的HTTP服务，依次执行
+fetch_news -> get_top_news -> generate_news_summary -> stream_summary，
+记录不同文章数下的首张卡片时间、摘要首个token时间、总耗时和峰值内存，结果保存为JSON。
+
+用法:
+    python benchmarks/bench_pipeline.py
+    python benchmarks/bench_pipeline.py --articles 8 100 1000 --repeat 5 --token-rate 200
+    python benchmarks/bench_pipeline.py --compare benchmarks/results/pipeline-旧结果.json
+
+--compare 指定的基线结果中任一指标变慢超过 --threshold 比例时，以退出码1结束。
+"""
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import platform
+import tempfile
+import threading
+import statistics
+import subprocess
+import tracemalloc
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+RESULTS_DIR = os.path.join(ROOT_DIR, 'benchmarks', 'results')
+DEFAULT_ARTICLE_COUNTS = [8, 40, 100, 400, 1000]
+DEFAULT_TAGS = ["AI", "LLM", "区块链"]
+BENCH_MODEL = "gpt-3.5-turbo"
+
+# 对比基线时参与回归判断的指标（越小越好）
+COMPARED_METRICS = ('time_to_first_card_ms', 'time_to_first_token_ms', 'wall_time_ms', 'peak_memory_kb',
+                    'dedup_candidate_pairs')
+
+# 模拟摘要正文（按 token 切分后逐个发送）
+STUB_SUMMARY = (
+    "## 今日要点\n"
+    "- 多家机构发布人工智能新成果，大模型应用加速落地。\n"
+    "- 区块链监管框架持续完善，多个城市启动标准化试点。\n"
+    "- 头部企业加大算力投入，产业链上下游同步扩张。\n\n"
+    "## 主题聚焦\n"
+    "**人工智能**：研究成果与商业化进展并行，推理成本持续下降。\n\n"
+    "**区块链**：合规化成为主旋律，金融场景应用稳步推进。\n\n"
+    "## 深度分析\n"
+    "大模型竞争正从参数规模转向应用效果与成本控制，具备数据和场景优势的企业将占据先机。"
+)
+
+
+class StubConfig:
+    """模拟服务的延迟和吐字速度配置"""
+
+    def __init__(self, news_latency, llm_ttft, token_rate, summary_tokens):
+        self.news_latency = news_latency
+        self.llm_ttft = llm_ttft
+        self.token_rate = token_rate
+        self.summary_tokens = summary_tokens
+
+
+def _summary_tokens(count):
+    """将模拟摘要切分为指定数量的token（每个token约2个字符，不足时循环）"""
+    pieces = [STUB_SUMMARY[i:i + 2] for i in range(0, len(STUB_SUMMARY), 2)]
+    return [pieces[i % len(pieces)] for i in range(count)]
+
+
+def _stub_notes(request):
+    """为要点请求中的每篇文章生成一行 "[编号] 要点"（标题加固定后缀，模拟约60字的要点）"""
+    prompt = request.get('messages', [{}])[-1].get('content', '')
+    return "\n".join(
+        f"[{number}] {title[:40]}：发布新进展，涉及多家机构与关键数据，预计影响后续走向"
+        for number, title in re.findall(r'^\[(\d+)\] (.+)$', prompt, re.MULTILINE)
+    )
+
+
+def make_stub_handler(config):
+    """
+    创建模拟服务的请求处理类
+
+    参数:
+        config (StubConfig): 延迟配置
+
+    返回:
+        type: BaseHTTPRequestHandler 子类
+    """
+    from utils.news_sources import generate_articles
+
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _write_chunk(self, data):
+            self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+            self.wfile.flush()
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != '/v2/everything':
+                self.send_error(404)
+                return
+
+            query = {name: values[0] for name, values in parse_qs(url.query).items()}
+            time.sleep(config.news_latency)
+            terms = [term.strip() for term in query.get('q', '').split(' OR ') if term.strip()]
+            articles = generate_articles(int(query.get('pageSize', 100)), terms, language=query.get('language'))
+            self._send_json({'status': 'ok', 'totalResults': len(articles), 'articles': articles})
+
+        def do_POST(self):
+            if urlparse(self.path).path != '/v1/chat/completions':
+                self.send_error(404)
+                return
+
+            request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            model = request.get('model', BENCH_MODEL)
+            time.sleep(config.llm_ttft)
+
+            if not request.get('stream'):
+                # 增量模式的逐篇要点请求：按提示词中的编号为每篇文章返回一句要点
+                self._send_json({
+                    'id': 'stub', 'object': 'chat.completion', 'created': int(time.time()), 'model': model,
+                    'choices': [{'index': 0, 'finish_reason': 'stop',
+                                 'message': {'role': 'assistant', 'content': _stub_notes(request)}}],
+                })
+                return
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+
+            interval = 1.0 / config.token_rate if config.token_rate > 0 else 0
+            next_at = time.perf_counter()
+            for token in _summary_tokens(config.summary_tokens):
+                chunk = {
+                    'id': 'stub', 'object': 'chat.completion.chunk', 'created': int(time.time()), 'model': model,
+                    'choices': [{'index': 0, 'delta': {'content': token}, 'finish_reason': None}],
+                }
+                self._write_chunk(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode('utf-8'))
+                next_at += interval
+                delay = next_at - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            self._write_chunk(b"data: [DONE]\n\n")
+            self._write_chunk(b"")
+
+    return StubHandler
+
+
+class _StubServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # 客户端关闭保活连接属于正常情况
+        if not isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            super().handle_error(request, client_address)
+
+
+def start_stub_server(config):
+    """
+    在后台线程中启动模拟服务
+
+    参数:
+        config (StubConfig): 延迟配置
+
+    返回:
+        ThreadingHTTPServer: 已启动的服务（监听随机端口）
+    """
+    server = _StubServer(('127.0.0.1', 0), make_stub_handler(config))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="bench-stub-server", daemon=True).start()
+    return server
+
+
+class RecordingPlaceholder:
+    """
+    代替 Streamlit 占位符，只统计渲染次数（在Streamlit运行时之外驱动 stream_summary）
+    """
+
+    def __init__(self):
+        self.renders = 0
+
+    def markdown(self, *args, **kwargs):
+        self.renders += 1
+
+    def container(self):
+        return self
+
+    def empty(self):
+        return self
+
+
+def configure_pipeline(base_url, work_dir):
+    """
+    将新闻源、模型提供商和本地数据库指向模拟服务和临时目录，并关闭各级缓存
+
+    参数:
+        base_url (str): 模拟服务地址
+        work_dir (str): 临时目录
+    """
+    os.environ.setdefault('OPENAI_API_KEY', 'bench')
+
+    import data.db_utils as db_utils
+    import data.cache_db as cache_db
+    db_utils.DB_PATH = os.path.join(work_dir, 'snapnews.db')
+    cache_db.CACHE_DB_PATH = os.path.join(work_dir, 'cache.db')
+
+    from utils import news_api, openai_api, summary_store, rate_limiter
+    news_api.NEWS_API_KEY = 'bench'
+    news_api.set_news_source(news_api.NewsAPISource(url=f"{base_url}/v2/everything"))
+    for config in openai_api.MODEL_PROVIDERS.values():
+        config['base_url'] = f"{base_url}/v1"
+
+    # 在Streamlit运行时之外调用组件会输出提示，基准测试中忽略
+    import components.summary  # noqa: F401
+    for name in list(logging.root.manager.loggerDict):
+        if name.startswith('streamlit'):
+            logging.getLogger(name).disabled = True
+
+    # 每轮都走完整流程，不命中摘要和要点缓存
+    summary_store._summary_cache.ttl = 0
+    summary_store._notes_cache.ttl = 0
+    # 模拟服务没有配额限制
+    rate_limiter.RATE_LIMIT_ENABLED = False
+
+
+def run_pipeline(tags, article_count, incremental=False):
+    """
+    执行一次「获取新闻」全流程
+
+    参数:
+        tags (list): 标签列表
+        article_count (int): 请求的文章数
+        incremental (bool): 是否使用增量摘要模式
+
+    返回:
+        dict: 本次运行的指标
+    """
+    from utils.news_api import fetch_news, get_top_news
+    from utils.ranking import select_summary_news
+    from utils.openai_api import generate_news_summary
+    from utils.summary_store import extract_chunk_content
+    from components.news_card import build_card_view_models
+    from components.summary import stream_summary
+    from utils.dedup import get_dedup_stats
+
+    candidates_before = get_dedup_stats()['candidate_pairs']
+    tracemalloc.start()
+    started = time.perf_counter()
+
+    news = fetch_news(tags, max_items=article_count, use_cache=False)
+    fetched = time.perf_counter()
+
+    top_news = get_top_news(news, tags=tags)
+    view_models = build_card_view_models(top_news)
+    first_card = time.perf_counter()
+
+    all_news = select_summary_news(news, tags)
+    stream = generate_news_summary(all_news, tags, model=BENCH_MODEL, incremental=incremental, hedge=False)
+
+    first_token = None
+    summary_chars = 0
+
+    def timed(chunks):
+        nonlocal first_token, summary_chars
+        for chunk in chunks:
+            content = extract_chunk_content(chunk)
+            if content:
+                if first_token is None:
+                    first_token = time.perf_counter()
+                summary_chars += len(content)
+            yield chunk
+
+    placeholder = RecordingPlaceholder()
+    stream_summary(placeholder, timed(stream))
+    finished = time.perf_counter()
+
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    def ms(at):
+        return round((at - started) * 1000, 1) if at is not None else None
+
+    return {
+        'articles_fetched': len(news),
+        'duplicates_removed': news.duplicates_removed,
+        'dedup_candidate_pairs': get_dedup_stats()['candidate_pairs'] - candidates_before,
+        'cards': len(view_models),
+        'summary_chars': summary_chars,
+        'renders': placeholder.renders,
+        'fetch_ms': ms(fetched),
+        'time_to_first_card_ms': ms(first_card),
+        'time_to_first_token_ms': ms(first_token),
+        'wall_time_ms': ms(finished),
+        'peak_memory_kb': round(peak / 1024, 1),
+    }
+
+
+def summarize_runs(runs):
+    """取多次运行各指标的中位数"""
+    result = {}
+    for name in runs[0]:
+        values = [run[name] for run in runs if run[name] is not None]
+        result[name] = statistics.median(values) if values else None
+    return result
+
+
+def compare_results(baseline, current, threshold):
+    """
+    与基线结果对比，返回变慢超过阈值的指标
+
+    参数:
+        baseline (dict): 基线结果
+        current (dict): 本次结果
+        threshold (float): 允许的变慢比例
+
+    返回:
+        list: 回归描述列表
+    """
+    baseline_rows = {row['articles']: row for row in baseline.get('results', [])}
+    regressions = []
+    for row in current['results']:
+        base = baseline_rows.get(row['articles'])
+        if not base:
+            continue
+        for metric in COMPARED_METRICS:
+            old, new = base.get(metric), row.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            print(f"  {row['articles']:>5}篇 {metric:<24} {old:>10.1f} -> {new:>10.1f} ({change:+.1%})")
+            if change > threshold:
+                regressions.append(f"{row['articles']}篇 {metric} 变慢 {change:.1%}")
+    return regressions
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="「获取新闻」全流程基准测试")
+    parser.add_argument('--articles', type=int, nargs='+', default=DEFAULT_ARTICLE_COUNTS, help="测试的文章数")
+    parser.add_argument('--tags', nargs='+', default=DEFAULT_TAGS, help="标签列表")
+    parser.add_argument('--repeat', type=int, default=3, help="每个文章数的重复次数（取中位数）")
+    parser.add_argument('--news-latency', type=float, default=0.2, help="模拟NewsAPI的响应延迟（秒）")
+    parser.add_argument('--llm-ttft', type=float, default=0.5, help="模拟模型的首个token延迟（秒）")
+    parser.add_argument('--token-rate', type=float, default=100, help="模拟模型每秒输出的token数，0表示不限速")
+    parser.add_argument('--summary-tokens', type=int, default=300, help="模拟摘要的token数")
+    parser.add_argument('--incremental', action='store_true', help="使用增量摘要模式")
+    parser.add_argument('--output', help="结果文件路径，默认为 benchmarks/results/pipeline-<时间>.json")
+    parser.add_argument('--compare', help="对比的基线结果文件")
+    parser.add_argument('--threshold', type=float, default=0.2, help="判定为回归的变慢比例")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    stub_config = StubConfig(args.news_latency, args.llm_ttft, args.token_rate, args.summary_tokens)
+    server = start_stub_server(stub_config)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    work_dir = tempfile.mkdtemp(prefix="snapnews-bench-")
+
+    try:
+        configure_pipeline(base_url, work_dir)
+        # 预热：导入模块、建立连接池和数据库
+        run_pipeline(args.tags, 8, args.incremental)
+
+        results = []
+        for count in args.articles:
+            runs = [run_pipeline(args.tags, count, args.incremental) for _ in range(args.repeat)]
+            row = {'articles': count, **summarize_runs(runs)}
+            results.append(row)
+            print(
+                f"{count:>5}篇  首张卡片 {row['time_to_first_card_ms']:>8.1f}ms  "
+                f"首个token {row['time_to_first_token_ms'] or 0:>8.1f}ms  "
+                f"总耗时 {row['wall_time_ms']:>8.1f}ms  峰值内存 {row['peak_memory_kb']:>9.1f}KB  "
+                f"去重候选对 {row['dedup_candidate_pairs']:>7.0f}"
+            )
+    finally:
+        server.shutdown()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'git_revision': _git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'config': {
+                'tags': args.tags,
+                'repeat': args.repeat,
+                'news_latency': args.news_latency,
+                'llm_ttft': args.llm_ttft,
+                'token_rate': args.token_rate,
+                'summary_tokens': args.summary_tokens,
+                'incremental': args.incremental,
+            },
+        },
+        'results': results,
+    }
+
+    output = args.output or os.path.join(RESULTS_DIR, f"pipeline-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"结果已保存到 {output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"与基线 {args.compare} 对比:")
+        regressions = compare_results(baseline, report, args.threshold)
+        if regressions:
+            print("发现性能回归:\n  " + "\n  ".join(regressions))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
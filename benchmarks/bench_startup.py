@@ -0,0 +1,183 @@
+"""
+冷启动导入耗时基准测试
+
+在全新的Python进程中交替多次导入 app.py（不执行 main()）和单独导入 streamlit，
+各取最小值，以两者之比作为启动开销指标（与机器快慢和系统负载无关），
+并检查首屏不需要的重量级依赖（pandas、openai 等）没有在导入阶段被加载。
+
+用法:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --repeat 20 --top 20
+    python benchmarks/bench_startup.py --update
+
+有延迟加载的依赖在导入阶段被加载，或导入耗时比超过 benchmarks/startup_budget.json 中记录的预算时，
+以退出码1结束。--update 以本次耗时比乘以 (1 + --headroom) 重新记录预算。
+"""
+import os
+import sys
+import json
+import argparse
+import platform
+import subprocess
+from datetime import datetime
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET_PATH = os.path.join(ROOT_DIR, 'benchmarks', 'startup_budget.json')
+
+# 首次使用时才应导入的依赖
+DEFERRED_MODULES = ["pandas", "numpy", "openai", "httpx", "requests", "PIL"]
+
+# 基准模块：app 本身必须导入的框架，导入 app 的耗时以它为单位衡量
+BASELINE_MODULE = "streamlit"
+
+# 在子进程中执行：计时导入指定模块，输出耗时及已加载的延迟依赖
+IMPORT_SNIPPET = """
+import sys, json, time, importlib
+started = time.perf_counter()
+importlib.import_module(sys.argv[1])
+elapsed = time.perf_counter() - started
+deferred = json.loads(sys.argv[2])
+print(json.dumps({
+    'import_ms': round(elapsed * 1000, 1),
+    'loaded_deferred': [name for name in deferred if name in sys.modules],
+}))
+"""
+
+
+def _subprocess_env():
+    env = dict(os.environ)
+    # 避免用户环境中的选项影响导入耗时
+    env.pop('PYTHONPROFILEIMPORTTIME', None)
+    env['PYTHONDONTWRITEBYTECODE'] = '1'
+    return env
+
+
+def measure_import(deferred_modules=DEFERRED_MODULES, module='app'):
+    """
+    在新进程中导入模块一次
+
+    参数:
+        deferred_modules (list): 需要检查是否已加载的模块
+        module (str): 导入的模块
+
+    返回:
+        dict: import_ms（导入耗时，毫秒）和 loaded_deferred（已加载的延迟依赖）
+    """
+    output = subprocess.run(
+        [sys.executable, '-c', IMPORT_SNIPPET, module, json.dumps(deferred_modules)],
+        cwd=ROOT_DIR, env=_subprocess_env(), capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def slowest_imports(top=10):
+    """
+    使用 -X importtime 统计导入 app 时自身耗时最长的模块
+
+    参数:
+        top (int): 返回的模块数
+
+    返回:
+        list: (模块名, 自身耗时毫秒, 累计耗时毫秒) 列表，按自身耗时倒序
+    """
+    stderr = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import app'],
+        cwd=ROOT_DIR, env=_subprocess_env(), capture_output=True, text=True, check=True
+    ).stderr
+
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        try:
+            self_us, cumulative_us = int(parts[0]), int(parts[1])
+        except (IndexError, ValueError):
+            # 表头行
+            continue
+        rows.append((parts[2].strip(), self_us / 1000, cumulative_us / 1000))
+    rows.sort(key=lambda row: row[1], reverse=True)
+    return rows[:top]
+
+
+def load_budget(path=BUDGET_PATH):
+    """读取导入耗时预算，文件不存在时返回None"""
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="冷启动导入耗时基准测试")
+    parser.add_argument('--repeat', type=int, default=10, help="导入次数（取最小值）")
+    parser.add_argument('--top', type=int, default=10, help="显示自身导入耗时最长的模块数，0表示不显示")
+    parser.add_argument('--budget', default=BUDGET_PATH, help="预算文件路径")
+    parser.add_argument('--update', action='store_true', help="按本次结果重新记录预算")
+    parser.add_argument('--headroom', type=float, default=0.25, help="记录预算时在耗时比基础上预留的比例")
+    args = parser.parse_args(argv)
+
+    budget = load_budget(args.budget)
+    deferred_modules = budget.get('deferred_modules', DEFERRED_MODULES) if budget else DEFERRED_MODULES
+
+    # 预热一次，生成字节码缓存并让文件进入页缓存
+    measure_import(deferred_modules)
+    # 交替测量，使系统负载的波动同时作用于两者；取最小值排除偶发的调度和IO抖动
+    runs, baseline_runs = [], []
+    for _ in range(args.repeat):
+        runs.append(measure_import(deferred_modules))
+        baseline_runs.append(measure_import(deferred_modules, BASELINE_MODULE))
+    import_ms = min(run['import_ms'] for run in runs)
+    baseline_ms = min(run['import_ms'] for run in baseline_runs)
+    ratio = import_ms / max(baseline_ms, 0.1)
+    loaded_deferred = sorted({name for run in runs for name in run['loaded_deferred']})
+
+    samples = ", ".join(f"{run['import_ms']:.0f}" for run in runs)
+    baseline_samples = ", ".join(f"{run['import_ms']:.0f}" for run in baseline_runs)
+    print(f"导入 app 最短耗时: {import_ms:.1f}ms（{args.repeat}次: {samples}）")
+    print(f"导入 {BASELINE_MODULE} 最短耗时: {baseline_ms:.1f}ms（{args.repeat}次: {baseline_samples}）")
+    print(f"耗时比: {ratio:.2f}")
+
+    if args.top:
+        print(f"自身导入耗时最长的{args.top}个模块:")
+        for name, self_ms, cumulative_ms in slowest_imports(args.top):
+            print(f"  {self_ms:>8.1f}ms  (累计 {cumulative_ms:>8.1f}ms)  {name}")
+
+    if args.update:
+        budget = {
+            'import_ratio': round(ratio * (1 + args.headroom), 2),
+            'deferred_modules': deferred_modules,
+            'recorded': {
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'min_import_ms': import_ms,
+                'min_baseline_ms': baseline_ms,
+                'ratio': round(ratio, 3),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+            },
+        }
+        with open(args.budget, 'w', encoding='utf-8') as f:
+            json.dump(budget, f, ensure_ascii=False, indent=2)
+            f.write('\n')
+        print(f"预算已更新为耗时比 {budget['import_ratio']}: {args.budget}")
+        return 0
+
+    failures = []
+    if loaded_deferred:
+        failures.append(f"导入阶段加载了应延迟导入的依赖: {', '.join(loaded_deferred)}")
+
+    if budget is None or 'import_ratio' not in budget:
+        print(f"预算文件 {args.budget} 中没有耗时比预算，使用 --update 记录预算")
+    else:
+        print(f"预算: 耗时比 {budget['import_ratio']}")
+        if ratio > budget['import_ratio']:
+            failures.append(f"导入耗时比 {ratio:.2f} 超出预算 {budget['import_ratio']}")
+
+    if failures:
+        print("启动性能检查未通过:\n  " + "\n  ".join(failures))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
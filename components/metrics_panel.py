@@ -0,0 +1,56 @@
+"""
+性能调试面板组件
+"""
+import streamlit as st
+from utils import metrics
+from utils.lazy_import import lazy_import
+from utils.news_api import get_transport_stats, get_news_cache_stats
+from utils.rate_limiter import get_rate_limit_status
+
+pd = lazy_import("pandas")
+
+
+def summarize_rerun_spans(spans):
+    """
+    按区间名称汇总本次页面运行的计时区间
+
+    参数:
+        spans (list): metrics.get_rerun_spans() 返回的区间列表
+
+    返回:
+        pandas.DataFrame: 每个区间的次数、总耗时和最大耗时，按总耗时倒序
+    """
+    if not spans:
+        return pd.DataFrame(columns=['区间', '次数', '总耗时(ms)', '最大耗时(ms)'])
+
+    df = pd.DataFrame(spans)
+    df['区间'] = [
+        name if not labels else f"{name}[{','.join(str(value) for value in labels.values())}]"
+        for name, labels in zip(df['span'], df['labels'])
+    ]
+    summary = df.groupby('区间', sort=False)['ms'].agg(['count', 'sum', 'max']).reset_index()
+    summary.columns = ['区间', '次数', '总耗时(ms)', '最大耗时(ms)']
+    return summary.sort_values('总耗时(ms)', ascending=False, ignore_index=True).round(1)
+
+
+def render_metrics_panel():
+    """
+    在侧边栏渲染本次运行的热路径耗时及传输层、缓存统计（仅在启用指标时显示）
+    """
+    if not metrics.METRICS_ENABLED:
+        return
+
+    with st.sidebar.expander("⏱ 性能调试", expanded=False):
+        st.caption("本次页面运行的计时区间")
+        st.dataframe(summarize_rerun_spans(metrics.get_rerun_spans()), hide_index=True, width='stretch')
+
+        transport = get_transport_stats()
+        cache = get_news_cache_stats()
+        col1, col2 = st.columns(2)
+        col1.metric("NewsAPI调用", transport['calls'], f"{transport['avg_latency_ms']:.0f} ms", delta_color="off")
+        col2.metric("缓存命中", cache.get('hits', 0), f"未命中 {cache.get('misses', 0)}", delta_color="off")
+
+        quotas = get_rate_limit_status()
+        if quotas:
+            st.caption("上游配额余量")
+            st.dataframe(pd.DataFrame(quotas).round(1), hide_index=True, width='stretch')
@@ -2,141 +2,214 @@
 新闻卡片组件
 """
 import streamlit as st
-from datetime import datetime
-import pandas as pd
-import pytz
+import html
+import time
+import hashlib
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from utils.image_cache import prefetch_thumbnails
+from utils.articles import Article
+from data.db_utils import save_news
+from components.saved_news import reset_saved_news
 
+# 显示日期使用的本地时区
+try:
+    LOCAL_TZ = ZoneInfo('Asia/Shanghai')
+except ZoneInfoNotFoundError:
+    # 系统缺少时区数据库时使用固定的UTC+8
+    LOCAL_TZ = timezone(timedelta(hours=8))
 
-def format_date(date_str):
+# 描述截断长度
+DESCRIPTION_MAX_CHARS = 120
+
+# 卡片样式（每次页面运行只注入一次）
+CARD_STYLE = """
+<style>
+.news-card {
+    border: 1px solid #e0e0e0;
+    border-radius: 8px;
+    padding: 15px;
+    margin-bottom: 15px;
+    transition: all 0.3s;
+}
+.news-card:hover {
+    box-shadow: 0 4px 8px rgba(0,0,0,0.1);
+    transform: translateY(-2px);
+}
+.news-title {
+    font-weight: bold;
+    margin-bottom: 5px;
+    font-size: 18px;
+}
+.news-meta {
+    color: #666;
+    font-size: 12px;
+    margin-bottom: 8px;
+}
+.news-desc {
+    font-size: 14px;
+    color: #333;
+}
+.news-img {
+    border-radius: 4px;
+    max-width: 100%;
+}
+</style>
+"""
+
+
+def format_relative_time(published, now=None):
     """
-    格式化日期
-    
+    将发布时间格式化为相对时间
+
     参数:
-        date_str: 日期字符串或datetime对象
-    
+        published (int): 发布时间（UTC纪元秒）
+        now (float): 当前时间（UTC纪元秒），默认为当前时间
+
     返回:
-        str: 格式化后的日期字符串
+        str: 格式化后的日期字符串，发布时间未知时为空字符串
     """
-    if isinstance(date_str, str):
-        date = pd.to_datetime(date_str)
-    else:
-        # 确保即使传入的是 datetime 对象，也转换为 pandas Timestamp
-        date = pd.Timestamp(date_str)
-
-    # 获取当前的 UTC 时间 (timezone-aware)
-    now_utc = pd.Timestamp.now(tz='UTC')
-
-    # 检查 date 是否是 timezone-naive
-    if date.tzinfo is None or date.tzinfo.utcoffset(date) is None:
-        # 如果是 naive，假定它是 UTC 时间并使其 aware
-        date_utc = date.tz_localize('UTC')
-    else:
-        # 如果已经是 aware，将其转换为 UTC
-        date_utc = date.tz_convert('UTC')
-
-    # 现在 now_utc 和 date_utc 都是 timezone-aware 且在 UTC 时区
-    diff = now_utc - date_utc
-    
-    if diff.days == 0:
-        if diff.seconds < 3600:
-            return f"{diff.seconds // 60}分钟前"
-        else:
-            return f"{diff.seconds // 3600}小时前"
-    elif diff.days == 1:
+    if published is None:
+        return ''
+    now = now if now is not None else time.time()
+
+    seconds = max(0, int(now - published))
+    days = seconds // 86400
+    if days == 0:
+        return f"{seconds // 60}分钟前" if seconds < 3600 else f"{seconds // 3600}小时前"
+    if days == 1:
         return "昨天"
-    else:
-        # 格式化时，最好转换为本地时间以获得更友好的显示
-        local_date = date_utc.tz_convert(pytz.timezone('Asia/Shanghai')) # 或者你需要的本地时区
-        return local_date.strftime("%m月%d日")
+    # 较早的新闻显示本地日期
+    return datetime.fromtimestamp(published, LOCAL_TZ).strftime("%m月%d日")
 
 
-def render_news_card(news_item):
+def build_card_view_models(news_data, now=None):
     """
-    渲染单个新闻卡片
-    
+    一次性计算所有卡片的显示字段（相对时间、截断描述、稳定ID等）
+
     参数:
-        news_item: 新闻项数据
+        news_data (list): Article 列表（也接受NewsAPI格式的字典）
+        now (float): 当前时间（UTC纪元秒）
+
+    返回:
+        list: 卡片视图模型字典列表
+    """
+    now = now if now is not None else time.time()
+
+    view_models = []
+    seen_ids = set()
+    for idx, article in enumerate(news_data):
+        if not isinstance(article, Article):
+            article = Article.from_dict(article)
+
+        title = article.title or '无标题'
+        url = article.url or '#'
+        description = article.description
+        short_desc = description if len(description) <= DESCRIPTION_MAX_CHARS else description[:DESCRIPTION_MAX_CHARS] + "..."
+
+        # 以URL生成稳定ID，重复时追加序号避免按钮key冲突
+        card_id = hashlib.sha1(f"{url}|{title}".encode('utf-8')).hexdigest()[:12]
+        if card_id in seen_ids:
+            card_id = f"{card_id}_{idx}"
+        seen_ids.add(card_id)
+
+        view_models.append({
+            'id': card_id,
+            'title': html.escape(title),
+            'url': url,
+            'source': html.escape(article.source or '未知来源'),
+            'time_label': format_relative_time(article.published, now),
+            'short_desc': html.escape(short_desc),
+            'image_url': article.image_url,
+            'alternate_count': len(article.alternate_sources or ()),
+            'record': article,
+        })
+
+    return view_models
+
+
+def inject_card_styles():
+    """
+    注入卡片样式（每次页面运行调用一次）
+    """
+    st.markdown(CARD_STYLE, unsafe_allow_html=True)
+
+
+def render_news_card(view_model, thumbnail=None):
     """
-    # 提取数据
-    title = news_item.get("title", "无标题")
-    url = news_item.get("url", "#")
-    source = news_item.get("source", "未知来源")
-    published_at = news_item.get("publishedAt", datetime.now())
-    description = news_item.get("description", "")
-    image_url = news_item.get("urlToImage", "")
-    
-    # 截断过长的描述
-    short_desc = description[:120] + "..." if len(description) > 120 else description
-    
-    # 卡片样式
-    card_style = """
-    <style>
-    .news-card {
-        border: 1px solid #e0e0e0;
-        border-radius: 8px;
-        padding: 15px;
-        margin-bottom: 15px;
-        transition: all 0.3s;
-    }
-    .news-card:hover {
-        box-shadow: 0 4px 8px rgba(0,0,0,0.1);
-        transform: translateY(-2px);
-    }
-    .news-title {
-        font-weight: bold;
-        margin-bottom: 5px;
-        font-size: 18px;
-    }
-    .news-meta {
-        color: #666;
-        font-size: 12px;
-        margin-bottom: 8px;
-    }
-    .news-desc {
-        font-size: 14px;
-        color: #333;
-    }
-    .news-img {
-        border-radius: 4px;
-        max-width: 100%;
-    }
-    </style>
+    渲染单个新闻卡片
+
+    参数:
+        view_model (dict): 由 build_card_view_models 生成的卡片视图模型
+        thumbnail (str): 本地缩略图路径，为None时使用远程图片
     """
-    
-    # 显示卡片
-    st.markdown(card_style, unsafe_allow_html=True)
-    
+    meta = f"{view_model['source']} · {view_model['time_label']}"
+    if view_model['alternate_count']:
+        meta += f" · 另有{view_model['alternate_count']}个来源"
+
     col1, col2 = st.columns([3, 1])
-    
+
     with col1:
         st.markdown(f"""
         <div class="news-card">
-            <div class="news-title">{title}</div>
-            <div class="news-meta">{source} · {format_date(published_at)}</div>
-            <div class="news-desc">{short_desc}</div>
+            <div class="news-title">{view_model['title']}</div>
+            <div class="news-meta">{meta}</div>
+            <div class="news-desc">{view_model['short_desc']}</div>
         </div>
         """, unsafe_allow_html=True)
-    
+
     with col2:
-        if image_url:
-            st.image(image_url, use_container_width=True)
-    
+        if thumbnail:
+            st.image(thumbnail, use_container_width=True)
+        elif view_model['image_url']:
+            st.image(view_model['image_url'], use_container_width=True)
+
+    col_read, col_save = st.columns([1, 1])
+
     # 链接按钮
-    if st.button("阅读全文", key=f"btn_{hash(title)}"):
-        st.markdown(f"<a href='{url}' target='_blank'>在新窗口中打开</a>", unsafe_allow_html=True)
+    with col_read:
+        if st.button("阅读全文", key=f"btn_{view_model['id']}"):
+            st.markdown(f"<a href='{html.escape(view_model['url'], quote=True)}' target='_blank'>在新窗口中打开</a>", unsafe_allow_html=True)
+
+    # 收藏按钮
+    with col_save:
+        if st.button("收藏", key=f"save_{view_model['id']}"):
+            if save_news(view_model['record']):
+                reset_saved_news()
+                st.toast("已收藏")
+            else:
+                st.toast("该新闻已在收藏中")
+
+
+@st.fragment
+def _render_card_list(view_models, thumbnails):
+    """
+    渲染卡片列表（作为独立片段，点击「阅读全文」只重新运行本片段）
+
+    参数:
+        view_models (list): 卡片视图模型列表
+        thumbnails (dict): 图片地址到本地缩略图路径的映射
+    """
+    for view_model in view_models:
+        render_news_card(view_model, thumbnail=thumbnails.get(view_model['image_url']))
+        st.markdown("---")
 
 
 def render_news_cards(news_data):
     """
     渲染新闻卡片列表
-    
+
     参数:
         news_data: 新闻数据列表
     """
     if not news_data or len(news_data) == 0:
         st.warning("没有找到相关新闻")
         return
-    
-    for news_item in news_data:
-        render_news_card(news_item)
-        st.markdown("---") 
\ No newline at end of file
+
+    inject_card_styles()
+    view_models = build_card_view_models(news_data)
+
+    # 已缓存的图片使用本地缩略图，其余先用远程地址，同时在后台生成缩略图供下次渲染使用
+    thumbnails = prefetch_thumbnails([view_model['image_url'] for view_model in view_models])
+
+    _render_card_list(view_models, thumbnails)
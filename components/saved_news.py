@@ -0,0 +1,49 @@
+"""
+收藏新闻组件
+"""
+import streamlit as st
+import html
+from data.db_utils import get_saved_news_page, SAVED_NEWS_PAGE_SIZE
+
+
+def reset_saved_news():
+    """清空已加载的收藏列表（收藏新闻后调用，下次显示时从第一页重新加载）"""
+    st.session_state.pop('saved_news_items', None)
+    st.session_state.pop('saved_news_cursor', None)
+
+
+def load_more_saved_news():
+    """加载下一页收藏的新闻"""
+    items, cursor = get_saved_news_page(SAVED_NEWS_PAGE_SIZE, st.session_state.get('saved_news_cursor'))
+    st.session_state.saved_news_items.extend(items)
+    st.session_state.saved_news_cursor = cursor
+
+
+@st.fragment
+def render_saved_news():
+    """
+    渲染收藏的新闻（按页加载，翻页只重新运行本片段）
+    """
+    with st.expander("⭐ 我的收藏", expanded=False):
+        if 'saved_news_items' not in st.session_state:
+            st.session_state.saved_news_items = []
+            st.session_state.saved_news_cursor = None
+            load_more_saved_news()
+
+        items = st.session_state.saved_news_items
+        if not items:
+            st.info("还没有收藏的新闻，点击新闻卡片上的「收藏」按钮即可收藏")
+            return
+
+        for item in items:
+            title = html.escape(item.get('title') or '无标题')
+            url = html.escape(item.get('url') or '#', quote=True)
+            source = html.escape(item.get('source') or '未知来源')
+            st.markdown(
+                f"<a href='{url}' target='_blank'>{title}</a> "
+                f"<span style='color: #666; font-size: 12px;'>{source} · 收藏于 {item.get('saved_at') or ''}</span>",
+                unsafe_allow_html=True
+            )
+
+        if st.session_state.saved_news_cursor is not None:
+            st.button("加载更多", key="saved_news_more", on_click=load_more_saved_news)
@@ -2,34 +2,64 @@
 侧边栏组件
 """
 import streamlit as st
-import os
 from config.default_tags import DEFAULT_TAGS, HOT_TAGS, TECH_TAGS, BUSINESS_TAGS, SCIENCE_TAGS
-from utils.openai_api import MODEL_PROVIDERS
+from utils.ranking import DEFAULT_TAG_WEIGHT
+from data.db_utils import get_tag_combinations, save_tag_combination as persist_tag_combination
+from config.settings import settings
 
 # 获取默认模型
-DEFAULT_MODEL = os.getenv("DEFAULT_MODEL", "deepseek-chat")
+DEFAULT_MODEL = settings.get("DEFAULT_MODEL", "deepseek-chat")
+
+# 标签选择器每页显示的标签数（只有当前页的标签会创建控件）
+TAG_PAGE_SIZE = settings.get_int("TAG_PAGE_SIZE", 20)
+
+# 预设标签分类（热门标签单独显示，分类中不再重复）
+TAG_CATEGORIES = {
+    "技术标签": [tag for tag in TECH_TAGS if tag not in HOT_TAGS],
+    "商业标签": [tag for tag in BUSINESS_TAGS if tag not in HOT_TAGS],
+    "科学标签": [tag for tag in SCIENCE_TAGS if tag not in HOT_TAGS],
+}
+
 
 def initialize_session_state():
     """初始化会话状态"""
+    # 已选标签和自定义标签使用字典作为有序集合（保持选择顺序，O(1)查找和删除）
     if 'selected_tags' not in st.session_state:
-        st.session_state.selected_tags = []
-    
+        st.session_state.selected_tags = {}
+
     if 'custom_tags' not in st.session_state:
-        st.session_state.custom_tags = []
-    
+        st.session_state.custom_tags = {}
+
+    if 'tag_weights' not in st.session_state:
+        st.session_state.tag_weights = {}
+
     if 'tag_combinations' not in st.session_state:
-        st.session_state.tag_combinations = {}
-    
+        # 从数据库加载已保存的标签组合（后台预取也会读取这些组合）
+        st.session_state.tag_combinations = get_tag_combinations()
+
     # 设置默认模型（不在UI中显示，但在后端使用）
     if 'selected_model' not in st.session_state:
         st.session_state.selected_model = DEFAULT_MODEL
 
 
+def toggle_tag(tag, widget_key):
+    """复选框回调：按控件状态选中或取消标签"""
+    if st.session_state[widget_key]:
+        st.session_state.selected_tags[tag] = True
+    else:
+        st.session_state.selected_tags.pop(tag, None)
+
+
+def update_tag_weight(tag, widget_key):
+    """滑块回调：记录标签权重"""
+    st.session_state.tag_weights[tag] = st.session_state[widget_key]
+
+
 def add_custom_tag():
     """添加自定义标签"""
     new_tag = st.session_state.new_custom_tag.strip()
     if new_tag and new_tag not in st.session_state.custom_tags and new_tag not in DEFAULT_TAGS:
-        st.session_state.custom_tags.append(new_tag)
+        st.session_state.custom_tags[new_tag] = True
         st.session_state.new_custom_tag = ""
 
 
@@ -37,93 +67,155 @@ def save_tag_combination():
     """保存标签组合"""
     name = st.session_state.combination_name.strip()
     if name and st.session_state.selected_tags:
-        st.session_state.tag_combinations[name] = st.session_state.selected_tags.copy()
+        tags = list(st.session_state.selected_tags)
+        st.session_state.tag_combinations[name] = tags
+        persist_tag_combination(name, tags)
         st.session_state.combination_name = ""
 
 
+def load_tag_combination(name):
+    """加载标签组合"""
+    tags = st.session_state.tag_combinations.get(name, [])
+    st.session_state.selected_tags = dict.fromkeys(tags, True)
+
+
+def reset_tag_page(prefix):
+    """搜索条件变化时回到第一页"""
+    st.session_state[f"{prefix}_page"] = 0
+
+
+def change_tag_page(prefix, delta):
+    """翻页"""
+    st.session_state[f"{prefix}_page"] = st.session_state.get(f"{prefix}_page", 0) + delta
+
+
+def render_tag_checkbox(tag, prefix):
+    """
+    渲染单个标签复选框（控件状态在创建前与已选标签同步）
+
+    参数:
+        tag (str): 标签
+        prefix (str): 控件key前缀
+    """
+    widget_key = f"{prefix}_{tag}"
+    st.session_state[widget_key] = tag in st.session_state.selected_tags
+    st.checkbox(tag, key=widget_key, on_change=toggle_tag, args=(tag, widget_key))
+
+
+def render_tag_picker(tags, prefix):
+    """
+    渲染可搜索、分页的标签选择器，只为当前页的标签创建控件
+
+    参数:
+        tags (list): 候选标签
+        prefix (str): 控件key前缀
+    """
+    if not tags:
+        st.caption("暂无标签")
+        return
+
+    query = st.text_input(
+        "搜索标签", key=f"{prefix}_search", placeholder="输入关键词过滤",
+        on_change=reset_tag_page, args=(prefix,)
+    ).strip().lower()
+    matched = [tag for tag in tags if query in tag.lower()] if query else list(tags)
+    if not matched:
+        st.caption("没有匹配的标签")
+        return
+
+    page_count = (len(matched) - 1) // TAG_PAGE_SIZE + 1
+    page = min(max(st.session_state.get(f"{prefix}_page", 0), 0), page_count - 1)
+    st.session_state[f"{prefix}_page"] = page
+
+    for tag in matched[page * TAG_PAGE_SIZE:(page + 1) * TAG_PAGE_SIZE]:
+        render_tag_checkbox(tag, prefix)
+
+    if page_count > 1:
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col1:
+            st.button("‹", key=f"{prefix}_prev", disabled=page == 0,
+                      on_click=change_tag_page, args=(prefix, -1))
+        with col2:
+            st.caption(f"第 {page + 1}/{page_count} 页，共 {len(matched)} 个")
+        with col3:
+            st.button("›", key=f"{prefix}_next", disabled=page >= page_count - 1,
+                      on_click=change_tag_page, args=(prefix, 1))
+
+
+@st.fragment
+def render_tag_selector():
+    """
+    渲染标签选择区域（作为独立片段，勾选标签只重新运行侧边栏片段）
+    """
+    # 已选标签（在片段内显示，勾选后随片段更新，无需重新运行整个页面）
+    if st.session_state.selected_tags:
+        st.write("已选标签:")
+        st.markdown(" ".join(
+            f"<span style='background-color: #E3F2FD; padding: 4px 8px; border-radius: 5px; "
+            f"display: inline-block; margin: 2px;'>{tag}</span>"
+            for tag in st.session_state.selected_tags
+        ), unsafe_allow_html=True)
+    else:
+        st.caption("尚未选择标签")
+
+    # 选项卡
+    tab1, tab2, tab3 = st.tabs(["预设标签", "自定义标签", "标签组合"])
+
+    # 预设标签选项卡
+    with tab1:
+        st.subheader("热门标签")
+        for tag in HOT_TAGS:
+            render_tag_checkbox(tag, "hot")
+
+        category = st.selectbox("更多标签", list(TAG_CATEGORIES), key="tag_category")
+        render_tag_picker(TAG_CATEGORIES[category], f"preset_{category}")
+
+    # 自定义标签选项卡
+    with tab2:
+        st.subheader("创建自定义标签")
+        st.text_input("输入新标签", key="new_custom_tag")
+        st.button("添加标签", on_click=add_custom_tag)
+
+        st.subheader("自定义标签列表")
+        render_tag_picker(list(st.session_state.custom_tags), "custom")
+
+    # 标签组合选项卡
+    with tab3:
+        st.subheader("保存当前标签组合")
+        st.text_input("组合名称", key="combination_name")
+        st.button("保存组合", on_click=save_tag_combination)
+
+        st.subheader("加载标签组合")
+        for name in st.session_state.tag_combinations:
+            st.button(name, key=f"load_{name}", on_click=load_tag_combination, args=(name,))
+
+    # 标签权重设置（决定内容偏好度）
+    if st.session_state.selected_tags:
+        with st.expander("标签权重", expanded=False):
+            for tag in st.session_state.selected_tags:
+                widget_key = f"weight_{tag}"
+                st.session_state[widget_key] = st.session_state.tag_weights.get(tag, DEFAULT_TAG_WEIGHT)
+                st.slider(tag, min_value=1, max_value=5, key=widget_key,
+                          on_change=update_tag_weight, args=(tag, widget_key))
+
+
 def render_sidebar():
-    """渲染侧边栏"""
+    """
+    渲染侧边栏
+
+    返回:
+        list: 已选标签（按选择顺序）
+    """
     with st.sidebar:
         st.title("SnapNews")
         st.markdown("---")
-        
+
         # 初始化会话状态
         initialize_session_state()
-        
-        # 选项卡
-        tab1, tab2, tab3 = st.tabs(["预设标签", "自定义标签", "标签组合"])
-        
-        # 预设标签选项卡
-        with tab1:
-            st.subheader("热门标签")
-            for tag in HOT_TAGS:
-                if st.checkbox(tag, value=tag in st.session_state.selected_tags, key=f"hot_{tag}"):
-                    if tag not in st.session_state.selected_tags:
-                        st.session_state.selected_tags.append(tag)
-                else:
-                    if tag in st.session_state.selected_tags:
-                        st.session_state.selected_tags.remove(tag)
-            
-            # 技术标签
-            with st.expander("技术标签", expanded=False):
-                for tag in TECH_TAGS:
-                    if tag not in HOT_TAGS:  # 避免重复
-                        if st.checkbox(tag, value=tag in st.session_state.selected_tags, key=f"tech_{tag}"):
-                            if tag not in st.session_state.selected_tags:
-                                st.session_state.selected_tags.append(tag)
-                        else:
-                            if tag in st.session_state.selected_tags:
-                                st.session_state.selected_tags.remove(tag)
-            
-            # 商业标签
-            with st.expander("商业标签", expanded=False):
-                for tag in BUSINESS_TAGS:
-                    if tag not in HOT_TAGS:  # 避免重复
-                        if st.checkbox(tag, value=tag in st.session_state.selected_tags, key=f"biz_{tag}"):
-                            if tag not in st.session_state.selected_tags:
-                                st.session_state.selected_tags.append(tag)
-                        else:
-                            if tag in st.session_state.selected_tags:
-                                st.session_state.selected_tags.remove(tag)
-            
-            # 科学标签
-            with st.expander("科学标签", expanded=False):
-                for tag in SCIENCE_TAGS:
-                    if tag not in HOT_TAGS:  # 避免重复
-                        if st.checkbox(tag, value=tag in st.session_state.selected_tags, key=f"sci_{tag}"):
-                            if tag not in st.session_state.selected_tags:
-                                st.session_state.selected_tags.append(tag)
-                        else:
-                            if tag in st.session_state.selected_tags:
-                                st.session_state.selected_tags.remove(tag)
-        
-        # 自定义标签选项卡
-        with tab2:
-            st.subheader("创建自定义标签")
-            st.text_input("输入新标签", key="new_custom_tag")
-            st.button("添加标签", on_click=add_custom_tag)
-            
-            st.subheader("自定义标签列表")
-            for tag in st.session_state.custom_tags:
-                if st.checkbox(tag, value=tag in st.session_state.selected_tags, key=f"custom_{tag}"):
-                    if tag not in st.session_state.selected_tags:
-                        st.session_state.selected_tags.append(tag)
-                else:
-                    if tag in st.session_state.selected_tags:
-                        st.session_state.selected_tags.remove(tag)
-        
-        # 标签组合选项卡
-        with tab3:
-            st.subheader("保存当前标签组合")
-            st.text_input("组合名称", key="combination_name")
-            st.button("保存组合", on_click=save_tag_combination)
-            
-            st.subheader("加载标签组合")
-            for name, tags in st.session_state.tag_combinations.items():
-                if st.button(name, key=f"load_{name}"):
-                    st.session_state.selected_tags = tags.copy()
-        
+
+        render_tag_selector()
+
         st.markdown("---")
         st.caption("© 2023 SnapNews")
-    
-    return st.session_state.selected_tags 
\ No newline at end of file
+
+    return list(st.session_state.selected_tags)
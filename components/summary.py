@@ -3,6 +3,12 @@ AI摘要组件
 """
 import streamlit as st
 import time
+from utils.summary_store import extract_chunk_content
+from utils import metrics
+
+# 渲染帧预算：距上次渲染超过该秒数或新增字符达到该数量时才重绘
+SUMMARY_FRAME_INTERVAL = 0.05
+SUMMARY_FRAME_CHARS = 200
 
 
 def render_summary_container():
@@ -33,10 +39,60 @@ def render_summary_container():
     return summary_placeholder
 
 
+def _render_section(placeholder, text):
+    """
+    在占位符中渲染一段摘要文本
+    
+    参数:
+        placeholder: 占位符
+        text (str): 摘要文本
+    """
+    placeholder.markdown(f"""
+    <div class="summary-container">
+    {text}
+    </div>
+    """, unsafe_allow_html=True)
+
+
+def _split_completed_sections(text):
+    """
+    将文本拆分为已完成的 ## 小节和仍在生成中的最后一节
+    
+    参数:
+        text (str): 当前小节开始以来累计的文本
+    
+    返回:
+        tuple: (已完成部分, 进行中部分)，没有新小节开始时已完成部分为空字符串
+    """
+    boundary = text.rfind("\n## ")
+    if boundary <= 0:
+        return "", text
+    return text[:boundary], text[boundary + 1:]
+
+
+def _record_stream_metrics(stream, started, first_chunk_at, chunk_count):
+    """记录摘要首字延迟和输出速率"""
+    if not metrics.METRICS_ENABLED or first_chunk_at is None:
+        return
+    
+    cached = str(bool(getattr(stream, 'from_cache', False))).lower()
+    metrics.observe('summary_ttft_seconds', first_chunk_at - started, cached=cached)
+    metrics.incr('summary_chunks', chunk_count, cached=cached)
+    
+    elapsed = time.perf_counter() - first_chunk_at
+    if chunk_count > 1 and elapsed > 0:
+        metrics.observe('summary_chunks_per_second', (chunk_count - 1) / elapsed,
+                        buckets=metrics.RATE_BUCKETS, cached=cached)
+
+
 def stream_summary(placeholder, stream):
     """
     流式显示摘要
     
+    文本块按帧合并后再渲染（间隔达到 SUMMARY_FRAME_INTERVAL 秒或新增字符达到
+    SUMMARY_FRAME_CHARS 时才重绘），已完成的 ## 小节固定到各自的占位符中，
+    只重绘正在生成的小节。
+    
     参数:
         placeholder: 占位符
         stream: 流式响应
@@ -51,43 +107,58 @@ def stream_summary(placeholder, stream):
     </div>
     """, unsafe_allow_html=True)
     
+    container = None
+    active = None
+    active_text = ""
+    pending_chars = 0
+    last_render = time.perf_counter()
+    started = last_render
+    first_chunk_at = None
+    chunk_count = 0
+    
     try:
         # 处理流式输出
         for chunk in stream:
-            # 尝试不同的响应格式
-            try:
-                # 标准OpenAI响应格式
-                content = chunk.choices[0].delta.content
-            except (AttributeError, IndexError):
-                try:
-                    # 可能的替代格式1
-                    content = chunk.get('choices', [{}])[0].get('delta', {}).get('content', '')
-                except (AttributeError, IndexError):
-                    try:
-                        # 可能的替代格式2 (如果DeepEek使用不同的响应结构)
-                        if hasattr(chunk, 'content'):
-                            content = chunk.content
-                        elif isinstance(chunk, dict):
-                            content = chunk.get('content', '')
-                        else:
-                            content = str(chunk)
-                    except:
-                        content = ''
+            content = extract_chunk_content(chunk)
+            if not content:
+                continue
+            
+            chunk_count += 1
+            if first_chunk_at is None:
+                first_chunk_at = time.perf_counter()
+            
+            if container is None:
+                container = placeholder.container()
+                active = container.empty()
             
-            if content:
-                summary_text += content
-                placeholder.markdown(f"""
-                <div class="summary-container">
-                {summary_text}
-                </div>
-                """, unsafe_allow_html=True)
-                time.sleep(0.01)  # 添加小延迟以平滑显示效果
+            summary_text += content
+            active_text += content
+            pending_chars += len(content)
+            
+            now = time.perf_counter()
+            if now - last_render < SUMMARY_FRAME_INTERVAL and pending_chars < SUMMARY_FRAME_CHARS:
+                continue
+            
+            # 新小节开始时，将已完成的小节固定下来，后续只重绘新小节
+            completed, active_text = _split_completed_sections(active_text)
+            if completed:
+                _render_section(active, completed)
+                active = container.empty()
+            _render_section(active, active_text)
+            pending_chars = 0
+            last_render = now
+        
+        # 渲染最后一帧
+        if active is not None and pending_chars:
+            completed, active_text = _split_completed_sections(active_text)
+            if completed:
+                _render_section(active, completed)
+                active = container.empty()
+            _render_section(active, active_text)
     except Exception as e:
-        placeholder.markdown(f"""
-        <div class="summary-container">
-        生成摘要时出错: {str(e)}
-        </div>
-        """, unsafe_allow_html=True)
+        _render_section(active if active is not None else placeholder, f"生成摘要时出错: {str(e)}")
+    
+    _record_stream_metrics(stream, started, first_chunk_at, chunk_count)
     
     # 添加完成提示
     if summary_text:
@@ -0,0 +1,55 @@
+"""
+应用配置
+
+.env 文件在首次导入本模块时加载一次（不覆盖已存在的环境变量），各模块通过 settings 读取配置，
+不再各自调用 load_dotenv()，配置也不再依赖模块的导入顺序。
+"""
+import os
+from dotenv import load_dotenv
+
+# 布尔配置视为真的取值
+TRUE_VALUES = ("1", "true", "yes")
+
+
+class Settings:
+    """
+    环境变量配置（读取时已合并 .env 文件）
+    """
+
+    def __init__(self, env_file=None):
+        """
+        参数:
+            env_file (str): .env 文件路径，默认从当前目录向上查找
+        """
+        load_dotenv(env_file)
+
+    def get(self, name, default=None):
+        """
+        读取字符串配置
+
+        参数:
+            name (str): 环境变量名
+            default (str): 未设置时的默认值
+
+        返回:
+            str | None: 配置值
+        """
+        return os.getenv(name, default)
+
+    def get_int(self, name, default):
+        """读取整数配置"""
+        value = os.getenv(name)
+        return default if value is None else int(value)
+
+    def get_float(self, name, default):
+        """读取浮点数配置"""
+        value = os.getenv(name)
+        return default if value is None else float(value)
+
+    def get_bool(self, name, default):
+        """读取布尔配置（1/true/yes 为真，不区分大小写）"""
+        value = os.getenv(name)
+        return default if value is None else value.lower() in TRUE_VALUES
+
+
+settings = Settings()
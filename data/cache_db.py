@@ -0,0 +1,334 @@
+"""
+SQLite缓存存储工具
+
+缓存数据与 db_utils.DB_PATH 存放在同一目录下，多个Streamlit工作进程及重启后均可共享。
+"""
+import sqlite3
+import os
+import json
+import time
+import logging
+import threading
+from data.db_utils import get_connection, transaction
+from config.settings import settings
+from utils import metrics
+
+logger = logging.getLogger('cache_db')
+
+# 缓存数据库文件路径（与 snapnews.db 同目录）
+CACHE_DB_PATH = os.path.join(os.path.dirname(__file__), 'cache.db')
+
+# 读取命中时，条目的最近访问时间早于该秒数才更新（用于按最近访问淘汰，精度无需很高）
+CACHE_TOUCH_INTERVAL = settings.get_int("CACHE_TOUCH_INTERVAL", 60)
+# 命中统计和访问时间先在进程内累计，达到该次数或间隔该秒数后批量写入
+CACHE_STATS_FLUSH_EVERY = settings.get_int("CACHE_STATS_FLUSH_EVERY", 100)
+CACHE_STATS_FLUSH_INTERVAL = settings.get_int("CACHE_STATS_FLUSH_INTERVAL", 30)
+
+
+def connect_cache_db(db_path=None):
+    """
+    获取当前线程的缓存数据库连接（复用 db_utils 的线程级连接，首次打开时建表）
+
+    参数:
+        db_path (str): 数据库路径，默认为 CACHE_DB_PATH
+
+    返回:
+        sqlite3.Connection: 数据库连接
+    """
+    return get_connection(db_path or CACHE_DB_PATH, initializer=initialize_cache_db)
+
+
+def initialize_cache_db(conn):
+    """
+    初始化缓存数据库表结构
+
+    参数:
+        conn (sqlite3.Connection): 数据库连接
+    """
+    with transaction(conn):
+        # 缓存条目表（按命名空间区分不同用途的缓存）
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS cache_entries (
+            namespace TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            accessed_at REAL NOT NULL,
+            PRIMARY KEY (namespace, key)
+        )
+        ''')
+        conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_cache_entries_accessed
+        ON cache_entries (namespace, accessed_at)
+        ''')
+
+        # 缓存命中统计表
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS cache_stats (
+            namespace TEXT NOT NULL,
+            name TEXT NOT NULL,
+            value INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (namespace, name)
+        )
+        ''')
+
+        # 上游配额令牌桶（见 utils.rate_limiter）
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+            upstream TEXT NOT NULL,
+            bucket TEXT NOT NULL,
+            tokens REAL NOT NULL,
+            updated_at REAL NOT NULL,
+            blocked_until REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (upstream, bucket)
+        )
+        ''')
+
+
+class SQLiteCache:
+    """
+    基于SQLite的TTL缓存
+
+    - 条目在 ttl 秒内视为新鲜
+    - 超过 ttl 但未超过 ttl + stale_ttl 时视为过期可用（stale-while-revalidate）
+    - 条目数超过 max_entries 时按最近访问时间淘汰
+
+    读取只执行一条自动提交的SELECT，不获取写锁，与其他会话的写入互不阻塞（WAL）。
+    命中统计和最近访问时间在进程内累计后批量写入，彻底过期的条目在写入时清理。
+    """
+
+    def __init__(self, namespace, ttl, max_entries, stale_ttl=0, db_path=None):
+        """
+        参数:
+            namespace (str): 缓存命名空间
+            ttl (float): 新鲜期（秒），<=0 表示禁用缓存
+            max_entries (int): 最大条目数
+            stale_ttl (float): 过期后仍可返回旧值的宽限期（秒）
+            db_path (str): 数据库路径，默认为 CACHE_DB_PATH
+        """
+        self.namespace = namespace
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.db_path = db_path
+        # 尚未写入数据库的命中统计及访问时间
+        self._pending_lock = threading.Lock()
+        self._pending_stats = {}
+        self._pending_touches = {}
+        self._pending_count = 0
+        self._last_flush = time.monotonic()
+
+    @property
+    def enabled(self):
+        return self.ttl > 0
+
+    @metrics.timed("db_query", op="cache_get")
+    def get(self, key):
+        """
+        读取缓存
+
+        参数:
+            key (str): 缓存键
+
+        返回:
+            tuple | None: (value, is_stale)，未命中时返回None
+        """
+        if not self.enabled:
+            return None
+
+        try:
+            row = connect_cache_db(self.db_path).execute(
+                'SELECT value, created_at, accessed_at FROM cache_entries WHERE namespace = ? AND key = ?',
+                (self.namespace, key)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"读取缓存[{self.namespace}]时出错: {e}")
+            return None
+
+        now = time.time()
+        if row is None:
+            self._record('misses')
+            return None
+
+        value, created_at, accessed_at = row
+        age = now - created_at
+        if age > self.ttl + self.stale_ttl:
+            # 已彻底过期，视为未命中（写入时统一删除）
+            self._record('misses')
+            return None
+
+        is_stale = age > self.ttl
+        self._record('stale_hits' if is_stale else 'hits', key if now - accessed_at > CACHE_TOUCH_INTERVAL else None, now)
+        try:
+            return json.loads(value), is_stale
+        except ValueError as e:
+            logger.warning(f"解析缓存[{self.namespace}]时出错: {e}")
+            return None
+
+    @metrics.timed("db_query", op="cache_set")
+    def set(self, key, value):
+        """
+        写入缓存，清理彻底过期的条目，并按容量淘汰最久未访问的条目
+
+        参数:
+            key (str): 缓存键
+            value: 可JSON序列化的值
+        """
+        if not self.enabled:
+            return
+
+        try:
+            payload = json.dumps(value, ensure_ascii=False)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"写入缓存[{self.namespace}]时出错: {e}")
+            return
+
+        stats, touches = self._take_pending()
+        try:
+            conn = connect_cache_db(self.db_path)
+            with transaction(conn):
+                # 已持有写锁，顺带写入累计的统计和访问时间（先于淘汰，保证淘汰依据最新）
+                self._write_pending(conn, stats, touches)
+
+                now = time.time()
+                conn.execute('''
+                INSERT OR REPLACE INTO cache_entries (namespace, key, value, created_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?)
+                ''', (self.namespace, key, payload, now, now))
+
+                conn.execute(
+                    'DELETE FROM cache_entries WHERE namespace = ? AND created_at < ?',
+                    (self.namespace, now - self.ttl - self.stale_ttl)
+                )
+
+                cursor = conn.execute('''
+                DELETE FROM cache_entries WHERE namespace = ? AND key IN (
+                    SELECT key FROM cache_entries WHERE namespace = ?
+                    ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+                ''', (self.namespace, self.namespace, self.max_entries))
+                if cursor.rowcount > 0:
+                    self._incr(conn, 'evictions', cursor.rowcount)
+
+        except sqlite3.Error as e:
+            self._restore_pending(stats, touches)
+            logger.warning(f"写入缓存[{self.namespace}]时出错: {e}")
+
+    def age(self, key):
+        """
+        获取缓存条目的存在时间（不计入命中统计，不更新访问时间）
+
+        参数:
+            key (str): 缓存键
+
+        返回:
+            float | None: 距写入的秒数，条目不存在时返回None
+        """
+        if not self.enabled:
+            return None
+        try:
+            row = connect_cache_db(self.db_path).execute(
+                'SELECT created_at FROM cache_entries WHERE namespace = ? AND key = ?',
+                (self.namespace, key)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"读取缓存[{self.namespace}]时出错: {e}")
+            return None
+        return None if row is None else time.time() - row[0]
+
+    def delete(self, key):
+        """
+        删除缓存条目
+
+        参数:
+            key (str): 缓存键
+        """
+        try:
+            connect_cache_db(self.db_path).execute(
+                'DELETE FROM cache_entries WHERE namespace = ? AND key = ?',
+                (self.namespace, key)
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"删除缓存[{self.namespace}]时出错: {e}")
+
+    def stats(self):
+        """
+        获取命中统计（跨进程累计，包含本进程尚未写入的部分）
+
+        返回:
+            dict: 包含 hits、stale_hits、misses、evictions、entries
+        """
+        result = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'evictions': 0, 'entries': 0}
+        try:
+            conn = connect_cache_db(self.db_path)
+            for name, value in conn.execute(
+                'SELECT name, value FROM cache_stats WHERE namespace = ?', (self.namespace,)
+            ):
+                result[name] = value
+            result['entries'] = conn.execute(
+                'SELECT COUNT(*) FROM cache_entries WHERE namespace = ?', (self.namespace,)
+            ).fetchone()[0]
+        except sqlite3.Error as e:
+            logger.warning(f"读取缓存统计[{self.namespace}]时出错: {e}")
+        with self._pending_lock:
+            for name, value in self._pending_stats.items():
+                result[name] = result.get(name, 0) + value
+        return result
+
+    def flush_stats(self):
+        """
+        将进程内累计的命中统计和访问时间写入数据库
+        """
+        stats, touches = self._take_pending()
+        if not stats and not touches:
+            return
+        try:
+            conn = connect_cache_db(self.db_path)
+            with transaction(conn):
+                self._write_pending(conn, stats, touches)
+        except sqlite3.Error as e:
+            self._restore_pending(stats, touches)
+            logger.warning(f"写入缓存统计[{self.namespace}]时出错: {e}")
+
+    def _record(self, name, touch_key=None, now=None):
+        """累计一次读取结果，达到批量阈值时写入数据库"""
+        with self._pending_lock:
+            self._pending_stats[name] = self._pending_stats.get(name, 0) + 1
+            if touch_key is not None:
+                self._pending_touches[touch_key] = now
+            self._pending_count += 1
+            due = (self._pending_count >= CACHE_STATS_FLUSH_EVERY
+                   or time.monotonic() - self._last_flush >= CACHE_STATS_FLUSH_INTERVAL)
+        if due:
+            self.flush_stats()
+
+    def _take_pending(self):
+        with self._pending_lock:
+            stats, touches = self._pending_stats, self._pending_touches
+            self._pending_stats, self._pending_touches = {}, {}
+            self._pending_count = 0
+            self._last_flush = time.monotonic()
+        return stats, touches
+
+    def _restore_pending(self, stats, touches):
+        """写入失败时放回累计值，下次再写"""
+        with self._pending_lock:
+            for name, value in stats.items():
+                self._pending_stats[name] = self._pending_stats.get(name, 0) + value
+            for key, accessed_at in touches.items():
+                self._pending_touches[key] = max(accessed_at, self._pending_touches.get(key, 0))
+
+    def _write_pending(self, conn, stats, touches):
+        for name, value in stats.items():
+            self._incr(conn, name, value)
+        if touches:
+            conn.executemany(
+                'UPDATE cache_entries SET accessed_at = MAX(accessed_at, ?) WHERE namespace = ? AND key = ?',
+                [(accessed_at, self.namespace, key) for key, accessed_at in touches.items()]
+            )
+
+    def _incr(self, conn, name, amount=1):
+        conn.execute('''
+        INSERT INTO cache_stats (namespace, name, value) VALUES (?, ?, ?)
+        ON CONFLICT(namespace, name) DO UPDATE SET value = value + excluded.value
+        ''', (self.namespace, name, amount))
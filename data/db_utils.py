@@ -1,24 +1,153 @@
 """
 数据库工具函数
+
+每个线程复用一个数据库连接（WAL模式），表结构迁移在每个进程首次连接时执行一次，
+写操作使用 BEGIN IMMEDIATE 事务并配合 busy_timeout，多个会话并发写入时排队等待而不是报错。
 """
+import re
 import sqlite3
 import os
 import json
+import time
+import logging
+import itertools
+import threading
+import functools
+from contextlib import contextmanager
 from datetime import datetime
+from utils import metrics
+from config.settings import settings
+
+logger = logging.getLogger('db_utils')
 
 # 数据库文件路径
 DB_PATH = os.path.join(os.path.dirname(__file__), 'snapnews.db')
 
+# 等待其他连接释放写锁的最长时间（毫秒）
+SQLITE_BUSY_TIMEOUT_MS = settings.get_int("SQLITE_BUSY_TIMEOUT_MS", 10000)
+# 每个连接的页缓存大小（KiB）及内存映射大小（字节）
+SQLITE_CACHE_SIZE_KB = settings.get_int("SQLITE_CACHE_SIZE_KB", 8192)
+SQLITE_MMAP_SIZE = settings.get_int("SQLITE_MMAP_SIZE", 64 * 1024 * 1024)
+
+# 收藏新闻每页条数
+SAVED_NEWS_PAGE_SIZE = settings.get_int("SAVED_NEWS_PAGE_SIZE", 20)
+
+# 文章存档保留天数（超过该天数的文章会被定期清理）
+ARTICLE_ARCHIVE_DAYS = settings.get_int("ARTICLE_ARCHIVE_DAYS", 30)
+# 每写入多少批文章清理一次过期存档
+ARCHIVE_PRUNE_EVERY = 50
+
+# 已写入的批次计数（next() 在多线程下原子递增，每个批次序号唯一）
+_archive_upserts = itertools.count(1)
+
+_local = threading.local()
+_initialized_paths = set()
+_init_lock = threading.Lock()
+# 已启用全文索引的数据库路径
+_fts_paths = set()
+
+# 拉丁字母和数字：以这些字符开头或结尾的标签按整词匹配，中文等其他文字按子串匹配
+_LATIN_WORD_CHARS = '0-9A-Za-z\u00C0-\u024F'
+_LATIN_WORD = re.compile(f'[{_LATIN_WORD_CHARS}]')
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_pattern(pattern):
+    return re.compile(pattern)
+
+
+def _regexp(pattern, value):
+    """SQLite REGEXP 运算符的实现（X REGEXP Y 调用 regexp(Y, X)）"""
+    return value is not None and _compile_pattern(pattern).search(value) is not None
+
 
-def initialize_db():
+def _configure_connection(conn):
     """
-    初始化数据库
+    设置连接级别的PRAGMA，并注册 REGEXP 函数
+
+    参数:
+        conn (sqlite3.Connection): 数据库连接
+    """
+    # WAL模式下读写互不阻塞；synchronous=NORMAL 在WAL模式下仍保证一致性，且提交时无需fsync
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute(f'PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}')
+    conn.execute('PRAGMA foreign_keys=ON')
+    conn.execute('PRAGMA temp_store=MEMORY')
+    conn.execute(f'PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}')
+    conn.execute(f'PRAGMA mmap_size={SQLITE_MMAP_SIZE}')
+    conn.create_function('regexp', 2, _regexp, deterministic=True)
+
+
+def get_connection(db_path=None, initializer=None):
+    """
+    获取当前线程的数据库连接（按路径缓存，首次打开时设置PRAGMA并执行初始化）
+
+    连接处于自动提交模式，需要原子写入时使用 transaction()。
+
+    参数:
+        db_path (str): 数据库路径，默认为 DB_PATH
+        initializer (callable): 每个进程首次打开该路径时调用的初始化函数，参数为连接，
+            默认为 initialize_db
+
+    返回:
+        sqlite3.Connection: 数据库连接
     """
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
+    db_path = db_path or DB_PATH
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+
+    conn = connections.get(db_path)
+    if conn is None:
+        conn = sqlite3.connect(db_path, timeout=SQLITE_BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        _configure_connection(conn)
+        connections[db_path] = conn
+
+    if db_path not in _initialized_paths:
+        with _init_lock:
+            if db_path not in _initialized_paths:
+                (initializer or initialize_db)(conn)
+                _initialized_paths.add(db_path)
+
+    return conn
+
+
+def close_connections():
+    """
+    关闭当前线程缓存的所有数据库连接
+    """
+    connections = getattr(_local, 'connections', None) or {}
+    for conn in connections.values():
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+    connections.clear()
+
+
+@contextmanager
+def transaction(conn):
+    """
+    写事务（BEGIN IMMEDIATE 在事务开始时即获取写锁，避免读锁升级时的死锁）
+
+    参数:
+        conn (sqlite3.Connection): 自动提交模式的数据库连接
+    """
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        yield conn
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+    conn.execute('COMMIT')
+
+
+def _migration_1(conn):
+    """初始表结构"""
     # 创建标签表
-    cursor.execute('''
+    conn.execute('''
     CREATE TABLE IF NOT EXISTS tags (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         name TEXT UNIQUE,
@@ -26,18 +155,18 @@ def initialize_db():
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
     )
     ''')
-    
+
     # 创建用户标签表
-    cursor.execute('''
+    conn.execute('''
     CREATE TABLE IF NOT EXISTS user_tags (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         name TEXT UNIQUE,
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
     )
     ''')
-    
+
     # 创建收藏的新闻表
-    cursor.execute('''
+    conn.execute('''
     CREATE TABLE IF NOT EXISTS saved_news (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         title TEXT,
@@ -49,9 +178,9 @@ def initialize_db():
         saved_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
     )
     ''')
-    
+
     # 创建标签组合表
-    cursor.execute('''
+    conn.execute('''
     CREATE TABLE IF NOT EXISTS tag_combinations (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         name TEXT UNIQUE,
@@ -59,170 +188,486 @@ def initialize_db():
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
     )
     ''')
-    
-    conn.commit()
-    conn.close()
+
+    # 创建文章存档表（所有获取过的新闻，按URL去重）
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS articles (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        url TEXT UNIQUE NOT NULL,
+        title TEXT,
+        description TEXT,
+        source TEXT,
+        author TEXT,
+        content TEXT,
+        published_at TEXT,
+        image_url TEXT,
+        language TEXT,
+        fetched_at REAL
+    )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_articles_published ON articles (published_at)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_articles_fetched ON articles (fetched_at)')
+
+    # 创建标题和描述的全文索引（trigram分词支持中文子串匹配）
+    try:
+        conn.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+            title, description, content='articles', content_rowid='id', tokenize='trigram'
+        )
+        ''')
+        conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS articles_ai AFTER INSERT ON articles BEGIN
+            INSERT INTO articles_fts (rowid, title, description) VALUES (new.id, new.title, new.description);
+        END
+        ''')
+        conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS articles_ad AFTER DELETE ON articles BEGIN
+            INSERT INTO articles_fts (articles_fts, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+        END
+        ''')
+        conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS articles_au AFTER UPDATE OF title, description ON articles BEGIN
+            INSERT INTO articles_fts (articles_fts, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+            INSERT INTO articles_fts (rowid, title, description) VALUES (new.id, new.title, new.description);
+        END
+        ''')
+    except sqlite3.OperationalError as e:
+        # 当前SQLite不支持FTS5（或trigram分词），搜索时退回LIKE匹配
+        logger.warning(f"全文索引不可用，将使用LIKE搜索: {e}")
+
+
+def _migration_2(conn):
+    """收藏新闻按 (saved_at, id) 分页的索引"""
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_saved_news_saved_at ON saved_news (saved_at, id)')
+
+
+def _migration_3(conn):
+    """文章存档记录来自哪个数据源，回放和合成数据不会被当作NewsAPI结果返回"""
+    conn.execute('ALTER TABLE articles ADD COLUMN backend TEXT')
+
+
+# 表结构迁移列表，第N项将数据库从版本N-1升级到版本N（版本号保存在 PRAGMA user_version）
+MIGRATIONS = [
+    _migration_1,
+    _migration_2,
+    _migration_3,
+]
+
+
+def initialize_db(conn=None):
+    """
+    初始化数据库（按 PRAGMA user_version 执行尚未应用的迁移）
+
+    参数:
+        conn (sqlite3.Connection): 数据库连接，默认为当前线程的 DB_PATH 连接
+    """
+    conn = conn or get_connection()
+
+    with transaction(conn):
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+            migration(conn)
+            conn.execute(f'PRAGMA user_version={number}')
+            logger.info(f"数据库已迁移到版本 {number}")
+
+    db_path = conn.execute('PRAGMA database_list').fetchone()['file']
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'articles_fts'").fetchone():
+        _fts_paths.add(os.path.realpath(db_path) if db_path else db_path)
+
+
+def _news_row(news_item):
+    """将新闻项转换为 saved_news 表的行"""
+    return (
+        news_item.get('title'),
+        news_item.get('url'),
+        news_item.get('source'),
+        news_item.get('description'),
+        news_item.get('publishedAt'),
+        news_item.get('urlToImage')
+    )
 
 
 def save_news(news_item):
     """
     保存新闻到收藏
-    
+
     参数:
         news_item: 新闻项数据
-    
+
     返回:
         bool: 是否保存成功
     """
+    return save_news_many([news_item]) > 0
+
+
+@metrics.timed("db_query", op="save_news_many")
+def save_news_many(news_items):
+    """
+    批量保存新闻到收藏（单个事务，已收藏的URL忽略）
+
+    参数:
+        news_items (list): 新闻项数据列表
+
+    返回:
+        int: 新增的收藏数
+    """
+    rows = [_news_row(item) for item in news_items]
+    if not rows:
+        return 0
+
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        # 检查表是否存在
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='saved_news'")
-        if not cursor.fetchone():
-            initialize_db()
-        
-        # 插入数据
-        cursor.execute('''
-        INSERT OR IGNORE INTO saved_news (title, url, source, description, published_at, image_url)
-        VALUES (?, ?, ?, ?, ?, ?)
-        ''', (
-            news_item.get('title'),
-            news_item.get('url'),
-            news_item.get('source'),
-            news_item.get('description'),
-            news_item.get('publishedAt'),
-            news_item.get('urlToImage')
-        ))
-        
-        conn.commit()
-        success = cursor.rowcount > 0
-        conn.close()
-        
-        return success
-    
-    except Exception as e:
-        print(f"保存新闻时出错: {e}")
-        return False
+        conn = get_connection()
+        before = conn.total_changes
+        with transaction(conn):
+            conn.executemany('''
+            INSERT OR IGNORE INTO saved_news (title, url, source, description, published_at, image_url)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ''', rows)
+        return conn.total_changes - before
+
+    except sqlite3.Error as e:
+        logger.error(f"保存新闻时出错: {e}")
+        return 0
+
+
+def _saved_news_item(row):
+    """将 saved_news 表的行转换为与API格式一致的字典"""
+    item = dict(row)
+    # 重命名字段以匹配API格式
+    item['publishedAt'] = item.pop('published_at')
+    item['urlToImage'] = item.pop('image_url')
+    return item
+
+
+@metrics.timed("db_query", op="get_saved_news_page")
+def get_saved_news_page(limit=SAVED_NEWS_PAGE_SIZE, cursor=None):
+    """
+    按收藏时间倒序分页获取收藏的新闻（基于 (saved_at, id) 的键集分页，翻页代价与页码无关）
+
+    参数:
+        limit (int): 每页条数
+        cursor (tuple): 上一页返回的游标 (saved_at, id)，None表示第一页
+
+    返回:
+        tuple: (新闻列表, 下一页游标)，没有更多数据时游标为None
+    """
+    try:
+        conn = get_connection()
+        # 多取一条用于判断是否还有下一页
+        if cursor is None:
+            rows = conn.execute('''
+            SELECT * FROM saved_news ORDER BY saved_at DESC, id DESC LIMIT ?
+            ''', (limit + 1,)).fetchall()
+        else:
+            rows = conn.execute('''
+            SELECT * FROM saved_news WHERE (saved_at, id) < (?, ?)
+            ORDER BY saved_at DESC, id DESC LIMIT ?
+            ''', (cursor[0], cursor[1], limit + 1)).fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = (rows[-1]['saved_at'], rows[-1]['id'])
+
+        return [_saved_news_item(row) for row in rows], next_cursor
+
+    except sqlite3.Error as e:
+        logger.error(f"获取收藏新闻时出错: {e}")
+        return [], None
+
+
+def iter_saved_news(batch_size=SAVED_NEWS_PAGE_SIZE):
+    """
+    逐条迭代所有收藏的新闻（按页读取，内存占用与收藏总数无关）
+
+    参数:
+        batch_size (int): 每次读取的条数
+
+    返回:
+        generator: 按收藏时间倒序产出新闻字典
+    """
+    cursor = None
+    while True:
+        items, cursor = get_saved_news_page(batch_size, cursor)
+        yield from items
+        if cursor is None:
+            return
 
 
 def get_saved_news():
     """
     获取所有已收藏的新闻
-    
+
     返回:
         list: 收藏的新闻列表
     """
-    try:
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        # 检查表是否存在
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='saved_news'")
-        if not cursor.fetchone():
-            initialize_db()
-            return []
-        
-        # 查询数据
-        cursor.execute('''
-        SELECT * FROM saved_news ORDER BY saved_at DESC
-        ''')
-        
-        rows = cursor.fetchall()
-        conn.close()
-        
-        # 转换为字典列表
-        result = []
-        for row in rows:
-            item = dict(row)
-            # 重命名字段以匹配API格式
-            item['publishedAt'] = item.pop('published_at')
-            item['urlToImage'] = item.pop('image_url')
-            result.append(item)
-        
-        return result
-    
-    except Exception as e:
-        print(f"获取收藏新闻时出错: {e}")
-        return []
+    return list(iter_saved_news())
 
 
+@metrics.timed("db_query", op="save_tag_combination")
 def save_tag_combination(name, tags):
     """
     保存标签组合
-    
+
     参数:
         name: 组合名称
         tags: 标签列表
-    
+
     返回:
         bool: 是否保存成功
     """
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        # 检查表是否存在
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='tag_combinations'")
-        if not cursor.fetchone():
-            initialize_db()
-        
-        # 插入数据
-        cursor.execute('''
-        INSERT OR REPLACE INTO tag_combinations (name, tags, created_at)
-        VALUES (?, ?, ?)
-        ''', (
-            name,
-            json.dumps(tags),
-            datetime.now().isoformat()
-        ))
-        
-        conn.commit()
-        success = cursor.rowcount > 0
-        conn.close()
-        
-        return success
-    
-    except Exception as e:
-        print(f"保存标签组合时出错: {e}")
+        conn = get_connection()
+        with transaction(conn):
+            cursor = conn.execute('''
+            INSERT OR REPLACE INTO tag_combinations (name, tags, created_at)
+            VALUES (?, ?, ?)
+            ''', (
+                name,
+                json.dumps(tags),
+                datetime.now().isoformat()
+            ))
+        return cursor.rowcount > 0
+
+    except sqlite3.Error as e:
+        logger.error(f"保存标签组合时出错: {e}")
         return False
 
 
+@metrics.timed("db_query", op="get_tag_combinations")
 def get_tag_combinations():
     """
     获取所有标签组合
-    
+
     返回:
         dict: 标签组合字典，键为名称，值为标签列表
     """
     try:
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        # 检查表是否存在
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='tag_combinations'")
-        if not cursor.fetchone():
-            initialize_db()
-            return {}
-        
-        # 查询数据
-        cursor.execute('''
+        rows = get_connection().execute('''
         SELECT name, tags FROM tag_combinations ORDER BY created_at DESC
-        ''')
-        
-        rows = cursor.fetchall()
-        conn.close()
-        
+        ''').fetchall()
+
         # 转换为字典
-        result = {}
-        for row in rows:
-            result[row['name']] = json.loads(row['tags'])
-        
-        return result
-    
-    except Exception as e:
-        print(f"获取标签组合时出错: {e}")
-        return {} 
\ No newline at end of file
+        return {row['name']: json.loads(row['tags']) for row in rows}
+
+    except sqlite3.Error as e:
+        logger.error(f"获取标签组合时出错: {e}")
+        return {}
+
+
+@metrics.timed("db_query", op="upsert_articles")
+def upsert_articles(articles, language=None, backend=None):
+    """
+    批量写入文章存档（按URL去重，已存在的文章更新内容和获取时间）
+
+    参数:
+        articles (list): NewsAPI格式的文章字典列表
+        language (str): 新闻语言
+        backend (str): 数据源名称（见 utils.news_sources）
+
+    返回:
+        int: 写入的文章数
+    """
+    rows = []
+    now = time.time()
+    for item in articles:
+        url = item.get('url')
+        if not url:
+            continue
+        source = item.get('source')
+        if isinstance(source, dict):
+            source = source.get('name', '')
+        published_at = item.get('publishedAt')
+        if published_at is not None and not isinstance(published_at, str):
+            published_at = published_at.isoformat()
+        rows.append((
+            url,
+            item.get('title'),
+            item.get('description'),
+            source,
+            item.get('author'),
+            item.get('content'),
+            published_at,
+            item.get('urlToImage'),
+            language,
+            backend,
+            now
+        ))
+
+    if not rows:
+        return 0
+
+    try:
+        conn = get_connection()
+
+        # 单个事务内批量写入
+        with transaction(conn):
+            conn.executemany('''
+            INSERT INTO articles (url, title, description, source, author, content, published_at, image_url, language,
+                                  backend, fetched_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(url) DO UPDATE SET
+                title = excluded.title,
+                description = excluded.description,
+                source = excluded.source,
+                author = excluded.author,
+                content = excluded.content,
+                published_at = excluded.published_at,
+                image_url = excluded.image_url,
+                language = COALESCE(excluded.language, articles.language),
+                backend = excluded.backend,
+                fetched_at = excluded.fetched_at
+            ''', rows)
+
+        if next(_archive_upserts) % ARCHIVE_PRUNE_EVERY == 0:
+            prune_articles()
+
+        return len(rows)
+
+    except sqlite3.Error as e:
+        logger.error(f"写入文章存档时出错: {e}")
+        return 0
+
+
+def _fts_query(terms):
+    """
+    构建FTS5查询字符串（每个词作为短语，多个词之间为OR关系）
+
+    参数:
+        terms (list): 查询词列表
+
+    返回:
+        str: FTS5查询字符串
+    """
+    return " OR ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+def _word_pattern(terms):
+    """
+    构建匹配任一查询词的正则表达式（不区分大小写）
+
+    trigram全文索引和LIKE都按子串匹配，RAG会命中 Average、AI会命中 Dubai。
+    查询词以拉丁字母或数字开头（结尾）时，要求前（后）一个字符不是拉丁字母或数字；
+    中文等不以空格分词的文字仍按子串匹配。
+
+    参数:
+        terms (list): 查询词列表
+
+    返回:
+        str: 正则表达式
+    """
+    parts = []
+    for term in terms:
+        part = re.escape(term)
+        if _LATIN_WORD.match(term[0]):
+            part = f'(?<![{_LATIN_WORD_CHARS}])' + part
+        if _LATIN_WORD.match(term[-1]):
+            part += f'(?![{_LATIN_WORD_CHARS}])'
+        parts.append(part)
+    return '(?i)' + '|'.join(parts)
+
+
+@metrics.timed("db_query", op="search_articles")
+def search_articles(tags, language=None, published_since=None, fetched_since=None, limit=40, backend=None):
+    """
+    在本地文章存档中按标签搜索新闻（匹配标题或描述，按发布时间倒序）
+
+    全文索引或LIKE先筛选候选文章，再用 _word_pattern 按整词过滤。
+
+    参数:
+        tags (list): 标签列表，任一标签匹配即可
+        language (str): 新闻语言，None表示不限
+        published_since (str): 最早发布时间（ISO格式）
+        fetched_since (float): 最早获取时间（Unix时间戳），用于限定存档窗口
+        limit (int): 最大返回条数
+        backend (str): 只返回该数据源写入的文章，None表示不限
+
+    返回:
+        list: NewsAPI格式的文章字典列表
+    """
+    terms = [tag.strip() for tag in tags if tag and tag.strip()]
+    if not terms:
+        return []
+
+    try:
+        conn = get_connection()
+
+        # trigram分词要求至少3个字符，较短的标签使用LIKE匹配
+        fts_available = os.path.realpath(DB_PATH) in _fts_paths
+        fts_terms = [term for term in terms if len(term) >= 3] if fts_available else []
+        like_terms = [term for term in terms if term not in fts_terms]
+
+        match_clauses = []
+        params = []
+        if fts_terms:
+            match_clauses.append('id IN (SELECT rowid FROM articles_fts WHERE articles_fts MATCH ?)')
+            params.append(_fts_query(fts_terms))
+        for term in like_terms:
+            match_clauses.append("(title LIKE ? ESCAPE '\\' OR description LIKE ? ESCAPE '\\')")
+            pattern = '%' + term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            params.extend([pattern, pattern])
+
+        where = ['(' + ' OR '.join(match_clauses) + ')', '(title REGEXP ? OR description REGEXP ?)']
+        pattern = _word_pattern(terms)
+        params.extend([pattern, pattern])
+        if language:
+            where.append('language = ?')
+            params.append(language)
+        if backend:
+            where.append('backend = ?')
+            params.append(backend)
+        if published_since:
+            where.append('published_at >= ?')
+            params.append(published_since)
+        if fetched_since is not None:
+            where.append('fetched_at >= ?')
+            params.append(fetched_since)
+        params.append(limit)
+
+        rows = conn.execute(f'''
+        SELECT title, url, source, author, description, content, published_at, image_url
+        FROM articles
+        WHERE {' AND '.join(where)}
+        ORDER BY published_at DESC
+        LIMIT ?
+        ''', params).fetchall()
+
+        # 转换为NewsAPI格式
+        return [{
+            'source': {'name': row['source']},
+            'author': row['author'],
+            'title': row['title'],
+            'description': row['description'],
+            'url': row['url'],
+            'urlToImage': row['image_url'],
+            'publishedAt': row['published_at'],
+            'content': row['content'],
+        } for row in rows]
+
+    except sqlite3.Error as e:
+        logger.error(f"搜索文章存档时出错: {e}")
+        return []
+
+
+@metrics.timed("db_query", op="prune_articles")
+def prune_articles(max_age_days=ARTICLE_ARCHIVE_DAYS):
+    """
+    清理超过保留天数的存档文章
+
+    参数:
+        max_age_days (int): 保留天数
+
+    返回:
+        int: 删除的文章数
+    """
+    try:
+        conn = get_connection()
+        with transaction(conn):
+            cursor = conn.execute('DELETE FROM articles WHERE fetched_at < ?', (time.time() - max_age_days * 86400,))
+        return cursor.rowcount
+
+    except sqlite3.Error as e:
+        logger.error(f"清理文章存档时出错: {e}")
+        return 0
@@ -0,0 +1,305 @@
+"""
+新闻文章数据模型
+
+Article 使用 __slots__ 存储单篇文章，发布时间为UTC纪元秒（int），来源名称经过 sys.intern，
+同一来源的所有文章共享一个字符串对象。每次请求只有几十条新闻，逐条处理的纯Python对象
+比构建和转换pandas数据框快得多，也不需要在首次请求时导入pandas。
+
+需要做统计分析时，ArticleBatch 把一批文章转换为按列存储的数组，可进一步转换为数据框。
+"""
+import sys
+import time
+from array import array
+from datetime import datetime, timezone
+from utils.lazy_import import lazy_import
+
+pd = lazy_import("pandas")
+
+# 列式存储中表示缺失发布时间的值
+MISSING_TIMESTAMP = -(2 ** 63)
+
+# 兼容字典访问（NewsAPI字段名）时的字段映射
+_DICT_FIELDS = {
+    'title': 'title',
+    'description': 'description',
+    'url': 'url',
+    'urlToImage': 'image_url',
+    'source': 'source',
+    'author': 'author',
+    'content': 'content',
+    'alternate_sources': 'alternate_sources',
+    'score': 'score',
+}
+
+
+def parse_timestamp(value):
+    """
+    将发布时间解析为UTC纪元秒
+
+    参数:
+        value: ISO 8601字符串（如 2024-01-01T08:00:00Z）、datetime或纪元秒，无时区的按UTC处理
+
+    返回:
+        int | None: 纪元秒，无法解析时返回None
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        text = value.strip()
+        if text.endswith('Z'):
+            text = text[:-1] + '+00:00'
+        try:
+            value = datetime.fromisoformat(text)
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+def format_timestamp(published):
+    """
+    将纪元秒格式化为NewsAPI格式的时间字符串
+
+    参数:
+        published (int): UTC纪元秒
+
+    返回:
+        str | None: 如 2024-01-01T08:00:00Z，published为None时返回None
+    """
+    if published is None:
+        return None
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(published))
+
+
+class Article:
+    """
+    单篇新闻文章
+
+    除属性访问外，还支持以NewsAPI字段名读取（item.get('publishedAt')、item['urlToImage']），
+    以兼容按字典处理新闻的代码。
+    """
+
+    __slots__ = ('title', 'description', 'url', 'image_url', 'source', 'published',
+                 'author', 'content', 'alternate_sources', 'score')
+
+    def __init__(self, title='', description='', url='', image_url='', source='', published=None,
+                 author=None, content=None, alternate_sources=None, score=None):
+        """
+        参数:
+            title (str): 标题
+            description (str): 描述
+            url (str): 原文地址
+            image_url (str): 配图地址
+            source (str): 来源名称
+            published (int): 发布时间（UTC纪元秒）
+            author (str): 作者
+            content (str): 正文片段
+            alternate_sources (list): 合并的重复新闻的来源（{'name', 'url'} 字典列表）
+            score (float): 相关性得分（排序后设置）
+        """
+        self.title = title
+        self.description = description
+        self.url = url
+        self.image_url = image_url
+        self.source = sys.intern(source) if source else ''
+        self.published = published
+        self.author = author
+        self.content = content
+        self.alternate_sources = alternate_sources
+        self.score = score
+
+    @classmethod
+    def from_dict(cls, item):
+        """
+        由NewsAPI格式的文章字典（或 to_dict() 的结果）创建文章
+
+        参数:
+            item (dict): 文章字典，source 可以是 {'id', 'name'} 字典或来源名称
+
+        返回:
+            Article: 文章
+        """
+        source = item.get('source')
+        if isinstance(source, dict):
+            source = source.get('name')
+        return cls(
+            title=item.get('title') or '',
+            description=item.get('description') or '',
+            url=item.get('url') or '',
+            image_url=item.get('urlToImage') or '',
+            source=str(source) if source else '',
+            published=parse_timestamp(item.get('publishedAt')),
+            author=item.get('author'),
+            content=item.get('content'),
+            alternate_sources=item.get('alternate_sources'),
+            score=item.get('score'),
+        )
+
+    @property
+    def published_at(self):
+        """NewsAPI格式的发布时间字符串"""
+        return format_timestamp(self.published)
+
+    def get(self, key, default=None):
+        """
+        以NewsAPI字段名读取字段（值为None时返回default）
+
+        参数:
+            key (str): 字段名
+            default: 默认值
+
+        返回:
+            字段值
+        """
+        if key == 'publishedAt':
+            value = self.published_at
+        else:
+            field = _DICT_FIELDS.get(key)
+            value = getattr(self, field) if field else None
+        return default if value is None else value
+
+    def __getitem__(self, key):
+        if key != 'publishedAt' and key not in _DICT_FIELDS:
+            raise KeyError(key)
+        return self.get(key)
+
+    def to_dict(self):
+        """
+        转换为NewsAPI字段名的字典（source 为来源名称）
+
+        返回:
+            dict: 文章字典
+        """
+        result = {
+            'title': self.title,
+            'description': self.description,
+            'url': self.url,
+            'urlToImage': self.image_url,
+            'source': self.source,
+            'publishedAt': self.published_at,
+            'author': self.author,
+            'content': self.content,
+        }
+        if self.alternate_sources:
+            result['alternate_sources'] = self.alternate_sources
+        if self.score is not None:
+            result['score'] = self.score
+        return result
+
+    def __repr__(self):
+        return f"Article(title={self.title[:30]!r}, source={self.source!r}, published={self.published_at})"
+
+
+class ArticleList(list):
+    """
+    fetch_news 返回的文章列表，附带合并的重复新闻数
+    """
+
+    __slots__ = ('duplicates_removed',)
+
+    def __init__(self, articles=(), duplicates_removed=0):
+        """
+        参数:
+            articles (iterable): 文章
+            duplicates_removed (int): 近似重复检测合并的新闻数
+        """
+        super().__init__(articles)
+        self.duplicates_removed = duplicates_removed
+
+    def to_batch(self):
+        """转换为列式的 ArticleBatch"""
+        return ArticleBatch.from_articles(self)
+
+
+class ArticleBatch:
+    """
+    按列存储的一批文章，用于统计分析
+
+    发布时间和得分分别存放在 array('q') 和 array('d') 中（缺失值为 MISSING_TIMESTAMP 和 NaN），
+    字符串字段按列存放在列表中。
+    """
+
+    __slots__ = ('titles', 'descriptions', 'urls', 'image_urls', 'sources', 'published', 'scores')
+
+    def __init__(self):
+        self.titles = []
+        self.descriptions = []
+        self.urls = []
+        self.image_urls = []
+        self.sources = []
+        self.published = array('q')
+        self.scores = array('d')
+
+    @classmethod
+    def from_articles(cls, articles):
+        """
+        由文章列表创建列式批次
+
+        参数:
+            articles (iterable): Article 列表
+
+        返回:
+            ArticleBatch: 列式批次
+        """
+        batch = cls()
+        for article in articles:
+            batch.append(article)
+        return batch
+
+    def append(self, article):
+        """
+        追加一篇文章
+
+        参数:
+            article (Article): 文章
+        """
+        self.titles.append(article.title)
+        self.descriptions.append(article.description)
+        self.urls.append(article.url)
+        self.image_urls.append(article.image_url)
+        self.sources.append(article.source)
+        self.published.append(MISSING_TIMESTAMP if article.published is None else article.published)
+        self.scores.append(float('nan') if article.score is None else article.score)
+
+    def __len__(self):
+        return len(self.urls)
+
+    def __getitem__(self, idx):
+        published = self.published[idx]
+        score = self.scores[idx]
+        return Article(
+            title=self.titles[idx],
+            description=self.descriptions[idx],
+            url=self.urls[idx],
+            image_url=self.image_urls[idx],
+            source=self.sources[idx],
+            published=None if published == MISSING_TIMESTAMP else published,
+            score=None if score != score else score,
+        )
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+
+    def to_dataframe(self):
+        """
+        转换为pandas数据框（publishedAt 为UTC时间）
+
+        返回:
+            pandas.DataFrame: 新闻数据框
+        """
+        published = pd.Series(self.published, dtype='int64')
+        return pd.DataFrame({
+            'title': self.titles,
+            'description': self.descriptions,
+            'url': self.urls,
+            'urlToImage': self.image_urls,
+            'source': self.sources,
+            'publishedAt': pd.to_datetime(published.where(published != MISSING_TIMESTAMP), unit='s', utc=True),
+            'score': pd.Series(self.scores, dtype='float64'),
+        })
@@ -0,0 +1,270 @@
+"""
+近似重复新闻检测工具
+
+对标题和描述计算64位SimHash指纹，使用多表SimHash只比较候选对，
+将同一通稿的多个转载合并为一条代表新闻，并记录其他来源。
+"""
+import re
+import hashlib
+import logging
+import operator
+import itertools
+import functools
+import threading
+from config.settings import settings
+from utils.lazy_import import lazy_import
+from utils import metrics
+
+np = lazy_import("numpy")
+
+logger = logging.getLogger('dedup')
+
+# 是否启用近似重复检测
+DEDUP_ENABLED = settings.get_bool("DEDUP_ENABLED", True)
+# 两条新闻指纹的汉明距离不超过该值时视为重复（越大越宽松）
+DEDUP_MAX_HAMMING = settings.get_int("DEDUP_MAX_HAMMING", 8)
+
+SIMHASH_BITS = 64
+SHINGLE_SIZE = 3
+# 多表SimHash中每张表键的最小位数
+LSH_MIN_KEY_BITS = 16
+
+_NON_WORD = re.compile(r'[\W_]+', re.UNICODE)
+
+_stats = {'runs': 0, 'candidate_pairs': 0}
+_stats_lock = threading.Lock()
+
+
+def _shingles(text):
+    """
+    将文本规范化后切分为字符n-gram（同时适用于中文和英文）
+
+    参数:
+        text (str): 文本
+
+    返回:
+        dict: n-gram到出现次数的映射
+    """
+    normalized = _NON_WORD.sub(' ', text.lower()).strip()
+    if len(normalized) < SHINGLE_SIZE:
+        return {normalized: 1} if normalized else {}
+
+    counts = {}
+    for i in range(len(normalized) - SHINGLE_SIZE + 1):
+        gram = normalized[i:i + SHINGLE_SIZE]
+        counts[gram] = counts.get(gram, 0) + 1
+    return counts
+
+
+@functools.lru_cache(maxsize=65536)
+def _feature_hash(gram):
+    """n-gram的64位稳定哈希（常见n-gram在不同文章间重复出现，结果缓存复用）"""
+    return int.from_bytes(hashlib.blake2b(gram.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def simhash_many(texts):
+    """
+    批量计算文本的64位SimHash指纹（所有文本的n-gram在一次向量化运算中完成投票）
+
+    参数:
+        texts (list): 文本列表
+
+    返回:
+        list: 64位指纹列表，空文本对应None
+    """
+    hashes = []
+    weights = []
+    offsets = []
+    owners = []
+    for idx, text in enumerate(texts):
+        counts = _shingles(text) if text else {}
+        if not counts:
+            continue
+        offsets.append(len(hashes))
+        owners.append(idx)
+        # 去重结果决定摘要缓存键，指纹必须跨进程稳定，不能使用随 PYTHONHASHSEED 变化的内置 hash()
+        hashes.extend(_feature_hash(gram) for gram in counts)
+        weights.extend(counts.values())
+
+    fingerprints = [None] * len(texts)
+    if not owners:
+        return fingerprints
+
+    hashes = np.array(hashes, dtype=np.uint64)
+    weights = np.array(weights, dtype=np.int64)
+    offsets = np.array(offsets)
+
+    # 每一位按权重投票：该位为1的特征权重之和超过总权重一半时，指纹该位为1
+    totals = np.add.reduceat(weights, offsets)
+    packed = np.zeros(len(owners), dtype=np.uint64)
+    for bit in range(SIMHASH_BITS):
+        shift = np.uint64(bit)
+        ones = np.add.reduceat(((hashes >> shift) & np.uint64(1)).astype(np.int64) * weights, offsets)
+        packed |= (2 * ones > totals).astype(np.uint64) << shift
+
+    for idx, fingerprint in zip(owners, packed.tolist()):
+        fingerprints[idx] = fingerprint
+    return fingerprints
+
+
+def simhash(text):
+    """
+    计算文本的64位SimHash指纹
+
+    参数:
+        text (str): 文本
+
+    返回:
+        int | None: 64位指纹，空文本返回None
+    """
+    return simhash_many([text])[0]
+
+
+def _popcount(values):
+    """逐元素计算uint64数组中1的个数"""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(values)
+    return np.unpackbits(values.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+
+
+def _find(parent, i):
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+@functools.lru_cache(maxsize=8)
+def _lsh_tables(max_hamming, min_key_bits=LSH_MIN_KEY_BITS):
+    """
+    构建多表SimHash的掩码表
+
+    将64位指纹分为 max_hamming + r 块，每张表以其中 r 块的组合作为键。汉明距离不超过
+    max_hamming 的两个指纹最多有 max_hamming 块不同，至少有 r 块完全相同，因此必定在某张表中
+    落入同一桶（抽屉原理）。r 取使键宽不少于 min_key_bits 的最小值，键越宽，随机碰撞越少。
+
+    参数:
+        max_hamming (int): 最大汉明距离
+        min_key_bits (int): 每张表键的最小位数
+
+    返回:
+        tuple: 每张表的64位掩码
+    """
+    max_hamming = max(0, min(SIMHASH_BITS - 1, max_hamming))
+    key_blocks = 1
+    while key_blocks * SIMHASH_BITS // (max_hamming + key_blocks) < min_key_bits \
+            and max_hamming + key_blocks < SIMHASH_BITS:
+        key_blocks += 1
+
+    blocks = max_hamming + key_blocks
+    bounds = [SIMHASH_BITS * i // blocks for i in range(blocks + 1)]
+    block_masks = [((1 << (bounds[i + 1] - bounds[i])) - 1) << bounds[i] for i in range(blocks)]
+    return tuple(
+        functools.reduce(operator.or_, (block_masks[i] for i in combo))
+        for combo in itertools.combinations(range(blocks), key_blocks)
+    )
+
+
+def find_duplicate_clusters(fingerprints, max_hamming=DEDUP_MAX_HAMMING):
+    """
+    使用多表SimHash查找近似重复的指纹簇
+
+    每张表按掩码后的指纹排序分桶（见 _lsh_tables），只比较同桶内的候选对。
+
+    参数:
+        fingerprints (list): 指纹列表，None表示不参与比较
+        max_hamming (int): 最大汉明距离
+
+    返回:
+        list: 簇列表，每个簇为按原顺序排列的下标列表
+    """
+    count = len(fingerprints)
+    parent = list(range(count))
+
+    # 没有文本内容的新闻不参与比较
+    indices = [idx for idx, fingerprint in enumerate(fingerprints) if fingerprint is not None]
+    candidates = 0
+    if len(indices) > 1:
+        values = np.array([fingerprints[idx] for idx in indices], dtype=np.uint64)
+        positions = np.array(indices, dtype=np.int64)
+        pair_codes = []
+        for mask in _lsh_tables(max_hamming):
+            keys = values & np.uint64(mask)
+            order = np.argsort(keys, kind='stable')
+            sorted_keys = keys[order]
+            # 排序后同桶的指纹相邻，间隔 d 的两项键相同即为一个候选对，逐步增大 d 直到没有更大的桶
+            offset = 1
+            while offset < len(order):
+                same = sorted_keys[offset:] == sorted_keys[:-offset]
+                if not same.any():
+                    break
+                left, right = positions[order[:-offset][same]], positions[order[offset:][same]]
+                pair_codes.append(np.minimum(left, right) * count + np.maximum(left, right))
+                offset += 1
+
+        if pair_codes:
+            codes = np.unique(np.concatenate(pair_codes))
+            candidates = len(codes)
+            left, right = codes // count, codes % count
+            lookup = np.array([fingerprint or 0 for fingerprint in fingerprints], dtype=np.uint64)
+            close = _popcount(lookup[left] ^ lookup[right]) <= max_hamming
+            for a, b in zip(left[close].tolist(), right[close].tolist()):
+                root_a, root_b = _find(parent, a), _find(parent, b)
+                if root_a != root_b:
+                    # 保留靠前（更新）的新闻作为根
+                    parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    with _stats_lock:
+        _stats['runs'] += 1
+        _stats['candidate_pairs'] += candidates
+    metrics.incr('dedup_candidate_pairs', candidates)
+
+    clusters = {}
+    for idx in range(count):
+        clusters.setdefault(_find(parent, idx), []).append(idx)
+    return list(clusters.values())
+
+
+def get_dedup_stats():
+    """
+    获取进程内累计的近似重复检测统计
+
+    返回:
+        dict: runs（检测次数）和 candidate_pairs（累计比较的候选对数）
+    """
+    with _stats_lock:
+        return dict(_stats)
+
+
+def dedupe_articles(articles, max_hamming=DEDUP_MAX_HAMMING):
+    """
+    合并近似重复的新闻，每个簇保留排在最前的一条，并在 alternate_sources 中记录其余来源
+
+    参数:
+        articles (list): Article 列表（按优先级排序）
+        max_hamming (int): 最大汉明距离
+
+    返回:
+        tuple: (去重后的文章列表, 被合并的文章数)
+    """
+    if len(articles) < 2:
+        return list(articles), 0
+
+    fingerprints = simhash_many([
+        f"{article.title} {article.description}".strip()
+        for article in articles
+    ])
+
+    result = []
+    for cluster in sorted(find_duplicate_clusters(fingerprints, max_hamming)):
+        representative = articles[cluster[0]]
+        if len(cluster) > 1:
+            representative.alternate_sources = [
+                {'name': articles[idx].source, 'url': articles[idx].url} for idx in cluster[1:]
+            ]
+        result.append(representative)
+
+    removed = len(articles) - len(result)
+    if removed:
+        logger.info(f"近似重复检测: 合并了{removed}条重复新闻")
+    return result, removed
@@ -0,0 +1,165 @@
+"""
+对冲请求工具
+
+首选模型在指定时间内没有返回首个token时，向备用提供商发送相同请求，
+先返回首个token的一方胜出并继续流式输出，另一方被取消。
+"""
+import time
+import queue
+import logging
+import threading
+from utils.summary_store import extract_chunk_content, make_chunk
+
+logger = logging.getLogger('hedged_stream')
+
+
+class _Racer:
+    """
+    在后台线程中创建并读取一个流式请求，将文本块放入共享队列
+    """
+
+    def __init__(self, name, provider, start_fn, events):
+        """
+        参数:
+            name (str): 参与者标识（如模型名称）
+            provider (str): 提供商名称
+            start_fn (callable): 无参函数，发起请求并返回流式响应
+            events (queue.Queue): 共享事件队列，元素为 (name, kind, payload)
+        """
+        self.name = name
+        self.provider = provider
+        self._start_fn = start_fn
+        self._events = events
+        self._cancelled = threading.Event()
+        self._stream = None
+        self._thread = threading.Thread(target=self._run, name=f"hedge-{name}", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def cancel(self):
+        """取消请求并尽快关闭底层连接"""
+        self._cancelled.set()
+        stream = self._stream
+        if stream is not None and hasattr(stream, 'close'):
+            try:
+                stream.close()
+            except Exception:
+                pass
+
+    def _run(self):
+        try:
+            self._stream = self._start_fn()
+            if self._cancelled.is_set():
+                self.cancel()
+                return
+            for chunk in self._stream:
+                if self._cancelled.is_set():
+                    return
+                content = extract_chunk_content(chunk)
+                if content:
+                    self._events.put((self.name, 'content', content))
+            self._events.put((self.name, 'done', None))
+        except Exception as e:
+            if not self._cancelled.is_set():
+                self._events.put((self.name, 'error', e))
+
+
+class HedgedStream:
+    """
+    对冲流式请求
+
+    创建时立即发起首选请求；wait_first()（或迭代时）等待首个token，超过 delay 秒仍未返回则发起备用请求，
+    先返回首个token的一方胜出。胜出方、首token耗时和是否触发对冲记录在 meta 中。
+    """
+
+    def __init__(self, primary, secondary, delay, meta=None):
+        """
+        参数:
+            primary (tuple): (名称, 提供商, 发起请求的无参函数)
+            secondary (tuple): (名称, 提供商, 发起请求的无参函数)
+            delay (float): 等待首选请求首个token的秒数
+            meta (dict): 用于记录胜出方等信息的字典
+        """
+        self._events = queue.Queue()
+        self._delay = delay
+        self._started_at = time.perf_counter()
+        self._primary = _Racer(*primary, self._events)
+        self._secondary = _Racer(*secondary, self._events)
+        self.meta = meta if meta is not None else {}
+        self.meta['hedged'] = False
+        self._winner = None
+        self._first_content = None
+        self._primary.start()
+
+    def _launch_secondary(self):
+        if not self.meta['hedged']:
+            self.meta['hedged'] = True
+            logger.info(f"首选模型 {self._primary.name} 未及时响应，发起对冲请求: {self._secondary.name}")
+            self._secondary.start()
+
+    def wait_first(self):
+        """
+        等待竞速结束（任意一方返回首个token），可重复调用
+
+        返回:
+            str: 胜出方名称
+
+        异常:
+            双方都失败（或都没有输出内容）时抛出最后一个失败的异常
+        """
+        if self._winner is not None:
+            return self._winner
+
+        racers = {self._primary.name: self._primary, self._secondary.name: self._secondary}
+        failed = {}
+        while self._winner is None:
+            timeout = None
+            if not self.meta['hedged']:
+                timeout = max(0.0, self._delay - (time.perf_counter() - self._started_at))
+            try:
+                name, kind, payload = self._events.get(timeout=timeout)
+            except queue.Empty:
+                self._launch_secondary()
+                continue
+
+            if kind == 'content':
+                self._winner = name
+                self._first_content = payload
+                continue
+            if kind == 'error':
+                failed[name] = payload
+                logger.warning(f"对冲请求 {name} 失败: {payload}")
+            else:
+                # 没有输出任何内容就结束，视为失败
+                failed[name] = RuntimeError(f"{name} 未返回任何内容")
+            if len(failed) == len(racers):
+                raise failed[name]
+            # 首选请求提前失败时立即发起备用请求
+            self._launch_secondary()
+
+        self.meta['winner'] = self._winner
+        self.meta['winner_provider'] = racers[self._winner].provider
+        self.meta['ttft'] = time.perf_counter() - self._started_at
+        logger.info(f"对冲请求胜出: {self._winner}，首token耗时 {self.meta['ttft']:.2f}s")
+
+        for name, racer in racers.items():
+            if name != self._winner:
+                racer.cancel()
+        return self._winner
+
+    def __iter__(self):
+        winner = self.wait_first()
+
+        # 输出阶段：只转发胜出方的文本块
+        yield make_chunk(self._first_content)
+        while True:
+            name, kind, payload = self._events.get()
+            if name != winner:
+                continue
+            if kind == 'content':
+                yield make_chunk(payload)
+            elif kind == 'error':
+                raise payload
+            else:
+                return
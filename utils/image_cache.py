@@ -0,0 +1,243 @@
+"""
+新闻图片缩略图缓存工具
+
+每张远程图片只下载一次，缩放到卡片尺寸后重新编码保存到本地磁盘，
+缓存目录按总大小上限以最近访问时间淘汰。
+"""
+import os
+import io
+import time
+import hashlib
+import logging
+import threading
+import functools
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from config.settings import settings
+from utils.lazy_import import lazy_import
+from utils.news_api import get_http_session
+from utils import metrics
+
+# Pillow 在首次生成缩略图时才导入
+Image = lazy_import("PIL.Image")
+features = lazy_import("PIL.features")
+
+logger = logging.getLogger('image_cache')
+
+# 缩略图缓存目录
+THUMBNAIL_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'thumbnails')
+
+# 缩略图配置
+THUMBNAIL_WIDTH = settings.get_int("THUMBNAIL_WIDTH", 320)
+THUMBNAIL_QUALITY = settings.get_int("THUMBNAIL_QUALITY", 80)
+# 缓存目录总大小上限（字节）
+IMAGE_CACHE_MAX_BYTES = settings.get_int("IMAGE_CACHE_MAX_BYTES", 100 * 1024 * 1024)
+# 并发下载数（进程内所有会话共享）
+IMAGE_FETCH_WORKERS = settings.get_int("IMAGE_FETCH_WORKERS", 4)
+# 渲染卡片前等待缩略图的最长秒数，0表示不等待：未缓存的图片先使用远程地址，下载完成后的下次渲染使用本地缩略图
+IMAGE_PREFETCH_WAIT = settings.get_float("IMAGE_PREFETCH_WAIT", 0)
+# 下载失败的图片在该秒数内不再重试
+IMAGE_FAILURE_TTL = settings.get_int("IMAGE_FAILURE_TTL", 600)
+# 最多记录的下载失败图片数（超出后淘汰最早的记录）
+IMAGE_FAILURE_MAX_ENTRIES = 1000
+# 单张原图的最大下载字节数
+IMAGE_MAX_DOWNLOAD_BYTES = 10 * 1024 * 1024
+IMAGE_FETCH_TIMEOUT = (3.05, 8)
+
+
+_executor = ThreadPoolExecutor(max_workers=IMAGE_FETCH_WORKERS, thread_name_prefix="thumbnail")
+_inflight = {}
+# 下载失败的图片地址到失败时间的映射（按失败时间排序）
+_failed_urls = OrderedDict()
+_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=None)
+def thumbnail_format():
+    """
+    缩略图编码格式（支持WebP时优先使用WebP，否则使用JPEG）
+
+    返回:
+        tuple: (Pillow格式名, 文件扩展名)
+    """
+    if features.check('webp'):
+        return "WEBP", ".webp"
+    return "JPEG", ".jpg"
+
+
+def thumbnail_path(url):
+    """
+    获取图片地址对应的缩略图缓存路径
+
+    参数:
+        url (str): 图片地址
+
+    返回:
+        str: 本地文件路径
+    """
+    digest = hashlib.sha256(url.encode('utf-8')).hexdigest()
+    return os.path.join(THUMBNAIL_DIR, digest + thumbnail_format()[1])
+
+
+def _recently_failed(url):
+    """图片是否在 IMAGE_FAILURE_TTL 秒内下载失败过"""
+    with _lock:
+        failed_at = _failed_urls.get(url)
+        if failed_at is None:
+            return False
+        if time.monotonic() - failed_at < IMAGE_FAILURE_TTL:
+            return True
+        del _failed_urls[url]
+        return False
+
+
+def _mark_failed(url):
+    """记录下载失败的图片"""
+    with _lock:
+        _failed_urls.pop(url, None)
+        _failed_urls[url] = time.monotonic()
+        while len(_failed_urls) > IMAGE_FAILURE_MAX_ENTRIES:
+            _failed_urls.popitem(last=False)
+
+
+def get_thumbnail(url):
+    """
+    获取图片的本地缩略图（未缓存时下载并生成）
+
+    参数:
+        url (str): 图片地址
+
+    返回:
+        str | None: 本地缩略图路径，失败时返回None
+    """
+    if not url or _recently_failed(url):
+        return None
+
+    path = thumbnail_path(url)
+    if os.path.exists(path):
+        # 更新访问时间，用于LRU淘汰
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        metrics.incr('thumbnail_requests', result='hit')
+        return path
+
+    try:
+        _download_thumbnail(url, path)
+        metrics.incr('thumbnail_requests', result='miss')
+        return path
+
+    except Exception as e:
+        logger.info(f"生成缩略图失败: {url[:80]} ({e})")
+        metrics.incr('thumbnail_requests', result='error')
+        _mark_failed(url)
+        return None
+
+
+@metrics.timed("thumbnail_download")
+def _download_thumbnail(url, path):
+    """下载图片并生成缩略图，写入 path"""
+    # 流式响应必须关闭，连接才会归还到共享会话的连接池（包括图片过大和状态码错误时）
+    with get_http_session().get(url, timeout=IMAGE_FETCH_TIMEOUT, stream=True) as response:
+        response.raise_for_status()
+
+        data = io.BytesIO()
+        for block in response.iter_content(64 * 1024):
+            data.write(block)
+            if data.tell() > IMAGE_MAX_DOWNLOAD_BYTES:
+                raise ValueError("图片过大")
+    data.seek(0)
+
+    with Image.open(data) as image:
+        image.draft('RGB', (THUMBNAIL_WIDTH * 2, THUMBNAIL_WIDTH * 2))
+        image = image.convert('RGB')
+        image.thumbnail((THUMBNAIL_WIDTH, THUMBNAIL_WIDTH * 2))
+
+        os.makedirs(THUMBNAIL_DIR, exist_ok=True)
+        # 先写临时文件再原子替换，避免其他进程读到不完整的文件
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        image.save(tmp_path, thumbnail_format()[0], quality=THUMBNAIL_QUALITY)
+        os.replace(tmp_path, path)
+
+
+def _submit(url):
+    """提交下载任务，同一地址同时只下载一次"""
+    with _lock:
+        future = _inflight.get(url)
+        if future is None:
+            future = _executor.submit(get_thumbnail, url)
+            _inflight[url] = future
+            future.add_done_callback(lambda _: _release(url))
+        return future
+
+
+def _release(url):
+    with _lock:
+        _inflight.pop(url, None)
+
+
+@metrics.timed()
+def prefetch_thumbnails(urls, timeout=IMAGE_PREFETCH_WAIT):
+    """
+    返回已缓存的缩略图，并在后台下载未缓存的图片，最多等待 timeout 秒
+
+    参数:
+        urls (list): 图片地址列表
+        timeout (float): 最长等待秒数，0表示不等待
+
+    返回:
+        dict: 图片地址到本地缩略图路径的映射（未完成或失败的地址不包含在内，卡片使用远程地址）
+    """
+    result = {}
+    futures = {}
+    for url in dict.fromkeys(url for url in urls if url):
+        path = thumbnail_path(url)
+        if os.path.exists(path):
+            result[url] = get_thumbnail(url)
+        elif not _recently_failed(url):
+            futures[url] = _submit(url)
+
+    if futures:
+        if timeout > 0:
+            wait(futures.values(), timeout=timeout)
+        for url, future in futures.items():
+            if future.done() and future.result():
+                result[url] = future.result()
+        _executor.submit(enforce_cache_limit)
+
+    return result
+
+
+def enforce_cache_limit(max_bytes=IMAGE_CACHE_MAX_BYTES):
+    """
+    缓存目录超过大小上限时，按最近访问时间删除最旧的缩略图
+
+    参数:
+        max_bytes (int): 缓存目录大小上限（字节）
+    """
+    try:
+        entries = []
+        total = 0
+        with os.scandir(THUMBNAIL_DIR) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith(thumbnail_format()[1]):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+
+        if total <= max_bytes:
+            return
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    except OSError as e:
+        logger.warning(f"清理缩略图缓存时出错: {e}")
@@ -0,0 +1,60 @@
+"""
+延迟导入工具
+
+pandas、numpy、openai、requests、Pillow 等依赖导入耗时较长，而首屏渲染并不需要它们。
+模块顶层用 lazy_import() 声明依赖，首次访问属性时才真正导入，调用处的写法保持不变：
+
+    pd = lazy_import("pandas")
+    pd.DataFrame(...)  # 此时才导入 pandas
+"""
+import importlib
+import threading
+
+
+class LazyModule:
+    """
+    首次访问属性时才导入的模块代理
+    """
+
+    __slots__ = ('_name', '_module', '_lock')
+
+    def __init__(self, name):
+        """
+        参数:
+            name (str): 模块的完整名称
+        """
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        module = self._module
+        if module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+                module = self._module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_import(name):
+    """
+    声明一个延迟导入的模块
+
+    参数:
+        name (str): 模块的完整名称（如 "PIL.Image"）
+
+    返回:
+        LazyModule: 模块代理，首次访问属性时导入
+    """
+    return LazyModule(name)
@@ -0,0 +1,328 @@
+"""
+运行时指标工具
+
+提供计时区间（span）、计数器和观测值，以Prometheus文本格式导出：
+- METRICS_PORT 大于0时在该端口提供 /metrics 接口（监听 METRICS_HOST，默认只监听本机）
+- METRICS_FILE 非空时定期写入该文件（可配合 node_exporter 的 textfile 采集器或离线分析）
+
+未启用时 span() 返回共享的空上下文，timed() 直接返回原函数，incr()/observe() 立即返回，
+对热路径几乎没有额外开销。
+"""
+import os
+import time
+import logging
+import threading
+import functools
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from config.settings import settings
+
+logger = logging.getLogger('metrics')
+
+# 是否启用指标采集
+METRICS_ENABLED = settings.get_bool("METRICS_ENABLED", False)
+# Prometheus文本接口端口，0表示不启动
+METRICS_PORT = settings.get_int("METRICS_PORT", 0)
+# Prometheus文本接口监听的地址（默认只监听本机，需要远程采集时显式配置）
+METRICS_HOST = settings.get("METRICS_HOST", "127.0.0.1")
+# 文件导出路径及写入间隔（秒）
+METRICS_FILE = settings.get("METRICS_FILE", "")
+METRICS_EXPORT_INTERVAL = settings.get_float("METRICS_EXPORT_INTERVAL", 15)
+
+METRIC_PREFIX = "snapnews_"
+
+# 耗时直方图的桶上界（秒）
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+# 速率直方图的桶上界（每秒）
+RATE_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000)
+# 每次页面运行最多保留的计时区间数
+RERUN_SPAN_LIMIT = 200
+
+_counters = {}
+_histograms = {}
+_gauges = {}
+_lock = threading.Lock()
+_local = threading.local()
+
+_exporters_started = False
+_exporters_lock = threading.Lock()
+
+
+def _label_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+class _NoopSpan:
+    """未启用指标时使用的空上下文"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _Span:
+    """计时区间：结束时记录耗时直方图，并加入当前线程的本次运行记录"""
+
+    __slots__ = ('name', 'labels', 'started')
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+        self.started = 0.0
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.started
+        labels = dict(self.labels, span=self.name)
+        if exc_type is not None:
+            labels['error'] = exc_type.__name__
+        observe('span_seconds', elapsed, buckets=DURATION_BUCKETS, **labels)
+
+        spans = getattr(_local, 'spans', None)
+        if spans is not None and len(spans) < RERUN_SPAN_LIMIT:
+            spans.append({
+                'span': self.name,
+                'labels': self.labels,
+                'ms': round(elapsed * 1000, 2),
+                'error': exc_type.__name__ if exc_type else None,
+            })
+        return False
+
+
+def span(name, **labels):
+    """
+    计时区间上下文管理器
+
+    参数:
+        name (str): 区间名称
+        **labels: 附加标签
+
+    返回:
+        上下文管理器
+    """
+    if not METRICS_ENABLED:
+        return _NOOP_SPAN
+    return _Span(name, labels)
+
+
+def timed(name=None, **labels):
+    """
+    为函数添加计时区间的装饰器（未启用指标时直接返回原函数）
+
+    参数:
+        name (str): 区间名称，默认为函数名
+        **labels: 附加标签
+    """
+    def decorator(func):
+        if not METRICS_ENABLED:
+            return func
+
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _Span(span_name, labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def incr(name, amount=1, **labels):
+    """
+    计数器累加
+
+    参数:
+        name (str): 指标名称（导出时自动加前缀和 _total 后缀）
+        amount (float): 增量
+        **labels: 标签
+    """
+    if not METRICS_ENABLED:
+        return
+    key = (name, _label_key(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def set_gauge(name, value, **labels):
+    """
+    设置瞬时值
+
+    参数:
+        name (str): 指标名称
+        value (float): 当前值
+        **labels: 标签
+    """
+    if not METRICS_ENABLED:
+        return
+    with _lock:
+        _gauges[(name, _label_key(labels))] = value
+
+
+def observe(name, value, buckets=DURATION_BUCKETS, **labels):
+    """
+    记录一次观测值（直方图）
+
+    参数:
+        name (str): 指标名称
+        value (float): 观测值
+        buckets (tuple): 桶上界，同一指标应使用相同的桶
+        **labels: 标签
+    """
+    if not METRICS_ENABLED:
+        return
+    key = (name, _label_key(labels))
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = {'buckets': buckets, 'counts': [0] * len(buckets), 'sum': 0.0, 'count': 0}
+        histogram['sum'] += value
+        histogram['count'] += 1
+        for i, bound in enumerate(histogram['buckets']):
+            if value <= bound:
+                histogram['counts'][i] += 1
+
+
+def start_rerun():
+    """
+    开始记录当前线程（一次页面运行）的计时区间
+    """
+    _local.spans = [] if METRICS_ENABLED else None
+
+
+def get_rerun_spans():
+    """
+    获取当前线程本次页面运行记录的计时区间
+
+    返回:
+        list: 区间字典列表（span、labels、ms、error），按结束顺序排列
+    """
+    return list(getattr(_local, 'spans', None) or [])
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = []
+    for name, value in labels:
+        value = value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+        escaped.append(f'{name}="{value}"')
+    return "{" + ",".join(escaped) + "}"
+
+
+def render_prometheus():
+    """
+    以Prometheus文本格式导出所有指标
+
+    返回:
+        str: 指标文本
+    """
+    with _lock:
+        counters = dict(_counters)
+        gauges = dict(_gauges)
+        histograms = {key: dict(value, counts=list(value['counts'])) for key, value in _histograms.items()}
+
+    lines = []
+    for kind, items in (('counter', counters), ('gauge', gauges)):
+        names = sorted({name for name, _ in items})
+        for name in names:
+            metric = METRIC_PREFIX + name + ("_total" if kind == 'counter' else "")
+            lines.append(f"# TYPE {metric} {kind}")
+            for (item_name, labels), value in sorted(items.items()):
+                if item_name == name:
+                    lines.append(f"{metric}{_format_labels(labels)} {value}")
+
+    for name in sorted({name for name, _ in histograms}):
+        metric = METRIC_PREFIX + name
+        lines.append(f"# TYPE {metric} histogram")
+        for (item_name, labels), histogram in sorted(histograms.items()):
+            if item_name != name:
+                continue
+            for bound, count in zip(histogram['buckets'], histogram['counts']):
+                lines.append(f"{metric}_bucket{_format_labels(labels + (('le', str(bound)),))} {count}")
+            lines.append(f"{metric}_bucket{_format_labels(labels + (('le', '+Inf'),))} {histogram['count']}")
+            lines.append(f"{metric}_sum{_format_labels(labels)} {histogram['sum']:.6f}")
+            lines.append(f"{metric}_count{_format_labels(labels)} {histogram['count']}")
+
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics_file(path=None):
+    """
+    将指标写入文件（先写临时文件再原子替换）
+
+    参数:
+        path (str): 文件路径，默认为 METRICS_FILE
+    """
+    path = path or METRICS_FILE
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(render_prometheus())
+    os.replace(tmp_path, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = render_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def _export_loop(path, interval):
+    while True:
+        time.sleep(interval)
+        try:
+            write_metrics_file(path)
+        except OSError as e:
+            logger.warning(f"写入指标文件失败: {e}")
+
+
+def start_metrics_exporters(port=METRICS_PORT, path=METRICS_FILE, host=METRICS_HOST):
+    """
+    启动指标导出（每个进程只启动一次）
+
+    参数:
+        port (int): /metrics 接口端口，0表示不启动
+        path (str): 指标文件路径，空字符串表示不写文件
+        host (str): /metrics 接口监听的地址
+    """
+    global _exporters_started
+    if not METRICS_ENABLED or _exporters_started:
+        return
+
+    with _exporters_lock:
+        if _exporters_started:
+            return
+        _exporters_started = True
+
+        if port:
+            try:
+                server = ThreadingHTTPServer((host, port), _MetricsHandler)
+                server.daemon_threads = True
+                threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+                logger.info(f"指标接口已启动: http://{host}:{port}/metrics")
+            except OSError as e:
+                # 多个工作进程时端口可能已被占用
+                logger.warning(f"指标接口启动失败: {e}")
+
+        if path:
+            threading.Thread(
+                target=_export_loop, args=(path, METRICS_EXPORT_INTERVAL), name="metrics-file-exporter", daemon=True
+            ).start()
+            logger.info(f"指标将每 {METRICS_EXPORT_INTERVAL} 秒写入 {path}")
@@ -1,44 +1,344 @@
 """
 新闻API相关工具函数
 """
-import os
-import requests
-from dotenv import load_dotenv
-import pandas as pd
+import json
+import time
+import random
+import hashlib
+import logging
+import threading
+from collections import deque
+from email.utils import parsedate_to_datetime
 from datetime import datetime, timedelta
+from config.settings import settings
+from utils.lazy_import import lazy_import
+from data.cache_db import SQLiteCache
+from data.db_utils import upsert_articles, search_articles, ARTICLE_ARCHIVE_DAYS
+from utils.query_planner import fetch_planned, plan_queries
+from utils.dedup import dedupe_articles, DEDUP_ENABLED
+from utils.ranking import rank_news
+from utils.articles import Article, ArticleList, MISSING_TIMESTAMP
+from utils import metrics
+from utils.single_flight import SingleFlight
+from utils.rate_limiter import get_rate_limiter, INTERACTIVE, BACKGROUND
+from utils.news_sources import NewsSource, ReplaySource, RecordingSource, SyntheticSource, NEWS_SOURCE
 
-# 加载环境变量
-load_dotenv()
+# requests 在首次请求时才导入
+requests = lazy_import("requests")
+
+logger = logging.getLogger('news_api')
 
 # 获取API密钥
-NEWS_API_KEY = os.getenv("NEWS_API_KEY")
-MAX_NEWS_ITEMS = int(os.getenv("MAX_NEWS_ITEMS", "40"))
-DEFAULT_LANGUAGE = os.getenv("DEFAULT_LANGUAGE", "zh")
+NEWS_API_KEY = settings.get("NEWS_API_KEY")
+MAX_NEWS_ITEMS = settings.get_int("MAX_NEWS_ITEMS", 40)
+TOP_DISPLAY_ITEMS = settings.get_int("TOP_DISPLAY_ITEMS", 8)
+DEFAULT_LANGUAGE = settings.get("DEFAULT_LANGUAGE", "zh")
+
+# NewsAPI接口地址（可指向兼容的镜像或本地测试服务）
+NEWS_API_URL = settings.get("NEWS_API_URL", "https://newsapi.org/v2/everything")
+
+# HTTP传输配置
+NEWS_API_CONNECT_TIMEOUT = settings.get_float("NEWS_API_CONNECT_TIMEOUT", 3.05)
+NEWS_API_READ_TIMEOUT = settings.get_float("NEWS_API_READ_TIMEOUT", 10)
+NEWS_API_MAX_RETRIES = settings.get_int("NEWS_API_MAX_RETRIES", 3)
+NEWS_API_BACKOFF_BASE = settings.get_float("NEWS_API_BACKOFF_BASE", 0.5)
+NEWS_API_BACKOFF_MAX = settings.get_float("NEWS_API_BACKOFF_MAX", 8)
+# Retry-After 超过该秒数时不再等待，直接失败
+NEWS_API_RETRY_AFTER_MAX = settings.get_float("NEWS_API_RETRY_AFTER_MAX", 30)
+NEWS_HTTP_POOL_SIZE = settings.get_int("NEWS_HTTP_POOL_SIZE", 10)
+
+# 需要重试的HTTP状态码
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# 新闻缓存配置（秒）
+NEWS_CACHE_TTL = settings.get_int("NEWS_CACHE_TTL", 600)
+NEWS_CACHE_STALE_TTL = settings.get_int("NEWS_CACHE_STALE_TTL", 1800)
+NEWS_CACHE_MAX_ENTRIES = settings.get_int("NEWS_CACHE_MAX_ENTRIES", 200)
+
+_news_cache = SQLiteCache(
+    'news',
+    ttl=NEWS_CACHE_TTL,
+    stale_ttl=NEWS_CACHE_STALE_TTL,
+    max_entries=NEWS_CACHE_MAX_ENTRIES
+)
+
+# 进程内共享的HTTP会话（连接池复用TCP/TLS连接）
+_http_session = None
+_http_session_lock = threading.Lock()
 
+# 传输层统计
+_transport_stats = {
+    'calls': 0,
+    'failures': 0,
+    'retries': 0,
+    'total_latency_ms': 0.0,
+}
+_recent_calls = deque(maxlen=100)
+_transport_stats_lock = threading.Lock()
 
-def fetch_news(tags, language=DEFAULT_LANGUAGE, max_items=MAX_NEWS_ITEMS):
+# 本地存档窗口（秒）：该时间内获取过的存档文章足够多时直接使用，不再请求NewsAPI，设为0禁用
+NEWS_ARCHIVE_WINDOW = settings.get_int("NEWS_ARCHIVE_WINDOW", 900)
+
+# 当前数据源（按 NEWS_SOURCE 懒加载）
+_news_source = None
+_news_source_lock = threading.Lock()
+
+# 正在后台刷新的缓存键，避免同一进程重复刷新
+_refreshing_keys = set()
+_refreshing_lock = threading.Lock()
+
+# 相同缓存键的并发请求只向数据源发起一次
+_news_flight = SingleFlight("news")
+
+
+def normalize_tags(tags):
     """
-    根据标签获取新闻
+    规范化标签集合（去空白、去重、忽略大小写和顺序）
+
+    参数:
+        tags (list): 标签列表
+
+    返回:
+        list: 排序后的规范化标签列表
+    """
+    return sorted({tag.strip().lower() for tag in tags if tag and tag.strip()})
+
+
+def build_cache_key(tags, language, date_from, date_to, page_size, source=None):
+    """
+    构建新闻缓存键
+
+    参数:
+        tags (list): 标签列表
+        language (str): 新闻语言
+        date_from (str): 开始日期
+        date_to (str): 结束日期
+        page_size (int): 每页条数
+        source (str): 数据源名称，不同数据源的结果分开缓存
+
+    返回:
+        str: 缓存键
+    """
+    raw = json.dumps({
+        'source': source,
+        'tags': normalize_tags(tags),
+        'language': language,
+        'from': date_from,
+        'to': date_to,
+        'page_size': page_size
+    }, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def get_http_session():
+    """
+    获取进程内共享的HTTP会话（保持长连接，线程间共享连接池）
+    
+    返回:
+        requests.Session: HTTP会话
+    """
+    global _http_session
+    if _http_session is None:
+        with _http_session_lock:
+            if _http_session is None:
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=NEWS_HTTP_POOL_SIZE, pool_maxsize=NEWS_HTTP_POOL_SIZE)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _http_session = session
+    return _http_session
+
+
+def _parse_retry_after(response):
+    """
+    解析 Retry-After 响应头（支持秒数和HTTP日期两种格式）
+    
+    参数:
+        response (requests.Response): HTTP响应
+    
+    返回:
+        float | None: 需要等待的秒数
+    """
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, retry_at.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _backoff_delay(attempt):
+    """
+    计算带抖动的指数退避时间（full jitter）
     
+    参数:
+        attempt (int): 已重试次数（从0开始）
+    
+    返回:
+        float: 等待秒数
+    """
+    return random.uniform(0, min(NEWS_API_BACKOFF_MAX, NEWS_API_BACKOFF_BASE * (2 ** attempt)))
+
+
+def _record_call(latency_ms, retries, status, ok):
+    """记录一次传输调用的统计数据"""
+    with _transport_stats_lock:
+        _transport_stats['calls'] += 1
+        _transport_stats['retries'] += retries
+        _transport_stats['total_latency_ms'] += latency_ms
+        if not ok:
+            _transport_stats['failures'] += 1
+        _recent_calls.append({
+            'latency_ms': round(latency_ms, 1),
+            'retries': retries,
+            'status': status,
+            'ok': ok,
+        })
+
+
+def _record_failure(started, retries, status):
+    """记录失败调用并输出日志"""
+    latency_ms = (time.perf_counter() - started) * 1000
+    _record_call(latency_ms, retries, status, False)
+    logger.error(
+        "newsapi_request_failed status=%s latency_ms=%.1f retries=%d",
+        status, latency_ms, retries
+    )
+
+
+def get_transport_stats():
+    """
+    获取NewsAPI传输层统计
+    
+    返回:
+        dict: 调用次数、失败次数、重试次数、平均延迟及最近调用明细
+    """
+    with _transport_stats_lock:
+        stats = dict(_transport_stats)
+        stats['recent_calls'] = list(_recent_calls)
+    stats['avg_latency_ms'] = stats['total_latency_ms'] / stats['calls'] if stats['calls'] else 0.0
+    return stats
+
+
+def request_with_retry(url, params):
+    """
+    通过共享会话发送GET请求，遇到连接错误、超时、429和5xx时按退避策略重试
+    
+    参数:
+        url (str): 请求地址
+        params (dict): 查询参数
+    
+    返回:
+        requests.Response: 成功的响应
+    """
+    session = get_http_session()
+    started = time.perf_counter()
+    retries = 0
+    status = None
+    
+    while True:
+        delay = None
+        try:
+            response = session.get(
+                url,
+                params=params,
+                timeout=(NEWS_API_CONNECT_TIMEOUT, NEWS_API_READ_TIMEOUT)
+            )
+            status = response.status_code
+            if status in RETRY_STATUS_CODES and retries < NEWS_API_MAX_RETRIES:
+                retry_after = _parse_retry_after(response)
+                if retry_after is not None and retry_after > NEWS_API_RETRY_AFTER_MAX:
+                    # 上游要求等待过久，不阻塞当前请求
+                    response.raise_for_status()
+                delay = retry_after if retry_after is not None else _backoff_delay(retries)
+            else:
+                response.raise_for_status()
+                latency_ms = (time.perf_counter() - started) * 1000
+                _record_call(latency_ms, retries, status, True)
+                logger.info(
+                    "newsapi_request status=%s latency_ms=%.1f retries=%d",
+                    status, latency_ms, retries
+                )
+                return response
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            if retries >= NEWS_API_MAX_RETRIES:
+                _record_failure(started, retries, status)
+                raise
+            logger.warning("newsapi_request_retry error=%s attempt=%d", type(e).__name__, retries + 1)
+            delay = _backoff_delay(retries)
+        except requests.exceptions.RequestException:
+            _record_failure(started, retries, status)
+            raise
+        
+        retries += 1
+        time.sleep(delay)
+
+
+def _date_range():
+    """
+    新闻检索的日期范围
+
+    返回:
+        tuple: (30天前的日期, 今天的日期)，格式为 YYYY-MM-DD
+    """
+    now = datetime.now()
+    return (now - timedelta(days=30)).strftime('%Y-%m-%d'), now.strftime('%Y-%m-%d')
+
+
+def is_news_cache_fresh(tags, language=DEFAULT_LANGUAGE, max_items=MAX_NEWS_ITEMS):
+    """
+    检查标签组合的新闻缓存是否仍在新鲜期内（不计入命中统计）
+
     参数:
         tags (list): 标签列表
         language (str): 新闻语言
         max_items (int): 最大新闻条数
-    
+
     返回:
-        pandas.DataFrame: 新闻数据框
+        bool: 缓存存在且未过期时返回True
+    """
+    month_ago, today = _date_range()
+    age = _news_cache.age(build_cache_key(tags, language, month_ago, today, max_items, get_news_source().name))
+    return age is not None and age <= _news_cache.ttl
+
+
+def get_news_cache_stats():
+    """
+    获取新闻缓存命中统计
+
+    返回:
+        dict: 命中、过期命中、未命中、淘汰次数及当前条目数
+    """
+    return _news_cache.stats()
+
+
+@metrics.timed()
+def fetch_news(tags, language=DEFAULT_LANGUAGE, max_items=MAX_NEWS_ITEMS, use_cache=True, refresh=False,
+               priority=INTERACTIVE):
     """
-    # 构建查询字符串
-    query = " OR ".join(tags)
+    根据标签获取新闻（优先读取缓存，数据源配额不足时返回缓存或本地存档中的新闻）
     
-    # 计算30天前的日期作为开始日期
-    month_ago = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
-    # 使用今天的日期作为结束日期
-    today = datetime.now().strftime('%Y-%m-%d')
+    参数:
+        tags (list): 标签列表
+        language (str): 新闻语言
+        max_items (int): 最大新闻条数
+        use_cache (bool): 是否使用缓存
+        refresh (bool): 是否跳过缓存读取，强制请求并更新缓存（用于后台预取）
+        priority (str): 请求优先级，INTERACTIVE 或 BACKGROUND（后台请求不能动用为交互请求保留的配额）
     
-    # NewsAPI请求参数
+    返回:
+        ArticleList: 按发布时间倒序的文章列表
+    """
+    month_ago, today = _date_range()
+    
+    # NewsAPI请求参数（查询字符串由查询规划器按标签拆分生成）
     params = {
-        'q': query,
         'apiKey': NEWS_API_KEY,
         'language': language,
         'from': month_ago,
@@ -47,55 +347,315 @@ def fetch_news(tags, language=DEFAULT_LANGUAGE, max_items=MAX_NEWS_ITEMS):
         'pageSize': max_items
     }
     
+    key = build_cache_key(tags, language, month_ago, today, max_items, get_news_source().name)
+    
     try:
-        # 发送请求前打印使用的API密钥（仅用于调试，生产环境应删除）
-        print(f"使用的API密钥: {NEWS_API_KEY[:5]}...{NEWS_API_KEY[-5:]}")
-        
-        # 发送请求
-        response = requests.get('https://newsapi.org/v2/everything', params=params)
-        response.raise_for_status()
-        
-        # 解析响应
-        data = response.json()
-        articles = data.get('articles', [])
+        if not use_cache or not _news_cache.enabled:
+            metrics.incr('news_cache_requests', result='bypass')
+            articles = _fetch_shared(key, tags, params, priority, cache=False)
+            if articles is None:
+                articles = _serve_throttled(key, tags, language, month_ago, max_items)
+            return _to_articles(articles)
         
-        if not articles:
-            return pd.DataFrame()
+        cached = None if refresh else _news_cache.get(key)
+        if cached is not None:
+            articles, is_stale = cached
+            metrics.incr('news_cache_requests', result='stale' if is_stale else 'hit')
+            if is_stale:
+                # 先返回旧数据，同时在后台刷新
+                _schedule_refresh(key, tags, params)
+            return _to_articles(articles)
         
-        # 创建数据框
-        df = pd.DataFrame(articles)
+        # 本地存档中近期获取的匹配文章足够时，直接使用存档
+        if not refresh:
+            archived = search_archived_news(tags, language, month_ago, max_items)
+            if len(archived) >= max_items:
+                logger.info(f"使用本地存档返回{len(archived)}条新闻")
+                metrics.incr('news_cache_requests', result='archive')
+                _news_cache.set(key, archived)
+                return _to_articles(archived)
         
-        # 处理日期
-        df['publishedAt'] = pd.to_datetime(df['publishedAt'])
-        df = df.sort_values('publishedAt', ascending=False)
-        
-        # 提取需要的字段
-        if 'source' in df.columns:
-            df['source'] = df['source'].apply(lambda x: x.get('name', '') if isinstance(x, dict) else '')
-        
-        return df
+        metrics.incr('news_cache_requests', result='miss')
+        articles = _fetch_shared(key, tags, params, priority)
+        if articles is None:
+            articles = _serve_throttled(key, tags, language, month_ago, max_items, check_cache=refresh)
+        return _to_articles(articles)
     
     except Exception as e:
-        print(f"获取新闻时出错: {e}")
+        logger.error(f"获取新闻时出错: {e}")
         # 添加更详细的错误信息
-        if isinstance(e, requests.exceptions.HTTPError):
-            print(f"HTTP状态码: {e.response.status_code}")
-            print(f"响应内容: {e.response.text}")
-        return pd.DataFrame()
+        if isinstance(e, requests.exceptions.HTTPError) and e.response is not None:
+            logger.error(f"HTTP状态码: {e.response.status_code}")
+            logger.error(f"响应内容: {e.response.text}")
+        return ArticleList()
+
+
+def _fetch_shared(key, tags, params, priority=INTERACTIVE, cache=True):
+    """
+    获取文章并写入缓存，相同缓存键的并发调用合并为一次请求
+    
+    每个调用方拿到的是共享的原始文章字典列表（只读），各自转换为自己的 Article 对象。
+    请求前按查询计划的子查询数从数据源配额中取令牌，取不到时不发出请求。
+    交互请求合并到的后台请求因配额被拒绝时，以交互优先级重新请求（交互请求可以动用保留配额）。
+    
+    参数:
+        key (str): 缓存键
+        tags (list): 标签列表
+        params (dict): 不含 q 的NewsAPI请求参数
+        priority (str): 请求优先级
+        cache (bool): 是否将结果写入缓存
+    
+    返回:
+        list | None: 原始文章列表，配额不足时返回None
+    """
+    def fetch():
+        quota_name = get_news_source().quota_name
+        if quota_name and not get_rate_limiter(quota_name).acquire(len(plan_queries(tags)) or 1, priority):
+            return None, priority
+        articles = _fetch_articles(tags, params)
+        if cache and articles and _news_cache.enabled:
+            _news_cache.set(key, articles)
+        return articles, priority
+    
+    (articles, leader_priority), shared = _news_flight.do(key, fetch)
+    if articles is None and shared and leader_priority != priority and priority == INTERACTIVE:
+        (articles, _), _ = _news_flight.do(key, fetch)
+    return articles
+
+
+def _serve_throttled(key, tags, language, published_since, max_items, check_cache=True):
+    """
+    数据源配额不足时的降级结果：优先使用缓存（包括过期缓存），否则使用本地存档中的全部匹配新闻
+    
+    参数:
+        key (str): 缓存键
+        tags (list): 标签列表
+        language (str): 新闻语言
+        published_since (str): 最早发布日期
+        max_items (int): 最大新闻条数
+        check_cache (bool): 是否先读取缓存（调用方已确认未命中时跳过）
+    
+    返回:
+        list: 原始文章列表
+    """
+    metrics.incr('news_cache_requests', result='throttled')
+    cached = _news_cache.get(key) if check_cache else None
+    if cached is not None:
+        logger.warning("数据源配额不足，返回缓存的新闻")
+        return cached[0]
+    
+    archived = search_archived_news(tags, language, published_since, max_items, window=ARTICLE_ARCHIVE_DAYS * 86400)
+    logger.warning(f"数据源配额不足，使用本地存档返回{len(archived)}条新闻")
+    return archived
+
+
+def _fetch_articles(tags, params):
+    """
+    按查询计划获取文章，标签过多时拆分为并行子查询并归并
+    
+    参数:
+        tags (list): 标签列表
+        params (dict): 不含 q 的NewsAPI请求参数
+    
+    返回:
+        list: 按发布时间倒序、按URL去重的原始文章列表
+    """
+    articles = fetch_planned(tags, params, _request_articles)
+    # 写入本地存档及全文索引（记录数据源，存档只返回同一数据源的文章）
+    upsert_articles(articles, params.get('language'), get_news_source().name)
+    return articles
+
+
+def search_archived_news(tags, language=DEFAULT_LANGUAGE, published_since=None, max_items=MAX_NEWS_ITEMS,
+                         window=NEWS_ARCHIVE_WINDOW):
+    """
+    在本地存档中搜索当前数据源近期获取过的匹配新闻
+    
+    参数:
+        tags (list): 标签列表
+        language (str): 新闻语言
+        published_since (str): 最早发布日期
+        max_items (int): 最大新闻条数
+        window (int): 存档窗口（秒），只使用该时间内获取过的文章，<=0 表示禁用
+    
+    返回:
+        list: NewsAPI格式的文章字典列表
+    """
+    if window <= 0:
+        return []
+    return search_articles(
+        tags,
+        language=language,
+        published_since=published_since,
+        fetched_since=time.time() - window,
+        limit=max_items,
+        backend=get_news_source().name
+    )
+
+
+class NewsAPISource(NewsSource):
+    """
+    NewsAPI数据源（共享连接池，带超时与重试）
+    """
+
+    name = "newsapi"
+    quota_name = "newsapi"
+
+    def __init__(self, url=NEWS_API_URL):
+        """
+        参数:
+            url (str): NewsAPI接口地址
+        """
+        self.url = url
+
+    def search(self, params):
+        if not params.get('apiKey'):
+            logger.warning("newsapi_request api_key_configured=False")
 
+        # 发送请求（共享连接池，带超时与重试）
+        try:
+            response = request_with_retry(self.url, params)
+        except requests.exceptions.HTTPError as e:
+            # 已达到上游限额，按 Retry-After 暂停所有进程对该上游的请求
+            if e.response is not None and e.response.status_code == 429:
+                get_rate_limiter(self.quota_name).block(_parse_retry_after(e.response))
+            raise
 
-def get_top_news(news_df, top_n=8):
+        # 解析响应
+        data = response.json()
+        return data.get('articles', [])
+
+
+def create_news_source(name=NEWS_SOURCE):
+    """
+    按名称创建数据源
+
+    参数:
+        name (str): newsapi、replay、record 或 synthetic
+
+    返回:
+        NewsSource: 数据源实例
+    """
+    if name == "replay":
+        return ReplaySource()
+    if name == "record":
+        return RecordingSource(NewsAPISource())
+    if name == "synthetic":
+        return SyntheticSource()
+    if name != "newsapi":
+        logger.warning(f"未知的新闻数据源 {name}，使用NewsAPI")
+    return NewsAPISource()
+
+
+def get_news_source():
+    """
+    获取当前进程使用的数据源
+
+    返回:
+        NewsSource: 数据源实例
+    """
+    global _news_source
+    if _news_source is None:
+        with _news_source_lock:
+            if _news_source is None:
+                _news_source = create_news_source()
+                logger.info(f"新闻数据源: {_news_source.name}")
+    return _news_source
+
+
+def set_news_source(source):
+    """
+    替换当前进程使用的数据源（用于基准测试和离线运行）
+
+    参数:
+        source (NewsSource): 数据源实例，None表示恢复为 NEWS_SOURCE 配置的数据源
+    """
+    global _news_source
+    with _news_source_lock:
+        _news_source = source
+
+
+@metrics.timed("news_source_request")
+def _request_articles(params):
+    """
+    从当前数据源获取原始文章列表
+
+    参数:
+        params (dict): NewsAPI请求参数
+
+    返回:
+        list: 原始文章字典列表
+    """
+    return get_news_source().search(params)
+
+
+def _to_articles(articles):
+    """
+    将原始文章列表转换为 Article 并合并近似重复，按发布时间倒序排列
+    
+    参数:
+        articles (list): 原始文章字典列表
+    
+    返回:
+        ArticleList: 文章列表，duplicates_removed 为合并的重复新闻数
+    """
+    result = ArticleList(Article.from_dict(item) for item in articles)
+    
+    # 合并同一通稿的多个转载
+    if DEDUP_ENABLED and len(result) > 1:
+        deduped, result.duplicates_removed = dedupe_articles(result)
+        result[:] = deduped
+    
+    # 按发布时间倒序，没有发布时间的排在最后
+    result.sort(key=lambda article: article.published if article.published is not None else MISSING_TIMESTAMP,
+                reverse=True)
+    return result
+
+
+def _schedule_refresh(key, tags, params):
     """
-    获取前N条新闻
+    在后台线程中刷新过期的缓存条目（后台优先级，配额不足时保留旧数据）
     
     参数:
-        news_df (pandas.DataFrame): 新闻数据框
+        key (str): 缓存键
+        tags (list): 标签列表
+        params (dict): 不含 q 的NewsAPI请求参数
+    """
+    with _refreshing_lock:
+        if key in _refreshing_keys:
+            return
+        _refreshing_keys.add(key)
+    
+    def refresh():
+        try:
+            _fetch_shared(key, tags, params, BACKGROUND)
+        except Exception as e:
+            logger.warning(f"后台刷新新闻缓存失败: {e}")
+        finally:
+            with _refreshing_lock:
+                _refreshing_keys.discard(key)
+    
+    threading.Thread(target=refresh, name="news-cache-refresh", daemon=True).start()
+
+
+@metrics.timed()
+def get_top_news(news, top_n=TOP_DISPLAY_ITEMS, tags=None, tag_weights=None):
+    """
+    获取前N条新闻（提供标签时按标签权重、时间衰减和来源多样性排序，否则按发布时间）
+    
+    参数:
+        news (list): 按发布时间倒序的 Article 列表
         top_n (int): 返回的新闻条数
+        tags (list): 用户选择的标签
+        tag_weights (dict): 标签权重（1-5）
     
     返回:
-        pandas.DataFrame: 前N条新闻
+        list: 前N条新闻
     """
-    if news_df.empty:
-        return news_df
+    if not news:
+        return []
+    
+    if tags:
+        return rank_news(news, tags, tag_weights, top_n=top_n)
     
-    return news_df.head(top_n) 
\ No newline at end of file
+    return list(news[:top_n])
@@ -0,0 +1,341 @@
+"""
+新闻数据源
+
+所有数据源接收与NewsAPI相同的请求参数（q、language、from、to、pageSize），
+返回NewsAPI格式的文章字典列表，下游的缓存、存档、去重和排序无需关心数据来自哪里。
+
+- ReplaySource: 从JSONL录制文件或本地文章目录回放，无需网络和API密钥
+- RecordingSource: 包装另一个数据源，把每次请求的结果追加写入录制文件
+- SyntheticSource: 按标签确定性地生成任意数量的文章，用于规模测试
+
+NewsAPI数据源依赖共享的HTTP会话和重试逻辑，定义在 utils.news_api 中。
+"""
+import os
+import json
+import random
+import hashlib
+import logging
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from config.settings import settings
+
+logger = logging.getLogger('news_sources')
+
+# 数据源类型：newsapi、replay、record、synthetic
+NEWS_SOURCE = settings.get("NEWS_SOURCE", "newsapi").lower()
+# 录制文件（.jsonl）或本地文章目录
+NEWS_REPLAY_PATH = settings.get(
+    "NEWS_REPLAY_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'cassettes', 'news.jsonl')
+)
+# 合成数据源的随机种子
+NEWS_SYNTHETIC_SEED = settings.get_int("NEWS_SYNTHETIC_SEED", 42)
+
+QUERY_SEPARATOR = " OR "
+
+# 录制请求时参与匹配的参数（日期每天变化，不参与匹配）
+RECORD_MATCH_PARAMS = ('q', 'language', 'pageSize')
+
+
+def _query_terms(params):
+    """从请求参数中解析查询词"""
+    return [term.strip() for term in (params.get('q') or '').split(QUERY_SEPARATOR) if term.strip()]
+
+
+def _record_key(params):
+    """录制请求的匹配键"""
+    return json.dumps({name: params.get(name) for name in RECORD_MATCH_PARAMS}, ensure_ascii=False, sort_keys=True)
+
+
+def _page_size(params, default=100):
+    try:
+        return int(params.get('pageSize') or default)
+    except (TypeError, ValueError):
+        return default
+
+
+class NewsSource(ABC):
+    """
+    新闻数据源接口
+    """
+
+    name = "base"
+    # 需要限流的上游名称（见 utils.rate_limiter），None表示不消耗外部配额
+    quota_name = None
+
+    @abstractmethod
+    def search(self, params):
+        """
+        按NewsAPI请求参数检索文章
+
+        参数:
+            params (dict): NewsAPI请求参数
+
+        返回:
+            list: 按发布时间倒序的NewsAPI格式文章字典列表
+        """
+
+
+class ReplaySource(NewsSource):
+    """
+    从本地文件回放文章
+
+    path 可以是JSONL录制文件或目录（目录下的 .jsonl 和 .json 文件都会被读取）。每行/每个文件可以是：
+    - RecordingSource 写入的录制记录 {"params": {...}, "articles": [...]}
+    - NewsAPI响应 {"articles": [...]}
+    - 文章列表，或单篇文章字典
+
+    请求与某条录制记录的 q、language、pageSize 相同时原样返回该记录，
+    否则在所有文章中按查询词、语言和日期范围过滤。
+    """
+
+    name = "replay"
+
+    def __init__(self, path=NEWS_REPLAY_PATH):
+        """
+        参数:
+            path (str): 录制文件或目录路径
+        """
+        self.path = path
+        self._recordings = None
+        self._articles = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._articles is not None:
+                return
+
+            recordings = {}
+            articles = {}
+
+            def add_articles(items, language=None):
+                for item in items:
+                    if isinstance(item, dict) and item.get('url'):
+                        if language and not item.get('language'):
+                            item = dict(item, language=language)
+                        articles[item['url']] = item
+
+            def add_record(record):
+                if isinstance(record, list):
+                    add_articles(record)
+                elif isinstance(record, dict) and 'articles' in record:
+                    params = record.get('params') or {}
+                    if params:
+                        recordings[_record_key(params)] = record['articles']
+                    add_articles(record['articles'], params.get('language'))
+                elif isinstance(record, dict):
+                    add_articles([record])
+
+            if os.path.isdir(self.path):
+                files = sorted(
+                    os.path.join(self.path, name) for name in os.listdir(self.path)
+                    if name.endswith(('.jsonl', '.json'))
+                )
+            elif os.path.exists(self.path):
+                files = [self.path]
+            else:
+                logger.warning(f"回放数据不存在: {self.path}")
+                files = []
+
+            for file_path in files:
+                with open(file_path, encoding='utf-8') as f:
+                    if file_path.endswith('.jsonl'):
+                        for line_number, line in enumerate(f, 1):
+                            line = line.strip()
+                            if not line:
+                                continue
+                            try:
+                                add_record(json.loads(line))
+                            except json.JSONDecodeError as e:
+                                logger.warning(f"跳过无效的回放记录 {file_path}:{line_number}: {e}")
+                    else:
+                        add_record(json.load(f))
+
+            self._recordings = recordings
+            self._articles = sorted(articles.values(), key=lambda item: item.get('publishedAt') or '', reverse=True)
+            logger.info(f"已加载回放数据: {len(self._articles)}篇文章, {len(recordings)}条录制请求")
+
+    def search(self, params):
+        self._load()
+
+        recorded = self._recordings.get(_record_key(params))
+        if recorded is not None:
+            return list(recorded)
+
+        terms = [term.lower() for term in _query_terms(params)]
+        language = params.get('language')
+        date_from = params.get('from') or ''
+        # 结束日期包含当天
+        date_to = (params.get('to') or '') + '\uffff'
+        limit = _page_size(params)
+
+        result = []
+        for item in self._articles:
+            published_at = item.get('publishedAt') or ''
+            if published_at < date_from or published_at > date_to:
+                continue
+            if language and item.get('language') not in (None, language):
+                continue
+            if terms:
+                text = f"{item.get('title') or ''} {item.get('description') or ''} {item.get('content') or ''}".lower()
+                if not any(term in text for term in terms):
+                    continue
+            result.append(item)
+            if len(result) >= limit:
+                break
+        return result
+
+
+class RecordingSource(NewsSource):
+    """
+    包装另一个数据源，将每次请求的参数（不含API密钥）和结果追加写入JSONL录制文件
+    """
+
+    name = "record"
+
+    def __init__(self, upstream, path=NEWS_REPLAY_PATH):
+        """
+        参数:
+            upstream (NewsSource): 实际请求的数据源
+            path (str): 录制文件路径
+        """
+        self.upstream = upstream
+        self.path = path
+        self._lock = threading.Lock()
+
+    @property
+    def quota_name(self):
+        return self.upstream.quota_name
+
+    def search(self, params):
+        articles = self.upstream.search(params)
+        record = {
+            'params': {name: value for name, value in params.items() if name != 'apiKey'},
+            'recorded_at': datetime.now(timezone.utc).isoformat(),
+            'articles': articles,
+        }
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+        return articles
+
+
+# 合成文章使用的来源和文案片段
+SYNTHETIC_SOURCES = [
+    "新华网", "人民网", "澎湃新闻", "36氪", "虎嗅", "财新网", "界面新闻", "第一财经",
+    "Reuters", "Bloomberg", "TechCrunch", "The Verge", "Wired", "BBC", "CNN", "The Guardian",
+]
+SYNTHETIC_ORGS = [
+    "清华大学", "中科院", "华为", "阿里巴巴", "腾讯", "字节跳动", "百度", "宁德时代", "比亚迪", "小米",
+    "OpenAI", "Google", "Microsoft", "Apple", "NVIDIA", "Meta", "Amazon", "Tesla", "MIT", "Stanford",
+]
+SYNTHETIC_CITIES = [
+    "北京", "上海", "深圳", "杭州", "广州", "成都", "武汉", "南京", "苏州", "西安",
+    "伦敦", "纽约", "旧金山", "东京", "新加坡",
+]
+SYNTHETIC_TEMPLATES = [
+    "{org}在{city}发布{tag}新成果，{n}家合作伙伴参与",
+    "{tag}市场观察：{org}第{n}季度业绩超出预期",
+    "深度解读{tag}：{org}专家谈未来{n}年发展趋势",
+    "{city}{tag}产业园落地，{org}宣布投入{n}亿元",
+    "{org}{tag}研究取得突破，论文引用量突破{n}千次",
+]
+SYNTHETIC_SENTENCES = [
+    "业内人士认为，{org}此举将深刻影响{tag}相关产业链的格局。",
+    "报告显示，{city}的{tag}应用正在从试点走向规模化落地，目前已覆盖{m}个场景。",
+    "多位受访者表示，{tag}的监管框架有待完善，{city}已启动第{m}批标准化试点。",
+    "{org}相关负责人透露，新项目预计将在{m}个月内完成首期建设。",
+    "分析师指出，{tag}赛道今年融资额同比增长{m}%，头部效应明显。",
+    "{city}市政府表示，将为{tag}企业提供最高{m}00万元的专项补贴。",
+]
+
+
+class SyntheticSource(NewsSource):
+    """
+    确定性的合成数据源：相同参数总是生成相同的文章，用于离线演示和规模测试
+
+    约 dup_ratio 比例的文章是前一篇文章被其他来源转载的副本，用于覆盖去重逻辑。
+    """
+
+    name = "synthetic"
+
+    def __init__(self, seed=NEWS_SYNTHETIC_SEED, dup_ratio=0.1):
+        """
+        参数:
+            seed (int): 随机种子
+            dup_ratio (float): 转载副本的比例
+        """
+        self.seed = seed
+        self.dup_ratio = dup_ratio
+
+    def search(self, params):
+        terms = _query_terms(params) or ["新闻"]
+        try:
+            date_to = datetime.strptime(params.get('to') or '', '%Y-%m-%d').replace(tzinfo=timezone.utc) + timedelta(days=1)
+        except ValueError:
+            date_to = datetime.now(timezone.utc)
+        date_to = min(date_to, datetime.now(timezone.utc))
+        return generate_articles(_page_size(params), terms, seed=self.seed, end=date_to,
+                                 language=params.get('language'), dup_ratio=self.dup_ratio)
+
+
+def generate_articles(count, tags, seed=NEWS_SYNTHETIC_SEED, end=None, language=None, dup_ratio=0.1):
+    """
+    生成NewsAPI格式的合成文章
+
+    参数:
+        count (int): 文章数
+        tags (list): 文章涉及的标签（按顺序轮流使用）
+        seed (int): 随机种子
+        end (datetime): 最新文章的发布时间上限，默认为当前时间
+        language (str): 文章语言
+        dup_ratio (float): 转载副本的比例
+
+    返回:
+        list: 按发布时间倒序的文章字典列表
+    """
+    tags = list(tags) or ["新闻"]
+    digest = hashlib.sha256(json.dumps([seed, tags, language], ensure_ascii=False).encode('utf-8')).hexdigest()
+    rng = random.Random(int(digest[:16], 16))
+    end = end or datetime.now(timezone.utc)
+
+    articles = []
+    published = end
+    for i in range(count):
+        # 发布时间间隔为0-30分钟
+        published -= timedelta(seconds=rng.randint(0, 1800))
+        timestamp = published.strftime('%Y-%m-%dT%H:%M:%SZ')
+        source = rng.choice(SYNTHETIC_SOURCES)
+
+        if articles and rng.random() < dup_ratio:
+            # 其他来源转载上一篇文章
+            original = articles[-1]
+            article = dict(original, source={'id': None, 'name': source}, publishedAt=timestamp)
+        else:
+            fields = {
+                'tag': tags[i % len(tags)],
+                'org': rng.choice(SYNTHETIC_ORGS),
+                'city': rng.choice(SYNTHETIC_CITIES),
+                'n': rng.randint(2, 99),
+            }
+            sentences = rng.sample(SYNTHETIC_SENTENCES, 2)
+            article = {
+                'source': {'id': None, 'name': source},
+                'author': None,
+                'title': rng.choice(SYNTHETIC_TEMPLATES).format(**fields),
+                'description': "".join(
+                    sentence.format(m=rng.randint(3, 99), **fields) for sentence in sentences
+                ),
+                'urlToImage': None,
+                'content': None,
+            }
+            article = dict(article, publishedAt=timestamp)
+
+        article['url'] = f"https://synthetic.example.com/{digest[:8]}/{i}"
+        articles.append(article)
+
+    return articles
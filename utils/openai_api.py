@@ -1,21 +1,67 @@
 """
 AI模型API相关工具函数（支持OpenAI和DeepSeek等兼容OpenAI协议的模型）
 """
-import os
-import openai
-from dotenv import load_dotenv
+import re
+import time
+import threading
+import weakref
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from config.settings import settings
+from utils.lazy_import import lazy_import
+from utils.hedged_stream import HedgedStream
+from utils import metrics
+from utils.single_flight import SingleFlight
+from utils.rate_limiter import get_rate_limiter, RateLimitExceeded, INTERACTIVE
+from utils.prompt_builder import build_news_context, estimate_tokens, fit_entries
+from utils.summary_store import (
+    SummaryStream, build_summary_key, get_cached_summary,
+    build_article_note_key, get_article_note, set_article_note,
+    SUMMARY_PROMPT_VERSION, REDUCE_PROMPT_VERSION
+)
+
+# openai 和 httpx 在首次创建客户端时才导入
+openai = lazy_import("openai")
+httpx = lazy_import("httpx")
 
-# 配置日志
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger('openai_api')
 
-# 加载环境变量
-load_dotenv()
+# 正在生成的摘要流（按缓存键），相同输入的新请求直接订阅，不再调用模型
+_live_summaries = weakref.WeakValueDictionary()
+_live_summaries_lock = threading.Lock()
+# 同一缓存键同时发起的摘要请求只创建一次上游流
+_summary_flight = SingleFlight("summary")
 
 # 获取API密钥和默认模型
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-DEFAULT_MODEL = os.getenv("DEFAULT_MODEL", "gpt-3.5-turbo")
+OPENAI_API_KEY = settings.get("OPENAI_API_KEY")
+DEFAULT_MODEL = settings.get("DEFAULT_MODEL", "gpt-3.5-turbo")
+
+# LLM客户端连接池配置
+LLM_POOL_MAX_CONNECTIONS = settings.get_int("LLM_POOL_MAX_CONNECTIONS", 20)
+LLM_POOL_MAX_KEEPALIVE = settings.get_int("LLM_POOL_MAX_KEEPALIVE", 10)
+LLM_KEEPALIVE_EXPIRY = settings.get_float("LLM_KEEPALIVE_EXPIRY", 120)
+LLM_CONNECT_TIMEOUT = settings.get_float("LLM_CONNECT_TIMEOUT", 5)
+LLM_READ_TIMEOUT = settings.get_float("LLM_READ_TIMEOUT", 60)
+
+# 摘要模式：full 为一次性整体摘要，incremental 为逐篇要点缓存后再汇总
+SUMMARY_MODE = settings.get("SUMMARY_MODE", "full")
+# 增量模式下每批提炼要点的文章数及并行批次数
+SUMMARY_MAP_BATCH_SIZE = settings.get_int("SUMMARY_MAP_BATCH_SIZE", 5)
+SUMMARY_MAP_WORKERS = settings.get_int("SUMMARY_MAP_WORKERS", 3)
+
+SYSTEM_PROMPT = "你是一位专业的新闻分析师和内容策展人。你的工作是整理和总结新闻内容，提取重点信息。"
+
+# 摘要输出格式（整体模式与增量汇总共用）
+SUMMARY_FORMAT = """请按以下格式组织你的回复：
+
+## 今日要点
+（列出3-5个最重要的新闻要点）
+
+## 主题聚焦
+（按主题将新闻分组，突出最重要的发展动态）
+
+## 深度分析
+（针对最重要的1-2个话题做简短分析）"""
 
 # 模型提供商配置
 MODEL_PROVIDERS = {
@@ -32,6 +78,30 @@ MODEL_PROVIDERS = {
     # 在此添加其他兼容OpenAI协议的模型提供商
 }
 
+# 对冲请求设置：首选模型超过 SUMMARY_HEDGE_DELAY 秒无首个token时，并行请求另一提供商的模型
+SUMMARY_HEDGE = settings.get_bool("SUMMARY_HEDGE", False)
+SUMMARY_HEDGE_DELAY = settings.get_float("SUMMARY_HEDGE_DELAY", 2.0)
+HEDGE_MODELS = {
+    "deepseek-chat": "gpt-3.5-turbo",
+    "deepseek-coder": "gpt-3.5-turbo",
+    "deepseek-reasoner": "gpt-4-turbo",
+    "gpt-3.5-turbo": "deepseek-chat",
+    "gpt-4": "deepseek-chat",
+    "gpt-4-turbo": "deepseek-chat",
+}
+
+# 各模型新闻上下文的token预算（控制首个token的等待时间和调用成本）
+MODEL_TOKEN_BUDGETS = {
+    "gpt-3.5-turbo": 3000,
+    "gpt-4": 3000,
+    "gpt-4-turbo": 6000,
+    "deepseek-chat": 6000,
+    "deepseek-coder": 6000,
+    "deepseek-reasoner": 4000,
+}
+# 未在上表中配置的模型使用的默认预算
+DEFAULT_TOKEN_BUDGET = settings.get_int("DEFAULT_TOKEN_BUDGET", 3000)
+
 # 备用模型设置（当首选模型失败时）
 FALLBACK_MODELS = {
     "deepseek-chat": "gpt-3.5-turbo",
@@ -39,6 +109,10 @@ FALLBACK_MODELS = {
     "deepseek-reasoner": "gpt-3.5-turbo"
 }
 
+# 进程内共享的客户端，键为 (provider, base_url, api_key)
+_clients = {}
+_clients_lock = threading.Lock()
+
 def get_model_provider(model_name):
     """
     根据模型名称确定提供商
@@ -57,9 +131,24 @@ def get_model_provider(model_name):
     # 默认返回OpenAI
     return "openai", MODEL_PROVIDERS["openai"]
 
+def get_token_budget(model_name):
+    """
+    获取模型的新闻上下文token预算
+    
+    参数:
+        model_name (str): 模型名称
+    
+    返回:
+        int: token预算
+    """
+    return MODEL_TOKEN_BUDGETS.get(model_name, DEFAULT_TOKEN_BUDGET)
+
 def create_client(model_name=DEFAULT_MODEL):
     """
-    创建与模型提供商匹配的API客户端
+    获取与模型提供商匹配的API客户端
+    
+    同一提供商、地址和密钥的客户端在进程内只创建一次，各会话线程共享其连接池，
+    避免每次请求重新建立TCP/TLS连接。
     
     参数:
         model_name (str): 模型名称
@@ -70,66 +159,434 @@ def create_client(model_name=DEFAULT_MODEL):
     provider, config = get_model_provider(model_name)
     
     # 获取API密钥
-    api_key = os.getenv(config["api_key_env"])
+    api_key = settings.get(config["api_key_env"])
     if not api_key:
         raise ValueError(f"缺少{config['api_key_env']}环境变量")
     
-    # 创建客户端
-    client = openai.OpenAI(
-        api_key=api_key,
-        base_url=config["base_url"]
-    )
+    key = (provider, config["base_url"], api_key)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+    
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            # 创建客户端（httpx.Client 线程安全，可在会话间共享）
+            http_client = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=LLM_POOL_MAX_CONNECTIONS,
+                    max_keepalive_connections=LLM_POOL_MAX_KEEPALIVE,
+                    keepalive_expiry=LLM_KEEPALIVE_EXPIRY
+                ),
+                timeout=httpx.Timeout(LLM_READ_TIMEOUT, connect=LLM_CONNECT_TIMEOUT)
+            )
+            # 重试和切换备用模型由 generate_news_summary 负责，SDK 不再自行重试，
+            # 否则一次连接失败会叠加成多倍的请求，并推迟对冲请求的结束
+            client = openai.OpenAI(
+                api_key=api_key,
+                base_url=config["base_url"],
+                http_client=http_client,
+                max_retries=0
+            )
+            _clients[key] = client
+            logger.info(f"已创建{provider}客户端连接池")
     
     return client
 
-def generate_news_summary(news_data, tags, model=DEFAULT_MODEL, max_retries=1):
+def close_clients():
     """
-    使用AI模型生成新闻摘要（支持OpenAI、DeepSeek等兼容OpenAI协议的模型）
+    关闭并清空所有共享客户端（用于进程退出或密钥变更）
+    """
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+
+def summarize_articles(news_data, model=DEFAULT_MODEL, priority=INTERACTIVE):
+    """
+    为每篇文章提炼一句话要点（已缓存的文章不再调用模型）
     
     参数:
-        news_data (list): 新闻数据列表
-        tags (list): 用户选择的标签
+        news_data (list): Article 列表
         model (str): 使用的模型名称
-        max_retries (int): 最大重试次数
+        priority (str): 请求优先级（见 utils.rate_limiter）
     
     返回:
-        generator: 流式返回生成的文本
+        list: 与 news_data 一一对应的要点列表
+    """
+    keys = [build_article_note_key(item, model) for item in news_data]
+    notes = [get_article_note(key) for key in keys]
+    
+    pending = [idx for idx, note in enumerate(notes) if not note]
+    if not pending:
+        return notes
+    
+    logger.info(f"增量摘要: {len(news_data) - len(pending)}篇命中缓存，{len(pending)}篇需要提炼要点")
+    
+    batches = [pending[i:i + SUMMARY_MAP_BATCH_SIZE] for i in range(0, len(pending), SUMMARY_MAP_BATCH_SIZE)]
+    # 每批一次模型请求，配额不足时抛出 RateLimitExceeded
+    get_rate_limiter(f"llm:{get_model_provider(model)[0]}").check(len(batches), priority)
+    client = create_client(model)
+    
+    with ThreadPoolExecutor(max_workers=max(1, min(SUMMARY_MAP_WORKERS, len(batches)))) as executor:
+        results = executor.map(
+            lambda batch: _summarize_batch(client, model, [news_data[idx] for idx in batch]),
+            batches
+        )
+        for batch, batch_notes in zip(batches, results):
+            for idx, note in zip(batch, batch_notes):
+                if note:
+                    set_article_note(keys[idx], note)
+                else:
+                    # 模型遗漏的条目退回使用标题，且不写入缓存
+                    note = news_data[idx].title
+                notes[idx] = note
+    
+    return notes
+
+
+def _summarize_batch(client, model, items):
+    """
+    调用模型为一批文章提炼要点
+    
+    参数:
+        client (OpenAI): API客户端
+        model (str): 模型名称
+        items (list): Article 列表
+    
+    返回:
+        list: 与 items 一一对应的要点列表，模型遗漏的条目为None
     """
-    # 准备新闻数据
     news_texts = []
-    for idx, item in enumerate(news_data):
-        title = item.get('title', '')
-        description = item.get('description', '')
-        source = item.get('source', '')
-        url = item.get('url', '')
-        
-        news_text = f"{idx+1}. {title}\n来源: {source}\n描述: {description}\n链接: {url}\n"
-        news_texts.append(news_text)
+    for idx, item in enumerate(items):
+        news_texts.append(
+            f"[{idx+1}] {item.title}\n来源: {item.source}\n描述: {item.description}"
+        )
     
-    news_context = "\n".join(news_texts)
+    prompt = f"""
+请为以下{len(items)}条新闻各写一句不超过60字的中文要点，保留关键事实（主体、事件、数字）。
+每条要点单独一行，以对应编号开头，格式为：[编号] 要点
+
+{chr(10).join(news_texts)}
+"""
+    
+    response = client.chat.completions.create(
+        model=model,
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.3,
+    )
+    content = response.choices[0].message.content or ''
+    
+    parsed = {}
+    for line in content.splitlines():
+        match = re.match(r'^\s*\[(\d+)\]\s*(.+)$', line)
+        if match:
+            parsed[int(match.group(1))] = match.group(2).strip()
+    
+    return [parsed.get(idx + 1) for idx in range(len(items))]
+
+
+def _build_full_prompt(news_data, tags, model):
+    """
+    构建整体摘要提示词（在模型token预算内包含文章的标题、描述、来源和链接）
+    
+    参数:
+        news_data (list): 按重要性排序的 Article 列表
+        tags (list): 用户选择的标签
+        model (str): 模型名称
+    
+    返回:
+        tuple: (提示词, 预算信息字典)
+    """
+    news_context, info = build_news_context(news_data, get_token_budget(model))
     
     # 构建提示词
     prompt = f"""
-你是一位专业的新闻分析师和内容策展人。根据以下{len(news_data)}条与"{', '.join(tags)}"相关的新闻，
+你是一位专业的新闻分析师和内容策展人。根据以下{info['articles']}条与"{', '.join(tags)}"相关的新闻，
 请对这些新闻进行分类整理并生成一份简洁的摘要报告。
 
-请按以下格式组织你的回复：
+{SUMMARY_FORMAT}
 
-## 今日要点
-（列出3-5个最重要的新闻要点）
+新闻数据：
+{news_context}
 
-## 主题聚焦
-（按主题将新闻分组，突出最重要的发展动态）
+请用中文回复，确保内容准确、客观、简洁。
+"""
+    return prompt, info
 
-## 深度分析
-（针对最重要的1-2个话题做简短分析）
 
-新闻数据：
-{news_context}
+def _build_reduce_prompt(news_data, tags, notes, model):
+    """
+    构建增量汇总提示词（只包含每篇文章的缓存要点，超出预算时丢弃排序靠后的要点）
+    
+    参数:
+        news_data (list): 按重要性排序的 Article 列表
+        tags (list): 用户选择的标签
+        notes (list): 与 news_data 对应的要点列表
+        model (str): 模型名称
+    
+    返回:
+        tuple: (提示词, 预算信息字典)
+    """
+    note_lines = [
+        f"{idx+1}. {note}（{item.source}）"
+        for idx, (item, note) in enumerate(zip(news_data, notes))
+    ]
+    kept, tokens = fit_entries(note_lines, get_token_budget(model))
+    info = {'tokens': tokens, 'articles': len(kept), 'dropped': len(note_lines) - len(kept)}
+    
+    prompt = f"""
+根据以下{len(kept)}条与"{', '.join(tags)}"相关新闻的要点，生成一份简洁的摘要报告。
+
+{SUMMARY_FORMAT}
+
+新闻要点：
+{chr(10).join(kept)}
 
 请用中文回复，确保内容准确、客观、简洁。
 """
+    return prompt, info
+
+
+@metrics.timed("summary_request")
+def _create_summary_stream(news_data, tags, model, incremental, priority=INTERACTIVE, notes=None):
+    """
+    构建提示词并向模型发起流式摘要请求
+    
+    参数:
+        news_data (list): Article 列表
+        tags (list): 用户选择的标签
+        model (str): 模型名称
+        incremental (bool): 是否使用增量模式
+        priority (str): 请求优先级（见 utils.rate_limiter）
+        notes (list): 增量模式下已提炼好的要点，为None时在此提炼
+    
+    返回:
+        tuple: (流式响应, 元数据字典)
+    
+    异常:
+        RateLimitExceeded: 该提供商的请求配额不足
+    """
+    # 识别模型提供商并创建客户端
+    provider, _ = get_model_provider(model)
+    client = create_client(model)
+    limiter = get_rate_limiter(f"llm:{provider}")
+    limiter.check(1, priority)
+    
+    # 构建提示词（增量模式先逐篇提炼要点，已缓存的文章不再调用模型）
+    if incremental:
+        if notes is None:
+            notes = summarize_articles(news_data, model, priority)
+        prompt, budget_info = _build_reduce_prompt(news_data, tags, notes, model)
+    else:
+        prompt, budget_info = _build_full_prompt(news_data, tags, model)
+    
+    prompt_tokens = estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(prompt)
+    logger.info(
+        f"提示词估算({model}): {prompt_tokens} tokens，包含{budget_info['articles']}条新闻"
+        f"（丢弃{budget_info['dropped']}条）"
+    )
+    
+    # 通用参数
+    common_params = {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        "stream": True,
+        "temperature": 0.7,
+        "top_p": 0.9,
+    }
+    
+    # 提供商特定参数调整
+    if provider == "deepseek":
+        # DeepSeek特定参数，如有需要可添加
+        pass
+    
+    # 创建请求（提供商返回429时按 Retry-After 暂停所有进程对该提供商的请求）
+    try:
+        stream = client.chat.completions.create(**common_params)
+    except Exception as e:
+        if getattr(e, 'status_code', None) == 429:
+            limiter.block(_retry_after_seconds(e))
+        raise
+    
+    meta = {
+        'model': model,
+        'provider': provider,
+        'prompt_tokens': prompt_tokens,
+        'prompt_articles': budget_info['articles'],
+    }
+    return stream, meta
+
+def _retry_after_seconds(error):
+    """
+    从API错误的响应头中解析 Retry-After 秒数
+    
+    参数:
+        error (Exception): openai.APIStatusError
+    
+    返回:
+        float | None: 秒数，没有该响应头时返回None
+    """
+    response = getattr(error, 'response', None)
+    value = response.headers.get('retry-after') if response is not None else None
+    try:
+        return max(0.0, float(value)) if value else None
+    except ValueError:
+        return None
+
+@metrics.timed()
+def generate_news_summary(news_data, tags, model=DEFAULT_MODEL, max_retries=1, incremental=None, hedge=None,
+                          priority=INTERACTIVE):
+    """
+    使用AI模型生成新闻摘要（支持OpenAI、DeepSeek等兼容OpenAI协议的模型）
+    
+    参数:
+        news_data (list): Article 列表
+        tags (list): 用户选择的标签
+        model (str): 使用的模型名称
+        max_retries (int): 最大重试次数
+        incremental (bool): 是否使用增量模式（逐篇要点缓存后汇总），默认由 SUMMARY_MODE 决定
+        hedge (bool): 是否启用对冲请求（首选模型迟迟无首个token时并行请求备用提供商），默认由 SUMMARY_HEDGE 决定
+        priority (str): 请求优先级，INTERACTIVE 或 BACKGROUND（见 utils.rate_limiter）
+    
+    返回:
+        SummaryStream: 可重复迭代的流式摘要（相同输入直接从缓存回放；所有可用提供商配额不足时为提示信息）
+    """
+    if incremental is None:
+        incremental = SUMMARY_MODE == "incremental"
+    if hedge is None:
+        hedge = SUMMARY_HEDGE
+    prompt_version = REDUCE_PROMPT_VERSION if incremental else SUMMARY_PROMPT_VERSION
+    
+    # 相同文章、标签、模型和提示词版本的摘要直接从缓存回放
+    cache_key = build_summary_key(news_data, tags, model, prompt_version)
+    cached = get_cached_summary(cache_key)
+    if cached:
+        logger.info(f"摘要缓存命中: {cache_key[:12]}")
+        return SummaryStream.from_text(cached['text'], cache_key=cache_key, meta=cached.get('meta'))
+    
+    # 相同输入的摘要正在生成时订阅同一个流（先回放已生成的内容，再接收后续内容）
+    live = _get_live_summary(cache_key)
+    if live is not None:
+        logger.info(f"加入正在生成的摘要: {cache_key[:12]}")
+        metrics.incr('single_flight_calls', group='summary', role='joined')
+        return live
+    
+    def start():
+        # 等待进入 single-flight 期间上一个请求可能已创建了流
+        live = _get_live_summary(cache_key)
+        if live is not None:
+            return live
+        stream = _start_summary(news_data, tags, model, max_retries, incremental, hedge, prompt_version, cache_key,
+                                priority)
+        if isinstance(stream, SummaryStream):
+            with _live_summaries_lock:
+                _live_summaries[cache_key] = stream
+        return stream
+    
+    stream, _ = _summary_flight.do(cache_key, start)
+    return stream
+
 
+def _get_live_summary(cache_key):
+    """
+    获取正在生成（或刚生成完）且未出错的摘要流
+
+    参数:
+        cache_key (str): 摘要缓存键
+
+    返回:
+        SummaryStream | None: 摘要流
+    """
+    with _live_summaries_lock:
+        live = _live_summaries.get(cache_key)
+    if live is None or live.failed:
+        return None
+    return live
+
+
+def _quota_error_message(error):
+    """配额不足时展示给用户的提示"""
+    return f"AI摘要请求已达到配额上限（{error}），请稍后再试"
+
+
+def _error_response(error_message, tried_models):
+    """
+    所有模型都失败时返回的响应块列表
+
+    参数:
+        error_message (str): 错误信息
+        tried_models (list): 尝试过的模型
+
+    返回:
+        list: 包含错误信息的响应块列表
+    """
+    error_details = f"生成摘要时出错: {error_message}\n尝试过的模型: {', '.join(tried_models)}"
+    return [{"choices": [{"delta": {"content": error_details}}]}]
+
+
+def _start_summary(news_data, tags, model, max_retries, incremental, hedge, prompt_version, cache_key,
+                   priority=INTERACTIVE):
+    """
+    向模型发起摘要请求（对冲或按备用模型重试）
+
+    参数:
+        news_data (list): Article 列表
+        tags (list): 用户选择的标签
+        model (str): 使用的模型名称
+        max_retries (int): 最大重试次数
+        incremental (bool): 是否使用增量模式
+        hedge (bool): 是否启用对冲请求
+        prompt_version (str): 提示词版本
+        cache_key (str): 首选模型的摘要缓存键（备用模型胜出时按实际模型重新计算）
+        priority (str): 请求优先级
+
+    返回:
+        SummaryStream | list: 摘要流，全部失败时返回包含错误信息的响应块列表
+    """
+    # 对冲模式：首选模型在 SUMMARY_HEDGE_DELAY 秒内无首个token时并行请求备用模型
+    hedge_model = HEDGE_MODELS.get(model)
+    if hedge and hedge_model and hedge_model != model:
+        # 增量模式的要点提炼（多批模型请求）只执行一次，只对最终的流式汇总请求做对冲
+        notes = None
+        if incremental:
+            try:
+                notes = summarize_articles(news_data, model, priority)
+            except Exception as e:
+                logger.warning(f"提炼要点失败，不使用对冲请求: {e}")
+                hedge = False
+        
+        if hedge:
+            def start(target_model):
+                return lambda: _create_summary_stream(news_data, tags, target_model, incremental, priority, notes)[0]
+            
+            providers = {target: get_model_provider(target)[0] for target in (model, hedge_model)}
+            meta = {'model': model, 'provider': providers[model]}
+            hedged = HedgedStream(
+                (model, providers[model], start(model)),
+                (hedge_model, providers[hedge_model], start(hedge_model)),
+                SUMMARY_HEDGE_DELAY,
+                meta=meta
+            )
+            try:
+                winner = hedged.wait_first()
+            except Exception as e:
+                logger.error(f"对冲请求全部失败: {e}")
+                message = _quota_error_message(e) if isinstance(e, RateLimitExceeded) else str(e)
+                return _error_response(message, [model, hedge_model])
+            
+            # 备用模型胜出时按实际模型记录缓存键
+            if winner != model:
+                cache_key = build_summary_key(news_data, tags, winner, prompt_version)
+                meta.update(model=winner, provider=providers[winner])
+            return SummaryStream(hedged, cache_key=cache_key, meta=meta)
+    
     tried_models = []
     current_model = model
     retries = 0
@@ -140,39 +597,33 @@ def generate_news_summary(news_data, tags, model=DEFAULT_MODEL, max_retries=1):
             tried_models.append(current_model)
             logger.info(f"正在使用模型: {current_model} 生成摘要")
             
-            # 识别模型提供商并创建客户端
-            provider, _ = get_model_provider(current_model)
-            client = create_client(current_model)
+            started_at = time.perf_counter()
+            stream, meta = _create_summary_stream(news_data, tags, current_model, incremental, priority)
             
-            # 通用参数
-            common_params = {
-                "model": current_model,
-                "messages": [
-                    {"role": "system", "content": "你是一位专业的新闻分析师和内容策展人。你的工作是整理和总结新闻内容，提取重点信息。"},
-                    {"role": "user", "content": prompt}
-                ],
-                "stream": True,
-                "temperature": 0.7,
-                "top_p": 0.9,
-            }
-            
-            # 提供商特定参数调整
-            if provider == "deepseek":
-                # DeepSeek特定参数，如有需要可添加
-                pass
-            
-            # 创建请求
-            stream = client.chat.completions.create(**common_params)
-            
-            # 返回流式生成结果
-            return stream
+            # 返回流式生成结果（边读取边记录，完成后写入缓存）
+            # 使用备用模型时按实际模型记录缓存键
+            if current_model != model:
+                cache_key = build_summary_key(news_data, tags, current_model, prompt_version)
+            return SummaryStream(stream, cache_key=cache_key, meta=meta, started_at=started_at)
         
         except Exception as e:
             error_message = str(e)
             retries += 1
             
             # 处理特定错误
-            if "unsupported_country_region_territory" in error_message:
+            if isinstance(e, RateLimitExceeded):
+                error_message = _quota_error_message(e)
+                
+                # 配额按提供商计算，尝试其他提供商的模型
+                alternative = FALLBACK_MODELS.get(current_model) or HEDGE_MODELS.get(current_model)
+                if alternative and alternative not in tried_models:
+                    logger.info(f"{current_model} 配额不足，切换到: {alternative}")
+                    current_model = alternative
+                    retries -= 1
+                    continue
+                # 没有可用的提供商时直接返回提示，不再重试
+                retries = max_retries + 1
+            elif "unsupported_country_region_territory" in error_message:
                 logger.warning(f"地区限制错误: {e}")
                 error_message = "当前地区不支持此模型服务。正在尝试备用模型..."
                 
@@ -186,5 +637,4 @@ def generate_news_summary(news_data, tags, model=DEFAULT_MODEL, max_retries=1):
             
             # 如果所有重试都失败，返回错误信息
             if retries > max_retries:
-                error_details = f"生成摘要时出错: {error_message}\n尝试过的模型: {', '.join(tried_models)}"
-                return [{"choices": [{"delta": {"content": error_details}}]}] 
\ No newline at end of file
+                return _error_response(error_message, tried_models) 
\ No newline at end of file
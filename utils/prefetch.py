@@ -0,0 +1,179 @@
+"""
+后台预取调度器
+
+定期为热门标签和已保存的标签组合刷新新闻与AI摘要，结果写入共享缓存，
+用户点击「获取新闻」时可直接命中缓存。每个服务进程只启动一个调度线程。
+"""
+import time
+import random
+import logging
+import threading
+from config.default_tags import HOT_TAGS
+from data.db_utils import get_tag_combinations
+from utils.news_api import fetch_news, normalize_tags, is_news_cache_fresh, get_news_source
+from utils.rate_limiter import BACKGROUND, min_interval
+from utils.query_planner import plan_queries
+from utils.openai_api import generate_news_summary, get_model_provider
+from utils.ranking import select_summary_news
+from config.settings import settings
+
+logger = logging.getLogger('prefetch')
+
+# 预取配置
+PREFETCH_ENABLED = settings.get_bool("PREFETCH_ENABLED", False)
+# 每轮预取的间隔（秒），一轮内的各标签组合均匀分布在该间隔内，避免突发占用上游配额
+PREFETCH_INTERVAL = settings.get_int("PREFETCH_INTERVAL", 600)
+# 是否同时预生成AI摘要
+PREFETCH_SUMMARY = settings.get_bool("PREFETCH_SUMMARY", True)
+# 每轮最多预取的标签组合数
+PREFETCH_MAX_TAG_SETS = settings.get_int("PREFETCH_MAX_TAG_SETS", 5)
+# 预取最多使用的上游配额比例，每轮间隔按配额自动延长
+PREFETCH_QUOTA_SHARE = settings.get_float("PREFETCH_QUOTA_SHARE", 0.5)
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_prefetch_tag_sets():
+    """
+    获取需要预取的标签组合（热门标签 + 已保存的标签组合，按规范化结果去重）
+
+    返回:
+        list: 标签列表的列表
+    """
+    tag_sets = [list(HOT_TAGS)]
+    tag_sets.extend(tags for tags in get_tag_combinations().values() if tags)
+
+    result = []
+    seen = set()
+    for tags in tag_sets:
+        key = tuple(normalize_tags(tags))
+        if key and key not in seen:
+            seen.add(key)
+            result.append(tags)
+    return result[:PREFETCH_MAX_TAG_SETS]
+
+
+def cycle_interval(tag_sets, model, interval=PREFETCH_INTERVAL, with_summary=PREFETCH_SUMMARY,
+                   share=PREFETCH_QUOTA_SHARE):
+    """
+    计算一轮预取的间隔：不短于 interval，且一轮的请求数不超过各上游配额的 share 比例
+
+    参数:
+        tag_sets (list): 本轮预取的标签组合
+        model (str): 生成摘要使用的模型
+        interval (int): 配置的最短间隔（秒）
+        with_summary (bool): 是否预生成摘要
+        share (float): 预取可使用的配额比例
+
+    返回:
+        float: 间隔秒数
+    """
+    quota_name = get_news_source().quota_name
+    if quota_name:
+        news_calls = sum(len(plan_queries(tags)) or 1 for tags in tag_sets)
+        interval = max(interval, min_interval(quota_name, news_calls, share))
+    if with_summary:
+        interval = max(interval, min_interval(f"llm:{get_model_provider(model)[0]}", len(tag_sets), share))
+    return interval
+
+
+def prefetch_tag_set(tags, model, with_summary=PREFETCH_SUMMARY):
+    """
+    刷新一个标签组合的新闻缓存，并预生成摘要写入摘要缓存（新闻缓存仍新鲜时跳过）
+
+    参数:
+        tags (list): 标签列表
+        model (str): 生成摘要使用的模型
+        with_summary (bool): 是否预生成摘要
+
+    返回:
+        bool: 是否执行了刷新
+    """
+    if is_news_cache_fresh(tags):
+        return False
+
+    news = fetch_news(tags, refresh=True, priority=BACKGROUND)
+    if not news or not with_summary:
+        return True
+
+    # 与 app.main 使用相同的选取方式，保证摘要缓存键一致
+    all_news = select_summary_news(news, tags)
+    stream = generate_news_summary(all_news, tags, model=model, priority=BACKGROUND)
+    # 读完整个流，摘要完成后会自动写入缓存
+    for _ in stream:
+        pass
+    return True
+
+
+class PrefetchScheduler(threading.Thread):
+    """
+    预取调度线程
+    """
+
+    def __init__(self, model, interval=PREFETCH_INTERVAL):
+        """
+        参数:
+            model (str): 生成摘要使用的模型
+            interval (int): 每轮预取的最短间隔（秒），实际间隔按配额延长（见 cycle_interval）
+        """
+        super().__init__(name="prefetch-scheduler", daemon=True)
+        self.model = model
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        # 启动时随机错开，避免多个进程同时预取
+        if self._stop_event.wait(random.uniform(0, min(30, self.interval))):
+            return
+
+        while not self._stop_event.is_set():
+            started = time.monotonic()
+            tag_sets = get_prefetch_tag_sets()
+            interval = cycle_interval(tag_sets, self.model, self.interval)
+            if interval > self.interval:
+                logger.info(f"按上游配额将预取间隔延长到 {interval:.0f} 秒")
+            spacing = interval / max(1, len(tag_sets))
+
+            for tags in tag_sets:
+                job_started = time.monotonic()
+                try:
+                    if prefetch_tag_set(tags, self.model):
+                        logger.info(f"预取完成: {', '.join(tags)}")
+                    else:
+                        logger.info(f"新闻缓存仍新鲜，跳过预取: {', '.join(tags)}")
+                except Exception as e:
+                    logger.warning(f"预取失败 ({', '.join(tags)}): {e}")
+
+                # 将本轮任务均匀分布在整个间隔内
+                if self._stop_event.wait(max(0.0, spacing - (time.monotonic() - job_started))):
+                    return
+
+            remaining = interval - (time.monotonic() - started)
+            if remaining > 0 and self._stop_event.wait(remaining):
+                return
+
+
+def start_prefetch_scheduler(model):
+    """
+    启动后台预取调度器（每个进程只启动一次，重复调用直接返回已有实例）
+
+    参数:
+        model (str): 生成摘要使用的模型
+
+    返回:
+        PrefetchScheduler | None: 调度器实例，未启用时返回None
+    """
+    global _scheduler
+    if not PREFETCH_ENABLED:
+        return None
+
+    with _scheduler_lock:
+        if _scheduler is None or not _scheduler.is_alive():
+            _scheduler = PrefetchScheduler(model)
+            _scheduler.start()
+            logger.info(f"后台预取已启动，间隔 {PREFETCH_INTERVAL} 秒")
+    return _scheduler
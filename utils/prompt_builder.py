@@ -0,0 +1,111 @@
+"""
+提示词构建工具
+
+按token预算组织新闻上下文：依次截短描述、去掉链接、丢弃排序靠后的文章，直到满足预算。
+"""
+import re
+from config.settings import settings
+
+# 预算不足时描述截短到的字符数
+PROMPT_DESC_TRIM_CHARS = settings.get_int("PROMPT_DESC_TRIM_CHARS", 100)
+
+# 中日韩字符及全角符号，大致每个字符计1个token
+_CJK_PATTERN = re.compile(r'[\u3000-\u303f\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uff00-\uffef]')
+
+
+def estimate_tokens(text):
+    """
+    粗略估算文本的token数（中文按字计，其余按每4个字符1个token计）
+
+    参数:
+        text (str): 文本
+
+    返回:
+        int: 估算的token数
+    """
+    if not text:
+        return 0
+    cjk = len(_CJK_PATTERN.findall(text))
+    other = len(text) - cjk
+    return cjk + (other + 3) // 4
+
+
+def _format_entry(idx, item, desc_chars=None, with_url=True):
+    """
+    格式化单条新闻
+
+    参数:
+        idx (int): 序号（从0开始）
+        item (Article): 新闻
+        desc_chars (int): 描述最大字符数，None表示不截短
+        with_url (bool): 是否包含链接
+
+    返回:
+        str: 格式化后的文本
+    """
+    title = item.title
+    description = item.description
+    source = item.source
+
+    if desc_chars is not None and len(description) > desc_chars:
+        description = description[:desc_chars] + "..."
+
+    text = f"{idx+1}. {title}\n来源: {source}\n描述: {description}\n"
+    if with_url:
+        text += f"链接: {item.url}\n"
+    return text
+
+
+def fit_entries(entries, budget):
+    """
+    从末尾（排序靠后）开始丢弃条目，直到总token数不超过预算（至少保留1条）
+
+    参数:
+        entries (list): 文本条目列表
+        budget (int): token预算
+
+    返回:
+        tuple: (保留的条目列表, 估算的token数)
+    """
+    tokens = [estimate_tokens(entry) for entry in entries]
+    total = sum(tokens)
+    count = len(entries)
+    while count > 1 and total > budget:
+        count -= 1
+        total -= tokens[count]
+    return entries[:count], total
+
+
+def build_news_context(news_data, budget):
+    """
+    在token预算内构建新闻上下文
+
+    超出预算时依次：截短描述、去掉链接、从末尾丢弃排序靠后的文章。
+
+    参数:
+        news_data (list): 按重要性排序的 Article 列表
+        budget (int): 新闻上下文的token预算
+
+    返回:
+        tuple: (上下文文本, 信息字典)，信息字典包含 tokens、articles、dropped、desc_trimmed、urls_dropped
+    """
+    levels = [
+        {'desc_chars': None, 'with_url': True},
+        {'desc_chars': PROMPT_DESC_TRIM_CHARS, 'with_url': True},
+        {'desc_chars': PROMPT_DESC_TRIM_CHARS, 'with_url': False},
+    ]
+
+    for level in levels:
+        entries = [_format_entry(idx, item, **level) for idx, item in enumerate(news_data)]
+        kept, tokens = fit_entries(entries, budget)
+        if len(kept) == len(entries):
+            break
+
+    info = {
+        'tokens': tokens,
+        'articles': len(kept),
+        'dropped': len(news_data) - len(kept),
+        'desc_trimmed': level['desc_chars'] is not None,
+        'urls_dropped': not level['with_url'],
+    }
+    return "\n".join(kept), info
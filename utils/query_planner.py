@@ -0,0 +1,125 @@
+"""
+NewsAPI查询规划工具
+
+将大量标签拆分为不超过查询长度限制的子查询，并行获取后按发布时间归并去重。
+"""
+import heapq
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from config.settings import settings
+
+logger = logging.getLogger('query_planner')
+
+# NewsAPI 的 q 参数最多允许500个字符
+NEWS_QUERY_MAX_LENGTH = settings.get_int("NEWS_QUERY_MAX_LENGTH", 500)
+# 并行子查询的最大线程数
+NEWS_QUERY_WORKERS = settings.get_int("NEWS_QUERY_WORKERS", 4)
+
+QUERY_SEPARATOR = " OR "
+
+
+def plan_queries(tags, max_length=NEWS_QUERY_MAX_LENGTH):
+    """
+    将标签按顺序装箱为若干个不超过长度限制的查询字符串
+
+    参数:
+        tags (list): 标签列表
+        max_length (int): 单个查询的最大字符数
+
+    返回:
+        list: 查询字符串列表
+    """
+    queries = []
+    current = []
+    current_length = 0
+
+    for tag in dict.fromkeys(tag.strip() for tag in tags if tag and tag.strip()):
+        # 单个标签本身超长时只能截断
+        if len(tag) > max_length:
+            logger.warning(f"标签过长，已截断: {tag[:20]}...")
+            tag = tag[:max_length]
+
+        added_length = len(tag) + (len(QUERY_SEPARATOR) if current else 0)
+        if current and current_length + added_length > max_length:
+            queries.append(QUERY_SEPARATOR.join(current))
+            current = []
+            current_length = 0
+            added_length = len(tag)
+
+        current.append(tag)
+        current_length += added_length
+
+    if current:
+        queries.append(QUERY_SEPARATOR.join(current))
+
+    return queries
+
+
+def merge_article_streams(streams, max_items):
+    """
+    对多个按发布时间倒序排列的文章流做K路堆归并，并按URL去重
+
+    参数:
+        streams (list): 文章列表的列表，每个列表已按 publishedAt 倒序排列
+        max_items (int): 最多返回的文章数
+
+    返回:
+        list: 归并后的文章列表
+    """
+    # NewsAPI 的 publishedAt 为统一的ISO 8601 UTC格式，可直接按字符串比较
+    merged = heapq.merge(*streams, key=lambda item: item.get('publishedAt') or '', reverse=True)
+
+    result = []
+    seen_urls = set()
+    for article in merged:
+        url = article.get('url')
+        if url:
+            if url in seen_urls:
+                continue
+            seen_urls.add(url)
+        result.append(article)
+        if len(result) >= max_items:
+            break
+
+    return result
+
+
+def fetch_planned(tags, params, request_fn, max_length=NEWS_QUERY_MAX_LENGTH, max_workers=NEWS_QUERY_WORKERS):
+    """
+    按查询计划并行获取文章并归并结果
+
+    参数:
+        tags (list): 标签列表
+        params (dict): 不含 q 的NewsAPI请求参数
+        request_fn (callable): 接收完整请求参数并返回文章列表的函数
+        max_length (int): 单个查询的最大字符数
+        max_workers (int): 最大并行线程数
+
+    返回:
+        list: 归并去重后的文章列表
+    """
+    queries = plan_queries(tags, max_length)
+    if not queries:
+        return []
+
+    if len(queries) == 1:
+        return request_fn(dict(params, q=queries[0]))
+
+    logger.info(f"标签查询已拆分为{len(queries)}个子查询")
+
+    streams = []
+    errors = []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(queries))) as executor:
+        futures = [executor.submit(request_fn, dict(params, q=query)) for query in queries]
+        for future in futures:
+            try:
+                streams.append(future.result())
+            except Exception as e:
+                logger.warning(f"子查询失败: {e}")
+                errors.append(e)
+
+    # 所有子查询都失败时向上抛出，部分失败时使用其余结果
+    if errors and not streams:
+        raise errors[0]
+
+    return merge_article_streams(streams, params.get('pageSize', len(queries) * 100))
@@ -0,0 +1,334 @@
+"""
+上游配额限流工具
+
+为NewsAPI和各LLM提供商维护令牌桶（每分钟、每天各一个），令牌余量保存在 cache.db 中，
+服务重启后保留，并由多个工作进程共享。每次取令牌在一个 BEGIN IMMEDIATE 事务内完成
+"读取-补充-扣减"，多个进程并发请求时不会超发。
+
+请求分为两个优先级：
+- interactive: 用户点击触发的请求，可以用完全部令牌，令牌不足时最多等待 RATE_LIMIT_MAX_WAIT 秒
+- background: 后台刷新和预取，只能使用超出保留比例 RATE_LIMIT_BACKGROUND_RESERVE 的令牌，且从不等待
+
+取不到令牌时调用方不再请求上游，改为返回缓存或本地存档中的数据。上游返回429时，
+block() 按 Retry-After 暂停该上游的所有请求。
+"""
+import time
+import sqlite3
+import logging
+import threading
+from config.settings import settings
+from data.cache_db import connect_cache_db
+from data.db_utils import transaction
+from utils import metrics
+
+logger = logging.getLogger('rate_limiter')
+
+# 是否启用上游限流
+RATE_LIMIT_ENABLED = settings.get_bool("RATE_LIMIT_ENABLED", True)
+# NewsAPI请求配额（0表示不限制；免费开发者套餐为每天100次）
+NEWSAPI_REQUESTS_PER_MINUTE = settings.get_int("NEWSAPI_REQUESTS_PER_MINUTE", 0)
+NEWSAPI_REQUESTS_PER_DAY = settings.get_int("NEWSAPI_REQUESTS_PER_DAY", 100)
+# 每个LLM提供商的请求配额（0表示不限制）
+LLM_REQUESTS_PER_MINUTE = settings.get_int("LLM_REQUESTS_PER_MINUTE", 60)
+LLM_REQUESTS_PER_DAY = settings.get_int("LLM_REQUESTS_PER_DAY", 0)
+# 为交互请求保留的令牌比例，后台请求不能动用这部分令牌
+RATE_LIMIT_BACKGROUND_RESERVE = settings.get_float("RATE_LIMIT_BACKGROUND_RESERVE", 0.2)
+# 交互请求令牌不足时的最长等待时间（秒）
+RATE_LIMIT_MAX_WAIT = settings.get_float("RATE_LIMIT_MAX_WAIT", 2.0)
+# 上游返回429且没有 Retry-After 时暂停请求的时间（秒）
+RATE_LIMIT_DEFAULT_BLOCK = settings.get_float("RATE_LIMIT_DEFAULT_BLOCK", 60)
+
+# 请求优先级
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+# 各类上游的令牌桶：(名称, 容量, 补满周期秒数)
+UPSTREAM_LIMITS = {
+    'newsapi': (
+        ('minute', NEWSAPI_REQUESTS_PER_MINUTE, 60),
+        ('day', NEWSAPI_REQUESTS_PER_DAY, 86400),
+    ),
+    'llm': (
+        ('minute', LLM_REQUESTS_PER_MINUTE, 60),
+        ('day', LLM_REQUESTS_PER_DAY, 86400),
+    ),
+}
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+class RateLimitExceeded(Exception):
+    """上游配额不足，请求未发出"""
+
+    def __init__(self, upstream, retry_after=None):
+        """
+        参数:
+            upstream (str): 上游名称
+            retry_after (float): 预计可再次请求的秒数
+        """
+        self.upstream = upstream
+        self.retry_after = retry_after
+        message = f"{upstream} 请求配额不足"
+        if retry_after:
+            message += f"，约{retry_after:.0f}秒后恢复"
+        super().__init__(message)
+
+
+class RateLimiter:
+    """
+    单个上游的持久化令牌桶限流器
+
+    每个令牌桶以 容量/周期 的速率连续补充令牌，上限为容量。
+    """
+
+    def __init__(self, upstream, limits, db_path=None):
+        """
+        参数:
+            upstream (str): 上游名称（如 newsapi、llm:openai）
+            limits (tuple): (名称, 容量, 补满周期秒数) 列表，容量<=0的令牌桶不生效
+            db_path (str): 数据库路径，默认为 cache_db.CACHE_DB_PATH
+        """
+        self.upstream = upstream
+        self.limits = tuple((window, capacity, period) for window, capacity, period in limits if capacity > 0)
+        self.db_path = db_path
+
+    @property
+    def enabled(self):
+        return RATE_LIMIT_ENABLED and bool(self.limits)
+
+    def _load(self, conn, now):
+        """读取各令牌桶并按经过的时间补充令牌，返回 {名称: (令牌数, 暂停截止时间)}"""
+        rows = {
+            row['bucket']: row
+            for row in conn.execute(
+                'SELECT bucket, tokens, updated_at, blocked_until FROM rate_limit_buckets WHERE upstream = ?',
+                (self.upstream,)
+            )
+        }
+        state = {}
+        for window, capacity, period in self.limits:
+            row = rows.get(window)
+            if row is None:
+                state[window] = (float(capacity), 0.0)
+                continue
+            elapsed = max(0.0, now - row['updated_at'])
+            state[window] = (min(float(capacity), row['tokens'] + elapsed * capacity / period), row['blocked_until'])
+        return state
+
+    def _save(self, conn, state, now):
+        conn.executemany('''
+        INSERT OR REPLACE INTO rate_limit_buckets (upstream, bucket, tokens, updated_at, blocked_until)
+        VALUES (?, ?, ?, ?, ?)
+        ''', [(self.upstream, window, tokens, now, blocked_until) for window, (tokens, blocked_until) in state.items()])
+
+    def try_acquire(self, cost=1, priority=INTERACTIVE):
+        """
+        尝试取出令牌（不等待）
+
+        参数:
+            cost (int): 需要的令牌数（即将发出的请求数）
+            priority (str): INTERACTIVE 或 BACKGROUND
+
+        返回:
+            tuple: (是否取得令牌, 预计还需等待的秒数)
+        """
+        if not self.enabled:
+            return True, 0.0
+
+        try:
+            conn = connect_cache_db(self.db_path)
+            with transaction(conn):
+                now = time.time()
+                state = self._load(conn, now)
+                wait = 0.0
+                for window, capacity, period in self.limits:
+                    tokens, blocked_until = state[window]
+                    if blocked_until > now:
+                        wait = max(wait, blocked_until - now)
+                    # 后台请求不能动用保留部分；单次需求超过容量时，等令牌补满即可放行（余量记为负数）
+                    reserve = capacity * RATE_LIMIT_BACKGROUND_RESERVE if priority == BACKGROUND else 0.0
+                    needed = min(reserve + cost, capacity)
+                    if tokens < needed:
+                        wait = max(wait, (needed - tokens) * period / capacity)
+
+                if wait > 0:
+                    return False, wait
+
+                self._save(conn, {
+                    window: (tokens - cost, blocked_until)
+                    for window, (tokens, blocked_until) in state.items()
+                }, now)
+            return True, 0.0
+
+        except sqlite3.Error as e:
+            # 配额记录不可用时不阻塞请求
+            logger.warning(f"读取{self.upstream}配额时出错: {e}")
+            return True, 0.0
+
+    def acquire(self, cost=1, priority=INTERACTIVE, max_wait=None):
+        """
+        取出令牌，交互请求在令牌不足时最多等待 max_wait 秒
+
+        参数:
+            cost (int): 需要的令牌数
+            priority (str): INTERACTIVE 或 BACKGROUND
+            max_wait (float): 最长等待秒数，默认交互请求为 RATE_LIMIT_MAX_WAIT，后台请求为0
+
+        返回:
+            bool: 是否取得令牌
+        """
+        if max_wait is None:
+            max_wait = RATE_LIMIT_MAX_WAIT if priority == INTERACTIVE else 0.0
+        deadline = time.monotonic() + max_wait
+
+        while True:
+            admitted, wait = self.try_acquire(cost, priority)
+            if admitted:
+                metrics.incr('rate_limit_decisions', upstream=self.upstream, priority=priority, result='admitted')
+                return True
+            if time.monotonic() + wait > deadline:
+                metrics.incr('rate_limit_decisions', upstream=self.upstream, priority=priority, result='rejected')
+                logger.warning(
+                    f"{self.upstream} 配额不足，拒绝{priority}请求（需要{cost}个令牌，约{wait:.0f}秒后恢复）"
+                )
+                return False
+            time.sleep(wait)
+
+    def check(self, cost=1, priority=INTERACTIVE, max_wait=None):
+        """
+        与 acquire() 相同，取不到令牌时抛出 RateLimitExceeded
+
+        参数:
+            cost (int): 需要的令牌数
+            priority (str): INTERACTIVE 或 BACKGROUND
+            max_wait (float): 最长等待秒数
+        """
+        if not self.acquire(cost, priority, max_wait):
+            raise RateLimitExceeded(self.upstream, self.retry_after(cost, priority))
+
+    def retry_after(self, cost=1, priority=INTERACTIVE):
+        """
+        预计可再次取得令牌的秒数（不扣减令牌）
+
+        参数:
+            cost (int): 需要的令牌数
+            priority (str): INTERACTIVE 或 BACKGROUND
+
+        返回:
+            float: 秒数
+        """
+        if not self.enabled:
+            return 0.0
+        try:
+            conn = connect_cache_db(self.db_path)
+            now = time.time()
+            state = self._load(conn, now)
+        except sqlite3.Error:
+            return 0.0
+        wait = 0.0
+        for window, capacity, period in self.limits:
+            tokens, blocked_until = state[window]
+            reserve = capacity * RATE_LIMIT_BACKGROUND_RESERVE if priority == BACKGROUND else 0.0
+            wait = max(wait, blocked_until - now, (min(reserve + cost, capacity) - tokens) * period / capacity)
+        return wait
+
+    def block(self, seconds=None):
+        """
+        上游返回429时暂停该上游的所有请求
+
+        参数:
+            seconds (float): 暂停秒数，默认为 RATE_LIMIT_DEFAULT_BLOCK
+        """
+        if not self.enabled:
+            return
+        seconds = RATE_LIMIT_DEFAULT_BLOCK if seconds is None else seconds
+        try:
+            conn = connect_cache_db(self.db_path)
+            with transaction(conn):
+                now = time.time()
+                state = self._load(conn, now)
+                self._save(conn, {
+                    window: (tokens, max(blocked_until, now + seconds))
+                    for window, (tokens, blocked_until) in state.items()
+                }, now)
+            metrics.incr('rate_limit_blocks', upstream=self.upstream)
+            logger.warning(f"{self.upstream} 返回请求过多，暂停请求{seconds:.0f}秒")
+        except sqlite3.Error as e:
+            logger.warning(f"记录{self.upstream}暂停状态时出错: {e}")
+
+    def status(self):
+        """
+        获取各令牌桶的当前余量
+
+        返回:
+            list: 包含 upstream、window、capacity、tokens、blocked_for 的字典列表
+        """
+        if not self.enabled:
+            return []
+        try:
+            now = time.time()
+            state = self._load(connect_cache_db(self.db_path), now)
+        except sqlite3.Error as e:
+            logger.warning(f"读取{self.upstream}配额时出错: {e}")
+            return []
+        return [
+            {
+                'upstream': self.upstream,
+                'window': window,
+                'capacity': capacity,
+                'tokens': max(0.0, state[window][0]),
+                'blocked_for': max(0.0, state[window][1] - now),
+            }
+            for window, capacity, _ in self.limits
+        ]
+
+
+def get_rate_limiter(upstream):
+    """
+    获取上游的限流器（按上游名称冒号前的类型选择配额，如 llm:openai 使用 llm 的配额）
+
+    参数:
+        upstream (str): 上游名称
+
+    返回:
+        RateLimiter: 限流器
+    """
+    limiter = _limiters.get(upstream)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(upstream)
+            if limiter is None:
+                limits = UPSTREAM_LIMITS.get(upstream.split(':', 1)[0], ())
+                limiter = _limiters[upstream] = RateLimiter(upstream, limits)
+    return limiter
+
+
+def min_interval(upstream, calls, share=1.0):
+    """
+    按配额计算执行 calls 次请求所需的最短周期
+
+    参数:
+        upstream (str): 上游名称
+        calls (int): 每个周期的请求数
+        share (float): 允许使用的配额比例
+
+    返回:
+        float: 秒数，上游不限流时返回0
+    """
+    limiter = get_rate_limiter(upstream)
+    if not limiter.enabled or calls <= 0 or share <= 0:
+        return 0.0
+    return max(calls * period / (capacity * share) for _, capacity, period in limiter.limits)
+
+
+def get_rate_limit_status():
+    """
+    获取本进程用过的所有上游的配额余量
+
+    返回:
+        list: 各令牌桶的状态字典列表
+    """
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return [row for limiter in limiters for row in limiter.status()]
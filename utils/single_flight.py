@@ -0,0 +1,93 @@
+"""
+请求合并（single-flight）工具
+
+热点新闻出现时，大量会话会在几秒内用相同的标签请求新闻和摘要。SingleFlight 保证
+同一进程内相同键的并发调用只执行一次上游请求，其余调用等待并共享同一个结果（或异常）。
+调用结束后立即移除记录，之后的调用会重新执行，不承担缓存职责。
+"""
+import logging
+import threading
+from utils import metrics
+
+logger = logging.getLogger('single_flight')
+
+
+class _Call:
+    """一次进行中的调用"""
+
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    按键合并并发调用
+    """
+
+    def __init__(self, name):
+        """
+        参数:
+            name (str): 名称（用于日志和指标标签）
+        """
+        self.name = name
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func):
+        """
+        执行 func，若相同键的调用正在进行则等待其结果
+
+        参数:
+            key (str): 规范化后的请求键
+            func (callable): 无参数的上游调用
+
+        返回:
+            tuple: (结果, 是否为共享的结果)
+
+        异常:
+            上游调用抛出的异常会传递给所有等待者
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                leader = True
+
+        if not leader:
+            metrics.incr('single_flight_calls', group=self.name, role='shared')
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        metrics.incr('single_flight_calls', group=self.name, role='leader')
+        try:
+            call.result = func()
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+            if call.waiters:
+                logger.info(f"[{self.name}] {key[:12]} 合并了{call.waiters}个相同的并发请求")
+
+    def in_flight(self):
+        """
+        当前进行中的调用数
+
+        返回:
+            int: 调用数
+        """
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,290 @@
+"""
+AI摘要缓存与回放工具
+
+已完成的摘要按输入内容的哈希缓存，Streamlit重新运行或其他用户请求相同内容时直接回放，不再调用模型。
+"""
+import json
+import time
+import hashlib
+import threading
+from data.cache_db import SQLiteCache
+from config.settings import settings
+
+# 提示词版本，修改摘要提示词时需同步递增，使旧缓存失效
+SUMMARY_PROMPT_VERSION = "v2"
+# 增量模式下的单篇要点提示词版本与汇总提示词版本
+NOTES_PROMPT_VERSION = "notes-v1"
+REDUCE_PROMPT_VERSION = "reduce-v1"
+
+# 摘要缓存配置
+SUMMARY_CACHE_TTL = settings.get_int("SUMMARY_CACHE_TTL", 86400)
+SUMMARY_CACHE_MAX_ENTRIES = settings.get_int("SUMMARY_CACHE_MAX_ENTRIES", 500)
+
+# 随摘要一起缓存的元数据字段
+CACHED_META_FIELDS = ('model', 'provider', 'winner', 'winner_provider', 'ttft', 'hedged', 'prompt_tokens')
+
+# 单篇文章要点缓存配置
+ARTICLE_NOTES_CACHE_TTL = settings.get_int("ARTICLE_NOTES_CACHE_TTL", 604800)
+ARTICLE_NOTES_CACHE_MAX_ENTRIES = settings.get_int("ARTICLE_NOTES_CACHE_MAX_ENTRIES", 5000)
+
+_summary_cache = SQLiteCache(
+    'summaries',
+    ttl=SUMMARY_CACHE_TTL,
+    max_entries=SUMMARY_CACHE_MAX_ENTRIES
+)
+
+_notes_cache = SQLiteCache(
+    'article_notes',
+    ttl=ARTICLE_NOTES_CACHE_TTL,
+    max_entries=ARTICLE_NOTES_CACHE_MAX_ENTRIES
+)
+
+
+def build_summary_key(news_data, tags, model, prompt_version=SUMMARY_PROMPT_VERSION):
+    """
+    根据文章URL、标签、模型和提示词版本构建摘要缓存键
+
+    参数:
+        news_data (list): Article 列表
+        tags (list): 用户选择的标签
+        model (str): 模型名称
+        prompt_version (str): 提示词版本
+
+    返回:
+        str: 缓存键
+    """
+    raw = json.dumps({
+        'urls': sorted(item.url or item.title for item in news_data),
+        'tags': sorted({tag.strip().lower() for tag in tags if tag and tag.strip()}),
+        'model': model,
+        'prompt_version': prompt_version
+    }, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def get_cached_summary(key):
+    """
+    读取已缓存的摘要
+
+    参数:
+        key (str): 缓存键
+
+    返回:
+        dict | None: 包含 text 和 meta 的字典
+    """
+    cached = _summary_cache.get(key)
+    if cached is None:
+        return None
+    value = cached[0]
+    if isinstance(value, str):
+        return {'text': value, 'meta': {}}
+    return value
+
+
+def build_article_note_key(item, model, prompt_version=NOTES_PROMPT_VERSION):
+    """
+    根据文章URL和内容哈希构建单篇要点缓存键（内容变化时自动失效）
+
+    参数:
+        item (Article): 新闻
+        model (str): 模型名称
+        prompt_version (str): 要点提示词版本
+
+    返回:
+        str: 缓存键
+    """
+    content = '\n'.join((item.title, item.description, item.source))
+    content_hash = hashlib.sha256(content.encode('utf-8')).hexdigest()
+    raw = json.dumps({
+        'url': item.url,
+        'content': content_hash,
+        'model': model,
+        'prompt_version': prompt_version
+    }, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def get_article_note(key):
+    """
+    读取已缓存的单篇文章要点
+
+    参数:
+        key (str): 缓存键
+
+    返回:
+        str | None: 文章要点
+    """
+    cached = _notes_cache.get(key)
+    if cached is None:
+        return None
+    return cached[0]
+
+
+def set_article_note(key, note):
+    """
+    缓存单篇文章要点
+
+    参数:
+        key (str): 缓存键
+        note (str): 文章要点
+    """
+    _notes_cache.set(key, note)
+
+
+def get_summary_cache_stats():
+    """
+    获取摘要缓存命中统计
+
+    返回:
+        dict: 命中、未命中、淘汰次数及当前条目数
+    """
+    return _summary_cache.stats()
+
+
+def extract_chunk_content(chunk):
+    """
+    从流式响应块中提取文本内容（兼容对象和字典两种格式）
+
+    参数:
+        chunk: 流式响应块
+
+    返回:
+        str: 文本内容
+    """
+    try:
+        return chunk.choices[0].delta.content or ''
+    except (AttributeError, IndexError):
+        pass
+    if isinstance(chunk, dict):
+        try:
+            return chunk.get('choices', [{}])[0].get('delta', {}).get('content', '') or ''
+        except (AttributeError, IndexError):
+            return chunk.get('content', '') or ''
+    return getattr(chunk, 'content', '') or ''
+
+
+def make_chunk(content):
+    """
+    构造与OpenAI流式响应兼容的字典格式响应块
+
+    参数:
+        content (str): 文本内容
+
+    返回:
+        dict: 响应块
+    """
+    return {"choices": [{"delta": {"content": content}}]}
+
+
+class SummaryStream:
+    """
+    可重复迭代、可多方同时订阅的摘要流
+
+    任一迭代器需要新内容时从上游模型流读取并记录文本块，完整结束后写入缓存；
+    其他迭代器（如Streamlit重新运行或合并到同一请求的其他会话）先回放已记录的内容，
+    再等待正在读取的迭代器取得新块，同一时刻只有一个迭代器读取上游。
+    读取上游的迭代器被放弃时，下一个需要新内容的迭代器接着读取。
+    """
+
+    def __init__(self, upstream=None, cache_key=None, text=None, meta=None, started_at=None):
+        """
+        参数:
+            upstream: 上游流式响应，为None时表示从缓存文本回放
+            cache_key (str): 摘要缓存键，完成后按此写入缓存
+            text (str): 已缓存的完整摘要文本
+            meta (dict): 摘要元数据（模型、提示词规模、首token耗时等），可与上游共享
+            started_at (float): 请求发起时的 time.perf_counter()，用于计算首token耗时
+        """
+        self._upstream = iter(upstream) if upstream is not None else None
+        self._cache_key = cache_key
+        self._chunks = [text] if text else []
+        self._complete = upstream is None
+        self._pulling = False
+        self._cond = threading.Condition()
+        self._started_at = started_at if started_at is not None else time.perf_counter()
+        self.from_cache = upstream is None
+        self.meta = meta if meta is not None else {}
+        self.meta.update({'cache_key': cache_key, 'from_cache': self.from_cache})
+
+    @classmethod
+    def from_text(cls, text, cache_key=None, meta=None):
+        """
+        从已缓存的完整文本创建回放流
+
+        参数:
+            text (str): 摘要文本
+            cache_key (str): 缓存键
+            meta (dict): 缓存的摘要元数据
+
+        返回:
+            SummaryStream: 回放流
+        """
+        return cls(text=text, cache_key=cache_key, meta=dict(meta or {}))
+
+    @property
+    def complete(self):
+        return self._complete
+
+    @property
+    def failed(self):
+        """上游是否中途出错"""
+        return bool(self.meta.get('failed'))
+
+    @property
+    def text(self):
+        """当前已记录的摘要文本"""
+        return ''.join(self._chunks)
+
+    def __iter__(self):
+        index = 0
+        while True:
+            with self._cond:
+                # 其他迭代器正在读取上游时等待其结果
+                while index >= len(self._chunks) and not self._complete and self._pulling:
+                    self._cond.wait()
+                if index < len(self._chunks):
+                    content = self._chunks[index]
+                elif self._complete:
+                    return
+                else:
+                    self._pulling = True
+                    content = None
+            if content is None:
+                # 在锁外读取上游，不阻塞回放已记录内容的迭代器
+                content = self._pull()
+                if content is None:
+                    return
+            index += 1
+            yield make_chunk(content)
+
+    def _pull(self):
+        """从上游读取下一个非空文本块，上游结束时写入缓存并返回None"""
+        try:
+            try:
+                for chunk in self._upstream:
+                    content = extract_chunk_content(chunk)
+                    if content:
+                        with self._cond:
+                            if not self._chunks and 'ttft' not in self.meta:
+                                self.meta['ttft'] = time.perf_counter() - self._started_at
+                            self._chunks.append(content)
+                        return content
+            except Exception:
+                # 上游中断时不缓存不完整的摘要
+                with self._cond:
+                    self._complete = True
+                    self._upstream = None
+                    self.meta['failed'] = True
+                raise
+
+            with self._cond:
+                self._complete = True
+                self._upstream = None
+            if self._cache_key and self._chunks:
+                meta = {field: self.meta[field] for field in CACHED_META_FIELDS if field in self.meta}
+                _summary_cache.set(self._cache_key, {'text': self.text, 'meta': meta})
+            return None
+        finally:
+            with self._cond:
+                self._pulling = False
+                self._cond.notify_all()